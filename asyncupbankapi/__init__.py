@@ -1,5 +1,56 @@
-"""Typed python client for interacting with Up's banking API."""
-from asyncupbankapi.client import Client
+"""Typed python client for interacting with Up's banking API.
+
+Everything apart from the constants and exceptions is imported on first use so importing the package stays cheap.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
 from asyncupbankapi.exceptions import *
-from asyncupbankapi.httpSession import HttpSession
 from asyncupbankapi.const import BASE_URL, PAGE_SIZE
+
+if TYPE_CHECKING:
+    from asyncupbankapi.cache import DiskCache, MemoryCache, ResponseCache
+    from asyncupbankapi.client import Client
+    from asyncupbankapi.clientPool import ClientPool
+    from asyncupbankapi.codec import JsonCodec, get_codec
+    from asyncupbankapi.connectionPool import ConnectionPool
+    from asyncupbankapi.httpSession import HttpSession
+    from asyncupbankapi.instrumentation import Hooks
+    from asyncupbankapi.metrics import MetricsCollector, prometheus_text
+    from asyncupbankapi.models.baseModels import Checkpoint
+    from asyncupbankapi.rateLimiter import RateLimiter
+
+_LAZY = {
+    "DiskCache": "asyncupbankapi.cache",
+    "MemoryCache": "asyncupbankapi.cache",
+    "ResponseCache": "asyncupbankapi.cache",
+    "Client": "asyncupbankapi.client",
+    "ClientPool": "asyncupbankapi.clientPool",
+    "JsonCodec": "asyncupbankapi.codec",
+    "get_codec": "asyncupbankapi.codec",
+    "ConnectionPool": "asyncupbankapi.connectionPool",
+    "HttpSession": "asyncupbankapi.httpSession",
+    "Hooks": "asyncupbankapi.instrumentation",
+    "MetricsCollector": "asyncupbankapi.metrics",
+    "prometheus_text": "asyncupbankapi.metrics",
+    "Checkpoint": "asyncupbankapi.models.baseModels",
+    "RateLimiter": "asyncupbankapi.rateLimiter",
+}
+
+__all__ = [
+    "BASE_URL", "PAGE_SIZE", "UpBankException", "NotAuthorizedException", "NotFoundException",
+    "RateLimitExceededException", "BadResponseException", "PaginationClosedException", *_LAZY]
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module), name)
+    # Cached so the module is only looked up once.
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,134 @@
+"""Bulk operations that run many requests concurrently."""
+import asyncio
+import random
+from typing import AsyncIterable, Iterable, List, NamedTuple, Optional, Tuple, Union
+from uuid import UUID
+
+import aiohttp
+
+from asyncupbankapi.exceptions import RateLimitExceededException, UpBankException
+from asyncupbankapi.httpSession import HttpSession, endpoint_template
+from asyncupbankapi.instrumentation import Retry, emit
+from asyncupbankapi.models.transactions import Transaction, tag_payload
+
+TransactionOrId = Union[Transaction, UUID, str]
+TagItems = Union[Iterable[Tuple[TransactionOrId, Iterable[str]]], AsyncIterable[TransactionOrId]]
+
+
+class TagResult(NamedTuple):
+    """The outcome of adding or removing tags from a single transaction, `transaction_id` is empty for an invalid item."""
+    transaction_id: str
+    tags: List[str]
+    error: Optional[Exception] = None
+    attempts: int = 1
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _is_transient(error: Exception) -> bool:
+    if isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, RateLimitExceededException)):
+        return True
+    # Rate limits and server errors are worth retrying, anything else such as a missing transaction will fail again.
+    status = _status(error) if isinstance(error, UpBankException) else None
+    return status is not None and (status == 429 or 500 <= status < 600)
+
+
+def _status(error: Exception) -> Optional[int]:
+    status = getattr(error, "status", None)
+    return int(status) if status is not None and str(status).isdigit() else None
+
+
+def _transaction_id(transaction: TransactionOrId) -> str:
+    if isinstance(transaction, (str, UUID)):
+        return str(transaction)
+    transaction_id = transaction.get("id") if isinstance(transaction, dict) else getattr(transaction, "id", None)
+    if transaction_id is None:
+        raise TypeError(f"expected a transaction or a transaction id, got {transaction!r}")
+    return str(transaction_id)
+
+
+async def _pairs(items: TagItems, tags: Optional[Iterable[str]]) -> AsyncIterable[Tuple[TransactionOrId, List[str]]]:
+    if hasattr(items, "__aiter__"):
+        if tags is None:
+            raise ValueError("tags must be given when tagging every transaction of a pager")
+        tags = list(tags)
+        async for transaction in items:
+            yield transaction, tags
+    else:
+        for transaction, transaction_tags in items:
+            yield transaction, list(transaction_tags)
+
+
+async def update_tags(
+    session: HttpSession,
+    method: str,
+    items: TagItems,
+    tags: Optional[Iterable[str]] = None,
+    concurrency: int = 8,
+    retries: int = 2,
+    backoff: float = 0.5,
+) -> List[TagResult]:
+    """Adds ("POST") or removes ("DELETE") tags from many transactions concurrently, results are returned in the order given.
+
+    :param session: session used to make the requests
+    :param method: "POST" to add tags or "DELETE" to remove them
+    :param items: (transaction, tags) pairs, or a pager of transactions when `tags` is given
+    :param tags: tags applied to every transaction of a pager
+    :param concurrency: maximum number of requests made at the same time
+    :param retries: number of times a request that failed with a network, server or rate limit error is retried
+    :param backoff: initial delay in seconds between retries, doubled on each retry
+    """
+    request = session.post if method == "POST" else session.delete
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    results: List[Optional[TagResult]] = []
+
+    async def work() -> None:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, transaction, transaction_tags = item
+            try:
+                transaction_id = _transaction_id(transaction)
+            except TypeError as e:
+                # Reported in the item's result, a worker that died would leave the queue full and the caller waiting.
+                results[index] = TagResult("", transaction_tags, e, 0)
+                continue
+
+            url = f"{session.base_url}/transactions/{transaction_id}/relationships/tags"
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    await request(url, payload=tag_payload(transaction_tags))
+                    results[index] = TagResult(transaction_id, transaction_tags, attempts=attempt)
+                    break
+                except asyncio.CancelledError:
+                    # An Exception before Python 3.8, it would otherwise be reported as the item's result.
+                    raise
+                except Exception as e:
+                    if attempt > retries or not _is_transient(e):
+                        results[index] = TagResult(transaction_id, transaction_tags, e, attempt)
+                        break
+                    delay = random.uniform(0, backoff * 2 ** (attempt - 1))
+                    if session.hooks:
+                        emit(session.hooks, "on_retry", Retry(
+                            method, url, endpoint_template(url), attempt - 1, delay, _status(e), e))
+                    await asyncio.sleep(delay)
+
+    workers = [asyncio.ensure_future(work()) for _ in range(max(1, concurrency))]
+    try:
+        async for transaction, transaction_tags in _pairs(items, tags):
+            results.append(None)
+            await queue.put((len(results) - 1, transaction, transaction_tags))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    return results
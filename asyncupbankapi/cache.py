@@ -0,0 +1,182 @@
+"""Response caches used by HttpSession to avoid requesting slow changing resources again."""
+import abc
+import json
+import sqlite3
+from collections import OrderedDict
+from time import monotonic, time
+from typing import Dict, Optional, Tuple
+
+DEFAULT_TTLS = {
+    "/categories": 24 * 60 * 60,
+    "/categories/{id}": 24 * 60 * 60,
+    "/tags": 5 * 60,
+    "/accounts/{id}": 60,
+    "/webhooks/{id}": 5 * 60,
+}
+
+
+class ResponseCache(abc.ABC):
+    """Base class for response caches.
+
+    Only GET requests to endpoints with a ttl are cached, ttls are looked up by endpoint template such as "/categories/{id}".
+    Cached responses are shared between callers and must not be modified. HttpSession keys responses by url and a hash of
+    its token, "<url>#<hash>", so a cache shared by sessions of different users never returns one user's data to another.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, maxsize: int = 1024) -> None:
+        """Response cache.
+
+        :param ttls: seconds responses are cached for by endpoint template, merged with the defaults (set a ttl to 0 to disable caching)
+        :param maxsize: maximum number of cached responses, the least recently used response is evicted first
+        """
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def ttl(self, template: str) -> float:
+        """Returns how long responses of the endpoint template are cached for."""
+        return self.ttls.get(template, 0)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the cached response or None if it is missing or expired."""
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: dict, ttl: float) -> None:
+        """Caches a response for `ttl` seconds."""
+        self._set(key, value, ttl)
+
+    @abc.abstractmethod
+    def invalidate(self, prefix: str) -> int:
+        """Removes every cached response of urls starting with `prefix`, returns the number of responses removed.
+
+        :param prefix: a url such as "https://api.up.com.au/api/v1/tags", urls of sub resources, query strings and the
+            responses of every token also match
+        """
+
+    @abc.abstractmethod
+    def clear(self) -> None:
+        """Removes every cached response."""
+
+    @abc.abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self)}
+
+    @abc.abstractmethod
+    def _get(self, key: str) -> Optional[dict]:
+        pass
+
+    @abc.abstractmethod
+    def _set(self, key: str, value: dict, ttl: float) -> None:
+        pass
+
+    @staticmethod
+    def _matches(key: str, prefix: str) -> bool:
+        return key.startswith(prefix) and (len(key) == len(prefix) or key[len(prefix)] in "/?#")
+
+
+class MemoryCache(ResponseCache):
+    """In memory least recently used cache."""
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, maxsize: int = 1024) -> None:
+        super().__init__(ttls, maxsize)
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+
+    def _get(self, key: str) -> Optional[dict]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def _set(self, key: str, value: dict, ttl: float) -> None:
+        self._entries[key] = (monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, prefix: str) -> int:
+        keys = [key for key in self._entries if self._matches(key, prefix)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskCache(ResponseCache):
+    """Least recently used cache stored in a SQLite database so it survives restarts."""
+
+    def __init__(self, path: str, ttls: Optional[Dict[str, float]] = None, maxsize: int = 10000) -> None:
+        """Disk backed response cache.
+
+        :param path: path of the SQLite database file
+        """
+        super().__init__(ttls, maxsize)
+        self._db = sqlite3.connect(path)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, expires REAL NOT NULL, used REAL NOT NULL, value TEXT NOT NULL)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_used ON responses (used)")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def _get(self, key: str) -> Optional[dict]:
+        # Wall clock time is used as entries outlive the process.
+        now = time()
+        row = self._db.execute("SELECT expires, value FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        with self._db:
+            if row[0] <= now:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._db.execute("UPDATE responses SET used = ? WHERE key = ?", (now, key))
+        return json.loads(row[1])
+
+    def _set(self, key: str, value: dict, ttl: float) -> None:
+        now = time()
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, expires, used, value) VALUES (?, ?, ?, ?)",
+                (key, now + ttl, now, json.dumps(value)))
+            overflow = len(self) - self.maxsize
+            if overflow > 0:
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY used LIMIT ?)", (overflow,))
+                self.evictions += overflow
+
+    def invalidate(self, prefix: str) -> int:
+        keys = [row[0] for row in self._db.execute(
+            "SELECT key FROM responses WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)) if self._matches(row[0], prefix)]
+        with self._db:
+            self._db.executemany("DELETE FROM responses WHERE key = ?", [(key,) for key in keys])
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._db:
+            self._db.execute("DELETE FROM responses")
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
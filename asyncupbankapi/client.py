@@ -1,41 +1,100 @@
 from __future__ import annotations
-from datetime import datetime
-from typing import Dict, Optional, Union
+import asyncio
+from concurrent.futures import Executor
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Union
 from uuid import UUID
+import aiohttp
 from yarl import URL
+from asyncupbankapi.codec import JsonCodec
+from asyncupbankapi.connectionPool import ConnectionPool
 from asyncupbankapi.httpSession import HttpSession
+from asyncupbankapi.instrumentation import Hooks
+from asyncupbankapi.iterators import merge
+from asyncupbankapi.rateLimiter import RateLimiter
 from asyncupbankapi.const import BASE_URL, PAGE_SIZE
-from asyncupbankapi.models.accounts import Account, Accounts
-from asyncupbankapi.models.categories import Category, Categories
-from asyncupbankapi.models.tags import Tags
-from asyncupbankapi.models.transactions import Transaction, Transactions
-from asyncupbankapi.models.utility import Ping
-from asyncupbankapi.models.webhooks import Webhook, WebhookEvent, WebhookLogs, Webhooks
+# Models are looked up on the package so only the modules of the endpoints used are imported.
+from asyncupbankapi import models
+
+if TYPE_CHECKING:
+    from asyncupbankapi.bulk import TagItems, TagResult
+    from asyncupbankapi.cache import ResponseCache
+    from asyncupbankapi.models import (Account, Accounts, Categories, Category, Ping, Tags, Transaction, Transactions,
+                                       Webhook, WebhookEvent, WebhookLogs, Webhooks)
+    from asyncupbankapi.models.baseModels import CheckpointCallback, Pagination
 
 
 class Client:
-    def __init__(self, token: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        pool: Optional[ConnectionPool] = None,
+        connector: Optional[aiohttp.BaseConnector] = None,
+        cache: Optional[ResponseCache] = None,
+        coalesce: bool = True,
+        codec: Optional[JsonCodec] = None,
+        base_url: str = BASE_URL,
+        hooks: Optional[Sequence[Hooks]] = None,
+        client_session: Optional[aiohttp.ClientSession] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
         """UP Bank API Client.
 
         :param token: UP Bank Token if not provided fetches "UP_TOKEN" from environment variables
+        :param rate_limiter: optional rate limiter, requests are throttled and rate limited requests retried with backoff.
+            The same instance can be shared between clients using the same token.
+        :param pool: optional connection pool settings such as connection limits and keep-alive timeout
+        :param connector: optional connector to share between clients, the caller is responsible for closing it
+        :param cache: optional cache for slow changing resources such as categories, tags and single accounts
+        :param coalesce: share one request between identical GET requests made at the same time
+        :param codec: JSON codec used for request and response bodies, defaults to the fastest installed (orjson, ujson or json)
+        :param base_url: url of the API, for example a local mock server
+        :param hooks: instrumentation hooks notified of every request, retry and parsed page, such as a MetricsCollector
+        :param client_session: optional aiohttp session shared between clients of different tokens, see ClientPool
+        :param executor: optional executor that pages are decoded and validated in, such as a ProcessPoolExecutor, so the
+            event loop only moves bytes during large backfills. The caller is responsible for shutting it down
         """
-        self._session = HttpSession(token)
+        self._session = HttpSession(
+            token, rate_limiter=rate_limiter, pool=pool, connector=connector, cache=cache, coalesce=coalesce,
+            codec=codec, base_url=base_url, hooks=hooks, client_session=client_session,
+            executor=executor)
         self.webhook = WebhookAdapter(self._session)
 
+    @property
+    def session(self) -> HttpSession:
+        """The session used to make requests."""
+        return self._session
+
     async def close(self) -> None:
         await self._session.close()
 
+    async def warm_up(self, connections: int = 1) -> None:
+        """Opens connections to the API ahead of time, each connection costs one ping request.
+
+        :param connections: number of connections to open, usually the number of concurrent requests expected
+        """
+        await self._session.warm_up(f"{self._session.base_url}/util/ping", connections)
+
     async def ping(self) -> Ping:
         """Returns the users unique id and emoji and will raise an exception if the token is not valid."""
-        return Ping.parse_obj(await self._session.get(f"{BASE_URL}/util/ping"))
+        return models.Ping.parse_obj(await self._session.get(f"{self._session.base_url}/util/ping"))
 
     async def accounts(
-        self, limit: Optional[int] = None, page_size: int = None,
+        self,
+        limit: Optional[int] = None,
+        page_size: int = None,
+        prefetch: int = 1,
+        retain: bool = True,
+        raw: bool = False,
     ) -> Accounts:
         """Returns a list of the users accounts.
 
         :param limit: maximum number of records to return (set to None for all transactions)
         :param page_size: number of records to fetch in each request (max 100)
+        :param prefetch: number of pages to fetch ahead while iterating
+        :param retain: keep every record in memory, set to False to drop pages once iterated
+        :param raw: return each record as the dictionary returned by the API, skipping model validation
         """
         params = {}
 
@@ -45,15 +104,19 @@ class Client:
         if page_size:
             params.update({PAGE_SIZE: str(page_size)})
 
-        return Accounts(
-            data=await self._session.get(f"{BASE_URL}/accounts", params=params),
-            session=self._session,
-            limit=limit)
+        return await models.Accounts.fetch(
+            self._session,
+            f"{self._session.base_url}/accounts",
+            params,
+            limit=limit,
+            prefetch=prefetch,
+            retain=retain,
+            raw=raw)
 
     async def account(self, account_id: UUID) -> Account:
         """Returns a single account by its unique account id."""
-        return Account(
-            data=await self._session.get(f"{BASE_URL}/accounts/{account_id}"),
+        return models.Account(
+            data=await self._session.get(f"{self._session.base_url}/accounts/{account_id}"),
             session=self._session)
 
     async def transactions(
@@ -64,7 +127,12 @@ class Client:
         since: Optional[datetime] = None,
         until: Optional[datetime] = None,
         category: Optional[str] = None,
-        tag: Optional[str] = None
+        tag: Optional[str] = None,
+        prefetch: int = 1,
+        retain: bool = True,
+        raw: bool = False,
+        on_checkpoint: Optional[CheckpointCallback] = None,
+        checkpoint_every: int = 1,
     ) -> Transactions:
         """Returns transactions for a specific account or all accounts.
 
@@ -76,6 +144,11 @@ class Client:
         :param category:
         :param tag:
         :param account_id: optionally supply a unique id of the account to fetch transactions from
+        :param prefetch: number of pages to fetch ahead while iterating
+        :param retain: keep every record in memory, set to False to drop pages once iterated
+        :param raw: return each record as the dictionary returned by the API, skipping model validation
+        :param on_checkpoint: called with a token to resume from, see `resume`, every `checkpoint_every` pages iterated
+        :param checkpoint_every: number of pages iterated between checkpoints
         """
         if limit and page_size and limit < page_size:
             page_size = limit
@@ -95,36 +168,218 @@ class Client:
         if tag:
             params.update({"filter[tag]": tag})
 
-        return Transactions(
-            data=await self._session.get(f"{BASE_URL}/transactions", params=params),
-            session=self._session,
-            limit=limit)
+        return await models.Transactions.fetch(
+            self._session,
+            f"{self._session.base_url}/transactions",
+            params,
+            limit=limit,
+            prefetch=prefetch,
+            retain=retain,
+            raw=raw,
+            on_checkpoint=on_checkpoint,
+            checkpoint_every=checkpoint_every)
+
+    async def resume(
+        self,
+        checkpoint: str,
+        prefetch: int = 1,
+        retain: bool = True,
+        on_checkpoint: Optional[CheckpointCallback] = None,
+        checkpoint_every: int = 1,
+    ) -> Pagination:
+        """Continues a pager, such as a long backfill of transactions, from a checkpoint taken by an earlier pager.
+
+        The filters, page size, limit and `raw` of the original pager are kept, only the records after the checkpoint are
+        fetched.
+
+        :param checkpoint: a token returned by a pager's `checkpoint` or passed to its `on_checkpoint` callback
+        :param prefetch: number of pages to fetch ahead while iterating
+        :param retain: keep every record in memory, set to False to drop pages once iterated
+        :param on_checkpoint: called with a token to resume from every `checkpoint_every` pages iterated
+        :param checkpoint_every: number of pages iterated between checkpoints
+        """
+        from asyncupbankapi.models.baseModels import Checkpoint, Pagination
+
+        state = Checkpoint.decode(checkpoint)
+        pager = getattr(models, state.resource, None)
+        if not (isinstance(pager, type) and issubclass(pager, Pagination)):
+            raise ValueError(f"invalid pagination checkpoint: unknown resource {state.resource!r}")
+        # The token is sent with the request, so only follow links to this client's API.
+        if state.next is not None and not state.next.startswith(f"{self._session.base_url}/"):
+            raise ValueError(f"checkpoint does not belong to {self._session.base_url}")
+        return await pager.resume(self._session, state, prefetch, retain, on_checkpoint, checkpoint_every)
+
+    async def transactions_parallel(
+        self,
+        since: datetime,
+        until: Optional[datetime] = None,
+        shards: int = 4,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        status: Optional[str] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        prefetch: int = 2,
+        raw: bool = False,
+    ) -> AsyncIterator[Union[Transaction, dict]]:
+        """Returns the same transactions as `transactions` but splits the time range into windows that are fetched concurrently.
+
+        Transactions are returned newest first, the same order as `transactions`.
+
+        :param since: start of the time range
+        :param until: end of the time range (defaults to now)
+        :param shards: number of windows to split the time range into
+        :param limit: maximum number of records to return (set to None for all transactions)
+        :param page_size: number of records to fetch in each request (max 100)
+        :param status:
+        :param category:
+        :param tag:
+        :param prefetch: number of pages each window fetches ahead while iterating
+        :param raw: return each record as the dictionary returned by the API, skipping model validation
+        """
+        since = since.astimezone()
+        until = (until if until else datetime.now()).astimezone()
+        shards = max(1, shards)
+        step = (until - since) / shards
+        boundaries = [since + step * i for i in range(1, shards)]
+
+        # Windows overlap by a second so it does not matter whether the API treats since/until as inclusive,
+        # records inside an overlap are de-duplicated by id.
+        windows = zip([since] + boundaries, boundaries + [until])
+        pagers = await asyncio.gather(*(
+            self.transactions(
+                limit=limit,
+                page_size=page_size,
+                status=status,
+                since=start,
+                until=end if end == until else end + _OVERLAP,
+                category=category,
+                tag=tag,
+                prefetch=prefetch,
+                retain=False,
+                raw=raw)
+            for start, end in windows))
+
+        returned = 0
+        overlapping = set()
+        merged = merge(pagers[::-1], key=_created_at, reverse=True)
+        try:
+            async for transaction in merged:
+                created_at = _created_at(transaction)
+                if any(boundary <= created_at <= boundary + _OVERLAP for boundary in boundaries):
+                    transaction_id = transaction["id"] if raw else transaction.id
+                    if transaction_id in overlapping:
+                        continue
+                    overlapping.add(transaction_id)
+
+                yield transaction
+                returned += 1
+                if limit and returned >= limit:
+                    return
+        finally:
+            await merged.aclose()
+
+    async def accounts_transactions(
+        self,
+        accounts: Optional[Iterable[Account]] = None,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        concurrency: int = 4,
+        prefetch: int = 1,
+        raw: bool = False,
+    ) -> AsyncIterator[Union[Transaction, dict]]:
+        """Returns the transactions of several accounts as one iterator, newest first.
+
+        The transactions of every account are fetched concurrently and merged by when they were created.
+
+        :param accounts: accounts to fetch transactions from (set to None for all of the users accounts)
+        :param limit: maximum number of records to return for each account (set to None for all transactions)
+        :param page_size: number of records to fetch in each request (max 100)
+        :param concurrency: maximum number of page requests in flight at the same time across every account
+        :param prefetch: number of pages each account fetches ahead while iterating
+        :param raw: return each record as the dictionary returned by the API, skipping model validation
+        """
+        if accounts is None:
+            accounts = [account async for account in await self.accounts()]
+
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        # Every page of every account, including those read ahead, waits for its turn on the same semaphore.
+        pagers = await asyncio.gather(*(
+            account.transactions(
+                limit=limit, page_size=page_size, prefetch=prefetch, retain=False, raw=raw, requests=semaphore)
+            for account in accounts))
+
+        merged = merge(pagers, key=_created_at, reverse=True)
+        try:
+            async for transaction in merged:
+                yield transaction
+        finally:
+            await merged.aclose()
 
     async def transaction(self, transaction_id: UUID) -> Transaction:
         """Returns a single transaction by its unique id."""
-        return Transaction(
-            data=await self._session.get(f"{BASE_URL}/transactions/{transaction_id}"),
+        return models.Transaction(
+            data=await self._session.get(f"{self._session.base_url}/transactions/{transaction_id}"),
             session=self._session)
 
+    async def add_tags_bulk(
+        self,
+        items: TagItems,
+        tags: Optional[Iterable[str]] = None,
+        concurrency: int = 8,
+        retries: int = 2,
+    ) -> List[TagResult]:
+        """Adds tags to many transactions concurrently and returns the result of each in the order given.
+
+        :param items: (transaction or transaction id, tags) pairs, or a Transactions pager when `tags` is given
+        :param tags: tags to add to every transaction of a pager
+        :param concurrency: maximum number of requests made at the same time
+        :param retries: number of times a request that failed with a network, server or rate limit error is retried
+        """
+        from asyncupbankapi.bulk import update_tags
+        return await update_tags(self._session, "POST", items, tags, concurrency, retries)
+
+    async def delete_tags_bulk(
+        self,
+        items: TagItems,
+        tags: Optional[Iterable[str]] = None,
+        concurrency: int = 8,
+        retries: int = 2,
+    ) -> List[TagResult]:
+        """Removes tags from many transactions concurrently and returns the result of each in the order given.
+
+        :param items: (transaction or transaction id, tags) pairs, or a Transactions pager when `tags` is given
+        :param tags: tags to remove from every transaction of a pager
+        :param concurrency: maximum number of requests made at the same time
+        :param retries: number of times a request that failed with a network, server or rate limit error is retried
+        """
+        from asyncupbankapi.bulk import update_tags
+        return await update_tags(self._session, "DELETE", items, tags, concurrency, retries)
+
     async def categories(self, parent: Optional[str] = None) -> Categories:
         """Returns a list of cateogries."""
         if parent:
-            return Categories.parse_obj(await self._session.get(f"{BASE_URL}/categories", params={"filter[parent": parent}))
-        return Categories.parse_obj(await self._session.get(f"{BASE_URL}/categories"))
+            return models.Categories.parse_obj(await self._session.get(f"{self._session.base_url}/categories", params={"filter[parent]": parent}))
+        return models.Categories.parse_obj(await self._session.get(f"{self._session.base_url}/categories"))
 
     async def category(self, category_id: str) -> Category:
         """Returns a single Category by its unique id."""
-        return Category.parse_obj(await self._session.get(f"{BASE_URL}/categories/{category_id}"))
+        return models.Category.parse_obj(await self._session.get(f"{self._session.base_url}/categories/{category_id}"))
 
     async def tags(self) -> Tags:
         """Retrieve a list of all tags currently in use. The returned list is paginated and can be scrolled by following the next and prev links where present. Results are ordered lexicographically. The transactions relationship for each tag exposes a link to get the transactions with the given tag."""
-        return Tags.parse_obj(await self._session.get(f"{BASE_URL}/tags"))
+        return await models.Tags.fetch(self._session, f"{self._session.base_url}/tags")
 
-    async def webhooks(self, limit: Optional[int] = None, page_size: Optional[int] = None) -> Webhooks:
+    async def webhooks(
+        self, limit: Optional[int] = None, page_size: Optional[int] = None, prefetch: int = 1, retain: bool = True
+    ) -> Webhooks:
         """Returns a list of the users webhooks.
 
         :param limit: maximum number of records to return (set to None for all records)
         :param page_size: number of records to fetch in each request (max 100)
+        :param prefetch: number of pages to fetch ahead while iterating
+        :param retain: keep every record in memory, set to False to drop pages once iterated
         """
         if limit and page_size and limit < page_size:
             page_size = limit
@@ -134,10 +389,22 @@ class Client:
         if page_size:
             params.update({PAGE_SIZE: str(page_size)})
 
-        return Webhooks(
-            data=await self._session.get(f"{BASE_URL}/webhooks", params=params),
-            session=self._session,
-            limit=limit)
+        return await models.Webhooks.fetch(
+            self._session,
+            f"{self._session.base_url}/webhooks",
+            params,
+            limit=limit,
+            prefetch=prefetch,
+            retain=retain)
+
+
+_OVERLAP = timedelta(seconds=1)
+
+
+def _created_at(transaction: Union[Transaction, dict]) -> datetime:
+    if isinstance(transaction, dict):
+        return datetime.fromisoformat(transaction["attributes"]["createdAt"])
+    return transaction.attributes.createdAt
 
 
 class WebhookAdapter:
@@ -154,8 +421,8 @@ class WebhookAdapter:
         """Returns a single webhook by its unique id.
 
         :param webhook_id: The unique identfier of the webhook."""
-        return Webhook(
-            data=await self._session.get(f"{BASE_URL}/webhooks/{webhook_id}"),
+        return models.Webhook(
+            data=await self._session.get(f"{self._session.base_url}/webhooks/{webhook_id}"),
             session=self._session)
 
     async def create(self, url: URL, description: Optional[str] = None) -> Webhook:
@@ -180,14 +447,23 @@ class WebhookAdapter:
         payload = {}
         payload.update({"data": data})
 
-        return Webhook(data=await self._session.post(f"{BASE_URL}/webhooks", payload=payload), session=self._session)
+        return models.Webhook(data=await self._session.post(f"{self._session.base_url}/webhooks", payload=payload), session=self._session)
 
-    async def logs(self, webhook_id: UUID, limit: Optional[int] = None, page_size: Optional[int] = None) -> WebhookLogs:
+    async def logs(
+        self,
+        webhook_id: UUID,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        prefetch: int = 1,
+        retain: bool = True,
+    ) -> WebhookLogs:
         """Returns a list of webhook logs.
 
         :param webhook_id: The unique identfier of the webhook.
         :param limit: maximum number of records to return (set to None for all records)
-        :param page_size: number of records to fetch in each request (max 100)"""
+        :param page_size: number of records to fetch in each request (max 100)
+        :param prefetch: number of pages to fetch ahead while iterating
+        :param retain: keep every record in memory, set to False to drop pages once iterated"""
 
         if limit and page_size and limit < page_size:
             page_size = limit
@@ -197,12 +473,18 @@ class WebhookAdapter:
         if page_size:
             params.update({PAGE_SIZE: str(page_size)})
 
-        return WebhookLogs(data=await self._session.get(f"{BASE_URL}/webhooks/{webhook_id}/logs"), session=self._session, limit=limit)
+        return await models.WebhookLogs.fetch(
+            self._session,
+            f"{self._session.base_url}/webhooks/{webhook_id}/logs",
+            params,
+            limit=limit,
+            prefetch=prefetch,
+            retain=retain)
 
     async def ping(self, webhook_id: str) -> WebhookEvent:
         """Pings a webhook by its unique id."""
-        return WebhookEvent.parse_obj(await self._session.post(f"{BASE_URL}/webhooks/{webhook_id}/ping"))
+        return models.WebhookEvent.parse_obj(await self._session.post(f"{self._session.base_url}/webhooks/{webhook_id}/ping"))
 
     async def delete(self, webhook_id: UUID) -> None:
         """Delete a single webhook by its unique id."""
-        await self._session.delete(f"{BASE_URL}webhooks/{webhook_id}")
+        await self._session.delete(f"{self._session.base_url}/webhooks/{webhook_id}")
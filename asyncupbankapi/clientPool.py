@@ -0,0 +1,267 @@
+"""Many tokens served over one connection pool, with jobs scheduled fairly between them."""
+from __future__ import annotations
+import asyncio
+import functools
+from collections import deque
+from typing import (TYPE_CHECKING, Any, Awaitable, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Sequence,
+                    Set, Tuple)
+
+import aiohttp
+from aiohttp.hdrs import CONTENT_TYPE
+
+from asyncupbankapi.codec import JsonCodec
+from asyncupbankapi.connectionPool import ConnectionPool
+from asyncupbankapi.const import BASE_URL
+from asyncupbankapi.instrumentation import Hooks, _trace_config
+from asyncupbankapi.rateLimiter import RateLimiter
+
+if TYPE_CHECKING:
+    from asyncupbankapi.client import Client
+
+Job = Callable[["Client"], Awaitable[Any]]
+
+
+class JobResult(NamedTuple):
+    """The outcome of a job run for one token."""
+    key: str
+    result: Any = None
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class _Pending(NamedTuple):
+    job: Job
+    future: asyncio.Future
+
+
+class ClientPool:
+    """Clients for many tokens sharing one aiohttp session and connector.
+
+    Each token keeps its own authorization header, rate limiter and in flight requests, only kept alive connections, the SSL
+    context and DNS lookups are shared. Jobs are run round robin between tokens, so a token with many jobs queued does not hold back the
+    others, with at most `concurrency` jobs running in total and `per_token` for each token.
+
+    Tokens are registered under a key, such as a customer id, so tokens never show up in results or logs.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 10,
+        per_token: int = 1,
+        pool: Optional[ConnectionPool] = None,
+        rate_limiter: Optional[Callable[[], RateLimiter]] = None,
+        coalesce: bool = True,
+        codec: Optional[JsonCodec] = None,
+        base_url: str = BASE_URL,
+        hooks: Optional[Sequence[Hooks]] = None,
+    ) -> None:
+        """Client pool.
+
+        :param concurrency: maximum number of jobs running at once across every token
+        :param per_token: maximum number of jobs running at once for a single token
+        :param pool: connection pool settings of the shared connector, its limit caps concurrent requests across tokens
+        :param rate_limiter: creates the rate limiter of each token, for example `lambda: RateLimiter(rate=5)`
+        :param coalesce: share one request between identical GET requests of the same token made at the same time
+        :param codec: JSON codec used for request and response bodies, defaults to the fastest installed
+        :param base_url: url of the API, for example a local mock server
+        :param hooks: instrumentation hooks notified of the requests of every token
+        """
+        if concurrency < 1 or per_token < 1:
+            raise ValueError("concurrency and per_token must be at least 1")
+
+        self.concurrency = concurrency
+        self.per_token = per_token
+        self._pool = pool if pool else ConnectionPool()
+        self._rate_limiter = rate_limiter
+        self._coalesce = coalesce
+        self._codec = codec
+        self._base_url = base_url
+        self._hooks = list(hooks) if hooks else []
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._clients: Dict[str, Client] = {}
+
+        self._queues: Dict[str, Deque[_Pending]] = {}
+        # Keys with queued jobs that are below their limit, in the order they get their next turn.
+        self._ready: Deque[str] = deque()
+        self._running: Dict[str, int] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        # Running jobs by key, waited for when their token is removed.
+        self._jobs: Dict[str, Set[asyncio.Task]] = {}
+
+    async def __aenter__(self) -> ClientPool:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._clients
+
+    def __getitem__(self, key: str) -> Client:
+        return self._clients[key]
+
+    @property
+    def session(self) -> Optional[aiohttp.ClientSession]:
+        """The aiohttp session shared by every client, created with the first client."""
+        return self._session
+
+    @property
+    def pending(self) -> int:
+        """The number of jobs waiting for their turn."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    def add(self, key: str, token: str, rate_limiter: Optional[RateLimiter] = None) -> Client:
+        """Registers a token and returns its client.
+
+        :param key: name of the token in the pool and in job results, such as a customer id
+        :param token: the personal access token
+        :param rate_limiter: rate limiter of this token instead of one created by the pool's factory
+        """
+        from asyncupbankapi.client import Client
+
+        if key in self._clients:
+            raise ValueError(f"a token is already registered as {key!r}")
+        if self._session is None:
+            # No cookies are kept, they would otherwise be shared between tokens.
+            self._session = aiohttp.ClientSession(
+                headers={CONTENT_TYPE: "application/json"},
+                connector=self._pool.create_connector(),
+                cookie_jar=aiohttp.DummyCookieJar(),
+                trace_configs=[_trace_config()] if self._hooks else None)
+
+        if rate_limiter is None and self._rate_limiter is not None:
+            rate_limiter = self._rate_limiter()
+        client = Client(
+            token, rate_limiter=rate_limiter, coalesce=self._coalesce, codec=self._codec, base_url=self._base_url,
+            hooks=self._hooks, client_session=self._session)
+        self._clients[key] = client
+        return client
+
+    async def remove(self, key: str) -> None:
+        """Unregisters a token, its queued jobs are cancelled while running ones are waited for before its client is closed."""
+        client = self._clients.pop(key)
+        for pending in self._queues.pop(key, ()):
+            pending.future.cancel()
+        if key in self._ready:
+            self._ready.remove(key)
+        running = list(self._jobs.get(key, ()))
+        if running:
+            await asyncio.wait(running)
+        await client.close()
+
+    def submit(self, key: str, job: Job) -> asyncio.Future:
+        """Queues a job for a token and returns a future of its result.
+
+        :param key: the key the token was added with
+        :param job: called with the token's client once it is the token's turn, for example `lambda client: store.sync(client)`
+        """
+        if key not in self._clients:
+            raise KeyError(key)
+        future = asyncio.get_event_loop().create_future()
+        self._queues.setdefault(key, deque()).append(_Pending(job, future))
+        self.__requeue(key)
+        self.__dispatch()
+        return future
+
+    async def run(self, jobs: Iterable[Tuple[str, Job]]) -> List[JobResult]:
+        """Runs jobs given as (key, job) pairs and returns their results in the same order.
+
+        A failing job does not affect the others, its exception is returned in its result.
+        """
+        keys, futures = [], []
+        for key, job in jobs:
+            keys.append(key)
+            futures.append(self.submit(key, job))
+        if futures:
+            # Unlike awaiting each future, waiting does not cancel the jobs when the caller is cancelled.
+            await asyncio.wait(futures)
+
+        results = []
+        for key, future in zip(keys, futures):
+            if future.cancelled():
+                results.append(JobResult(key, error=asyncio.CancelledError()))
+            elif future.exception() is not None:
+                results.append(JobResult(key, error=future.exception()))
+            else:
+                results.append(JobResult(key, future.result()))
+        return results
+
+    async def close(self) -> None:
+        """Cancels queued and running jobs and closes the shared session."""
+        for queue in self._queues.values():
+            for pending in queue:
+                pending.future.cancel()
+        self._queues.clear()
+        self._ready.clear()
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def __dispatch(self) -> None:
+        while self._ready and len(self._tasks) < self.concurrency:
+            key = self._ready.popleft()
+            queue = self._queues[key]
+            pending = queue.popleft()
+            if not queue:
+                del self._queues[key]
+            if pending.future.cancelled():
+                self.__requeue(key)
+                continue
+
+            self._running[key] = self._running.get(key, 0) + 1
+            task = asyncio.ensure_future(self.__run(key, pending))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+            self._jobs.setdefault(key, set()).add(task)
+            task.add_done_callback(functools.partial(self.__job_done, key))
+            # Back of the line, every other ready token gets a turn first.
+            self.__requeue(key)
+
+    def __job_done(self, key: str, task: asyncio.Task) -> None:
+        jobs = self._jobs.get(key)
+        if jobs is not None:
+            jobs.discard(task)
+            if not jobs:
+                del self._jobs[key]
+
+    def __requeue(self, key: str) -> None:
+        if key in self._queues and key not in self._ready and self._running.get(key, 0) < self.per_token:
+            self._ready.append(key)
+
+    async def __run(self, key: str, pending: _Pending) -> None:
+        try:
+            result = await pending.job(self._clients[key])
+        except asyncio.CancelledError:
+            pending.future.cancel()
+            raise
+        except Exception as e:
+            if not pending.future.done():
+                pending.future.set_exception(e)
+        else:
+            if not pending.future.done():
+                pending.future.set_result(result)
+        finally:
+            self._running[key] -= 1
+            if not self._running[key]:
+                del self._running[key]
+            self.__requeue(key)
+            # Make room for the next job now rather than in the done callback, which runs later.
+            self._tasks.discard(asyncio.current_task())
+            self.__dispatch()
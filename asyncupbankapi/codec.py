@@ -0,0 +1,76 @@
+"""JSON codecs used to encode request bodies and decode responses, the fastest installed one is used by default."""
+import json
+from typing import Any, Optional, Union
+
+
+class JsonCodec:
+    """Base class for JSON codecs.
+
+    Responses are decoded straight from the bytes received, codecs that do not accept bytes must decode them first.
+    """
+    name = "json"
+
+    def loads(self, data: bytes) -> Any:
+        """Decodes a response body."""
+        return json.loads(data)
+
+    def dumps(self, value: Any) -> Union[str, bytes]:
+        """Encodes a request body."""
+        return json.dumps(value)
+
+
+class OrjsonCodec(JsonCodec):
+    """Codec backed by orjson, which decodes bytes directly and encodes to bytes."""
+    name = "orjson"
+
+    def __init__(self) -> None:
+        import orjson
+        self._orjson = orjson
+
+    def loads(self, data: bytes) -> Any:
+        return self._orjson.loads(data)
+
+    def dumps(self, value: Any) -> bytes:
+        return self._orjson.dumps(value)
+
+
+class UjsonCodec(JsonCodec):
+    """Codec backed by ujson."""
+    name = "ujson"
+
+    def __init__(self) -> None:
+        import ujson
+        self._ujson = ujson
+
+    def loads(self, data: bytes) -> Any:
+        return self._ujson.loads(data)
+
+    def dumps(self, value: Any) -> str:
+        return self._ujson.dumps(value)
+
+
+CODECS = {codec.name: codec for codec in (OrjsonCodec, UjsonCodec, JsonCodec)}
+
+_default: Optional[JsonCodec] = None
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """Returns a codec by name ("orjson", "ujson" or "json"), or the fastest installed codec when no name is given.
+
+    :param name: name of the codec
+    """
+    global _default
+
+    if name is not None:
+        if name not in CODECS:
+            raise ValueError(f"Unknown JSON codec {name!r}, expected one of {', '.join(CODECS)}")
+        return CODECS[name]()
+
+    if _default is None:
+        for codec in CODECS.values():
+            try:
+                _default = codec()
+                break
+            except ImportError:
+                continue
+    return _default
@@ -0,0 +1,267 @@
+"""Columnar export of transactions for vectorised analytics, requires numpy and optionally pandas or pyarrow."""
+from __future__ import annotations
+from array import array
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, AsyncIterable, Dict, Iterable, List, Optional, Union
+
+from asyncupbankapi.models.transactions import Transaction
+
+if TYPE_CHECKING:
+    import numpy
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MISSING = -1
+NOT_A_TIME = -(2 ** 63)
+
+
+def _import(module: str, extra: str) -> Any:
+    try:
+        return __import__(module)
+    except ImportError as e:
+        raise ImportError(f"{module} is required for this, install it with `pip install async-up-bank-api[{extra}]`") from e
+
+
+class _Dictionary:
+    """Encodes repeated strings as integer codes."""
+
+    def __init__(self) -> None:
+        self.values: List[str] = []
+        self.codes = array("i")
+        self._lookup: Dict[str, int] = {}
+
+    def append(self, value: Optional[str]) -> None:
+        if value is None:
+            self.codes.append(MISSING)
+            return
+        code = self._lookup.get(value)
+        if code is None:
+            code = self._lookup[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+
+class TransactionColumns:
+    """Transactions stored column by column.
+
+    Amounts are kept in base units (cents), times as microseconds since the epoch and repeated strings such as
+    categories, statuses and account ids are dictionary encoded. Columns are returned as copies so more transactions
+    can be appended afterwards.
+    """
+
+    def __init__(self, transactions: Iterable[Union[Transaction, dict]] = ()) -> None:
+        self.ids: List[str] = []
+        self._amount = array("q")
+        self._created_at = array("q")
+        self._utc_offset = array("i")
+        self._settled_at = array("q")
+        self._status = _Dictionary()
+        self._account = _Dictionary()
+        self._category = _Dictionary()
+        self._parent_category = _Dictionary()
+        self.extend(transactions)
+
+    @classmethod
+    async def from_pager(cls, transactions: AsyncIterable[Union[Transaction, dict]]) -> TransactionColumns:
+        """Builds the columns while iterating, use a pager created with `raw=True, retain=False` for the least overhead.
+
+        :param transactions: a Transactions pager or any async iterable of transactions
+        """
+        columns = cls()
+        async for transaction in transactions:
+            columns.append(transaction)
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def extend(self, transactions: Iterable[Union[Transaction, dict]]) -> None:
+        for transaction in transactions:
+            self.append(transaction)
+
+    def append(self, transaction: Union[Transaction, dict]) -> None:
+        """Adds a transaction given either as a model or as the dictionary returned by the API."""
+        if isinstance(transaction, dict):
+            attributes = transaction["attributes"]
+            relationships = transaction["relationships"]
+            category = relationships["category"].get("data")
+            parent_category = relationships["parentCategory"].get("data")
+
+            self.ids.append(transaction["id"])
+            self._amount.append(attributes["amount"]["valueInBaseUnits"])
+            self.__append_times(
+                datetime.fromisoformat(attributes["createdAt"]),
+                datetime.fromisoformat(attributes["settledAt"]) if attributes["settledAt"] else None)
+            self._status.append(attributes["status"])
+            self._account.append(relationships["account"]["data"]["id"])
+            self._category.append(category["id"] if category else None)
+            self._parent_category.append(parent_category["id"] if parent_category else None)
+        else:
+            attributes = transaction.attributes
+            relationships = transaction.relationships
+
+            self.ids.append(str(transaction.id))
+            self._amount.append(attributes.amount.valueInBaseUnits)
+            self.__append_times(attributes.createdAt, attributes.settledAt)
+            self._status.append(attributes.status.value)
+            self._account.append(str(relationships.account.data.id) if relationships.account.data else None)
+            self._category.append(relationships.category.data.id if relationships.category.data else None)
+            self._parent_category.append(
+                relationships.parentCategory.data.id if relationships.parentCategory.data else None)
+
+    def __append_times(self, created_at: datetime, settled_at: Optional[datetime]) -> None:
+        self._created_at.append(_microseconds(created_at))
+        offset = created_at.utcoffset()
+        self._utc_offset.append(int(offset.total_seconds()) if offset else 0)
+        self._settled_at.append(_microseconds(settled_at) if settled_at else NOT_A_TIME)
+
+    # Columns
+
+    @property
+    def amount(self) -> numpy.ndarray:
+        """Amounts in base units as int64."""
+        np = _import("numpy", "columnar")
+        return np.frombuffer(self._amount, dtype=np.int64).copy()
+
+    @property
+    def created_at(self) -> numpy.ndarray:
+        """When each transaction was created as UTC datetime64[us]."""
+        np = _import("numpy", "columnar")
+        return np.frombuffer(self._created_at, dtype=np.int64).view("datetime64[us]").copy()
+
+    @property
+    def created_at_local(self) -> numpy.ndarray:
+        """When each transaction was created in the timezone it was recorded in, as datetime64[us]."""
+        np = _import("numpy", "columnar")
+        offsets = np.frombuffer(self._utc_offset, dtype=np.int32).astype(np.int64) * 1_000_000
+        return (np.frombuffer(self._created_at, dtype=np.int64) + offsets).view("datetime64[us]")
+
+    @property
+    def settled_at(self) -> numpy.ndarray:
+        """When each transaction settled as UTC datetime64[us], NaT while held."""
+        np = _import("numpy", "columnar")
+        return np.frombuffer(self._settled_at, dtype=np.int64).view("datetime64[us]").copy()
+
+    @property
+    def status(self) -> numpy.ndarray:
+        """Status codes as int32, see `status_values`."""
+        return self.__codes(self._status)
+
+    @property
+    def status_values(self) -> List[str]:
+        return self._status.values
+
+    @property
+    def account(self) -> numpy.ndarray:
+        """Account codes as int32, see `account_values`."""
+        return self.__codes(self._account)
+
+    @property
+    def account_values(self) -> List[str]:
+        return self._account.values
+
+    @property
+    def category(self) -> numpy.ndarray:
+        """Category codes as int32, -1 when uncategorised, see `category_values`."""
+        return self.__codes(self._category)
+
+    @property
+    def category_values(self) -> List[str]:
+        return self._category.values
+
+    @property
+    def parent_category(self) -> numpy.ndarray:
+        """Parent category codes as int32, -1 when uncategorised, see `parent_category_values`."""
+        return self.__codes(self._parent_category)
+
+    @property
+    def parent_category_values(self) -> List[str]:
+        return self._parent_category.values
+
+    @staticmethod
+    def __codes(column: _Dictionary) -> numpy.ndarray:
+        np = _import("numpy", "columnar")
+        return np.frombuffer(column.codes, dtype=np.int32).copy()
+
+    # Conversions
+
+    def to_numpy(self) -> Dict[str, numpy.ndarray]:
+        """Returns every column as a numpy array, dictionary encoded columns are returned as codes."""
+        return {
+            "id": _import("numpy", "columnar").array(self.ids, dtype=object),
+            "amount": self.amount,
+            "created_at": self.created_at,
+            "settled_at": self.settled_at,
+            "status": self.status,
+            "account": self.account,
+            "category": self.category,
+            "parent_category": self.parent_category}
+
+    def to_pandas(self) -> Any:
+        """Returns a pandas DataFrame, dictionary encoded columns become categoricals."""
+        pd = _import("pandas", "pandas")
+        return pd.DataFrame({
+            "id": self.ids,
+            "amount": self.amount,
+            "created_at": pd.to_datetime(self.created_at, utc=True),
+            "settled_at": pd.to_datetime(self.settled_at, utc=True),
+            "status": pd.Categorical.from_codes(self.status, self.status_values),
+            "account": pd.Categorical.from_codes(self.account, self.account_values),
+            "category": pd.Categorical.from_codes(self.category, self.category_values),
+            "parent_category": pd.Categorical.from_codes(self.parent_category, self.parent_category_values)})
+
+    def to_arrow(self) -> Any:
+        """Returns a pyarrow Table, dictionary encoded columns become dictionary arrays."""
+        pa = _import("pyarrow", "arrow")
+        np = _import("numpy", "columnar")
+
+        def dictionary(codes: numpy.ndarray, values: List[str]) -> Any:
+            return pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes == MISSING), pa.array(values, pa.string()))
+
+        return pa.table({
+            "id": pa.array(self.ids, pa.string()),
+            "amount": pa.array(self.amount),
+            "created_at": pa.array(self.created_at, pa.timestamp("us", tz="UTC")),
+            "settled_at": pa.array(
+                self.settled_at, pa.timestamp("us", tz="UTC"), mask=np.isnat(self.settled_at)),
+            "status": dictionary(self.status, self.status_values),
+            "account": dictionary(self.account, self.account_values),
+            "category": dictionary(self.category, self.category_values),
+            "parent_category": dictionary(self.parent_category, self.parent_category_values)})
+
+    # Aggregations
+
+    def spend_by_category(self, parent: bool = False) -> Dict[Optional[str], int]:
+        """Returns the total spent in base units by category, uncategorised spending is under None.
+
+        :param parent: group by parent category instead
+        """
+        column = self._parent_category if parent else self._category
+        return self.__spend_by(self.__codes(column), column.values)
+
+    def spend_by_account(self) -> Dict[Optional[str], int]:
+        """Returns the total spent in base units by account id."""
+        return self.__spend_by(self.account, self.account_values)
+
+    def spend_by_month(self) -> Dict[str, int]:
+        """Returns the total spent in base units by month ("2021-01"), using the timezone each transaction was recorded in."""
+        np = _import("numpy", "columnar")
+        months, codes = np.unique(self.created_at_local.astype("datetime64[M]"), return_inverse=True)
+        totals = self.__spend_by(codes.reshape(-1).astype(np.int32), [str(month) for month in months])
+        return {month: total for month, total in totals.items() if month is not None}
+
+    def __spend_by(self, codes: numpy.ndarray, values: List[str]) -> Dict[Optional[str], int]:
+        np = _import("numpy", "columnar")
+        spent = np.where(self.amount < 0, -self.amount, 0)
+        # Shift so missing values (-1) get their own bucket at index 0.
+        totals = np.bincount(codes + 1, weights=spent, minlength=len(values) + 1).astype(np.int64)
+        result: Dict[Optional[str], int] = {}
+        if totals[0]:
+            result[None] = int(totals[0])
+        for value, total in zip(values, totals[1:]):
+            result[value] = int(total)
+        return result
+
+
+def _microseconds(value: datetime) -> int:
+    delta = value - EPOCH if value.tzinfo else value.replace(tzinfo=timezone.utc) - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
@@ -0,0 +1,392 @@
+"""Compact transactions for bulk workloads, a small fraction of the memory of the pydantic models."""
+from __future__ import annotations
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, AsyncIterable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union, overload
+
+from asyncupbankapi.const import BASE_URL
+
+if TYPE_CHECKING:
+    from asyncupbankapi.httpSession import HttpSession
+    from asyncupbankapi.models.transactions import Transaction
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Shared instances of values that repeat across transactions, the same object is stored instead of an equal copy. They
+# are cleared once they hold MAX_SHARED values so uncommon values don't accumulate for the life of the process, values
+# already shared stay shared.
+MAX_SHARED = 4096
+_TIMEZONES: Dict[int, timezone] = {}
+_TAGS: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+
+class ForeignMoney(NamedTuple):
+    """An amount in a currency other than the account's, kept whole as it is rare and its decimals vary."""
+    currency: str
+    value: str
+    base_units: int
+
+
+class CompactTransaction:
+    """A transaction stored in a single slotted object.
+
+    Amounts in the account currency are kept in base units (cents) and their values derived when needed, times as
+    microseconds since the epoch along with a shared timezone, repeated strings such as statuses, descriptions,
+    categories and account ids are interned and links are derived from the ids instead of being stored.
+    """
+    __slots__ = (
+        "id", "status", "description", "raw_text", "message", "currency", "amount", "foreign_amount", "hold_amount",
+        "hold_foreign_amount", "round_up", "boost", "cashback", "cashback_description", "_created_at", "_settled_at",
+        "_timezone", "account_id", "category", "parent_category", "tags")
+
+    def __init__(
+        self,
+        id: str,
+        status: str,
+        description: str,
+        amount: int,
+        created_at: datetime,
+        account_id: str,
+        currency: str = "AUD",
+        raw_text: Optional[str] = None,
+        message: Optional[str] = None,
+        foreign_amount: Optional[ForeignMoney] = None,
+        hold_amount: Optional[int] = None,
+        hold_foreign_amount: Optional[ForeignMoney] = None,
+        round_up: Optional[int] = None,
+        boost: Optional[int] = None,
+        cashback: Optional[int] = None,
+        cashback_description: Optional[str] = None,
+        settled_at: Optional[datetime] = None,
+        category: Optional[str] = None,
+        parent_category: Optional[str] = None,
+        tags: Iterable[str] = (),
+    ) -> None:
+        """Compact transaction, usually created with `from_dict` or `from_model`.
+
+        :param amount: amount in base units of `currency`
+        :param hold_amount: amount in base units while the transaction was held
+        :param round_up: round up in base units, `boost` is the part of it boosted
+        :param cashback: cashback in base units, described by `cashback_description`
+        """
+        intern = sys.intern
+        self.id = id
+        self.status = intern(status)
+        self.description = intern(description)
+        self.raw_text = intern(raw_text) if raw_text is not None else None
+        self.message = message
+        self.currency = intern(currency)
+        self.amount = amount
+        self.foreign_amount = _foreign(foreign_amount)
+        self.hold_amount = hold_amount
+        self.hold_foreign_amount = _foreign(hold_foreign_amount)
+        self.round_up = round_up
+        self.boost = boost
+        self.cashback = cashback
+        self.cashback_description = intern(cashback_description) if cashback_description is not None else None
+        self._created_at = _microseconds(created_at)
+        self._settled_at = _microseconds(settled_at) if settled_at is not None else None
+        self._timezone = _timezone(created_at.utcoffset())
+        self.account_id = intern(account_id)
+        self.category = intern(category) if category is not None else None
+        self.parent_category = intern(parent_category) if parent_category is not None else None
+        self.tags = _tags(tags)
+
+    @classmethod
+    def from_dict(cls, record: dict) -> CompactTransaction:
+        """Creates a compact transaction from the dictionary returned by the API, as iterated with `raw=True`."""
+        if set(record) == {"data"}:
+            record = record["data"]
+        attributes = record["attributes"]
+        relationships = record["relationships"]
+        amount = attributes["amount"]
+        hold_info = attributes.get("holdInfo")
+        round_up = attributes.get("roundUp")
+        cashback = attributes.get("cashback")
+        settled_at = attributes.get("settledAt")
+        category = relationships["category"].get("data")
+        parent_category = relationships["parentCategory"].get("data")
+
+        return cls(
+            id=record["id"],
+            status=attributes["status"],
+            description=attributes["description"],
+            amount=amount["valueInBaseUnits"],
+            currency=amount["currencyCode"],
+            created_at=datetime.fromisoformat(attributes["createdAt"]),
+            account_id=relationships["account"]["data"]["id"],
+            raw_text=attributes.get("rawText"),
+            message=attributes.get("message"),
+            foreign_amount=_foreign_from_dict(attributes.get("foreignAmount")),
+            hold_amount=hold_info["amount"]["valueInBaseUnits"] if hold_info else None,
+            hold_foreign_amount=_foreign_from_dict(hold_info.get("foreignAmount")) if hold_info else None,
+            round_up=round_up["amount"]["valueInBaseUnits"] if round_up else None,
+            boost=round_up["boostPortion"]["valueInBaseUnits"] if round_up and round_up.get("boostPortion") else None,
+            cashback=cashback["amount"]["valueInBaseUnits"] if cashback else None,
+            cashback_description=cashback["description"] if cashback else None,
+            settled_at=datetime.fromisoformat(settled_at) if settled_at else None,
+            category=category["id"] if category else None,
+            parent_category=parent_category["id"] if parent_category else None,
+            tags=[tag["id"] for tag in relationships["tags"]["data"]])
+
+    @classmethod
+    def from_model(cls, transaction: Transaction) -> CompactTransaction:
+        """Creates a compact transaction from a Transaction model."""
+        attributes = transaction.attributes
+        relationships = transaction.relationships
+        hold_info = attributes.holdInfo
+        round_up = attributes.roundUp
+        cashback = attributes.cashback
+        category = relationships.category.data
+        parent_category = relationships.parentCategory.data
+
+        def foreign(money) -> Optional[ForeignMoney]:
+            # The model keeps the value as a float, the base units are exact.
+            if money is None:
+                return None
+            return ForeignMoney(
+                money.currencyCode, _format_value(money.valueInBaseUnits, money.exponent), money.valueInBaseUnits)
+
+        return cls(
+            id=str(transaction.id),
+            status=attributes.status.value,
+            description=attributes.description,
+            amount=attributes.amount.valueInBaseUnits,
+            currency=attributes.amount.currencyCode,
+            created_at=attributes.createdAt,
+            account_id=str(relationships.account.data.id),
+            raw_text=attributes.rawText,
+            message=attributes.message,
+            foreign_amount=foreign(attributes.foreignAmount),
+            hold_amount=hold_info.amount.valueInBaseUnits if hold_info else None,
+            hold_foreign_amount=foreign(hold_info.foreignAmount) if hold_info else None,
+            round_up=round_up.amount.valueInBaseUnits if round_up else None,
+            boost=round_up.boostPortion.valueInBaseUnits if round_up and round_up.boostPortion else None,
+            cashback=cashback.amount.valueInBaseUnits if cashback else None,
+            cashback_description=cashback.description if cashback else None,
+            settled_at=attributes.settledAt,
+            category=category.id if category else None,
+            parent_category=parent_category.id if parent_category else None,
+            tags=[tag.id for tag in relationships.tags.data])
+
+    def __repr__(self) -> str:
+        return f"<CompactTransaction {self.status}: {self.value} {self.currency} [{self.description}]>"
+
+    def __reduce__(self) -> tuple:
+        # Pickled as a flat tuple, repeated values are shared again when unpickled such as when sent from a sync worker.
+        return _restore, (type(self), tuple(getattr(self, name) for name in self.__slots__))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactTransaction):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    @ property
+    def value(self) -> str:
+        """The amount as a decimal string, as the API returns it."""
+        return _format_value(self.amount)
+
+    @ property
+    def created_at(self) -> datetime:
+        return (EPOCH + timedelta(microseconds=self._created_at)).astimezone(self._timezone)
+
+    @ property
+    def settled_at(self) -> Optional[datetime]:
+        if self._settled_at is None:
+            return None
+        return (EPOCH + timedelta(microseconds=self._settled_at)).astimezone(self._timezone)
+
+    def link(self, base_url: str = BASE_URL) -> str:
+        """Returns the URL of the transaction."""
+        return f"{base_url}/transactions/{self.id}"
+
+    def to_dict(self, base_url: str = BASE_URL) -> dict:
+        """Returns the transaction as the dictionary the API returns, with links derived from the ids.
+
+        :param base_url: the API URL the links point at
+        """
+        currency = self.currency
+        link = self.link(base_url)
+        category: dict = {"data": None}
+        if self.category is not None:
+            category = {
+                "data": {"type": "categories", "id": self.category},
+                "links": {
+                    "self": f"{link}/relationships/category", "related": f"{base_url}/categories/{self.category}"}}
+        parent_category: dict = {"data": None}
+        if self.parent_category is not None:
+            parent_category = {
+                "data": {"type": "categories", "id": self.parent_category},
+                "links": {"related": f"{base_url}/categories/{self.parent_category}"}}
+
+        return {
+            "type": "transactions",
+            "id": self.id,
+            "attributes": {
+                "status": self.status,
+                "rawText": self.raw_text,
+                "description": self.description,
+                "message": self.message,
+                "holdInfo": {
+                    "amount": _money(self.hold_amount, currency),
+                    "foreignAmount": _foreign_to_dict(self.hold_foreign_amount)} if self.hold_amount is not None else None,
+                "roundUp": {
+                    "amount": _money(self.round_up, currency),
+                    "boostPortion": _money(self.boost, currency) if self.boost is not None else None,
+                } if self.round_up is not None else None,
+                "cashback": {
+                    "description": self.cashback_description,
+                    "amount": _money(self.cashback, currency)} if self.cashback is not None else None,
+                "amount": _money(self.amount, currency),
+                "foreignAmount": _foreign_to_dict(self.foreign_amount),
+                "settledAt": self.settled_at.isoformat() if self._settled_at is not None else None,
+                "createdAt": self.created_at.isoformat()},
+            "relationships": {
+                "account": {
+                    "data": {"type": "accounts", "id": self.account_id},
+                    "links": {"related": f"{base_url}/accounts/{self.account_id}"}},
+                "category": category,
+                "parentCategory": parent_category,
+                "tags": {
+                    "data": [{"type": "tags", "id": tag} for tag in self.tags],
+                    "links": {"self": f"{link}/relationships/tags"}}},
+            "links": {"self": link}}
+
+    def to_model(self, session: Optional[HttpSession] = None) -> Transaction:
+        """Returns the full Transaction model, with links pointing at the session's API when one is given.
+
+        :param session: the session the model uses for actions such as adding tags
+        """
+        from asyncupbankapi.models.transactions import Transaction
+
+        return Transaction(session, **self.to_dict(session.base_url if session else BASE_URL))
+
+
+class CompactTransactions:
+    """A list of compact transactions."""
+
+    def __init__(self, transactions: Iterable[Union[Transaction, dict, CompactTransaction]] = ()) -> None:
+        self._transactions: List[CompactTransaction] = []
+        self.extend(transactions)
+
+    @classmethod
+    async def from_pager(
+        cls, transactions: AsyncIterable[Union[Transaction, dict, CompactTransaction]]
+    ) -> CompactTransactions:
+        """Collects the transactions while iterating, use a pager created with `raw=True, retain=False` so only the
+        compact records are ever kept.
+
+        :param transactions: a Transactions pager or any async iterable of transactions
+        """
+        compact = cls()
+        async for transaction in transactions:
+            compact.append(transaction)
+        return compact
+
+    def __len__(self) -> int:
+        return len(self._transactions)
+
+    def __iter__(self) -> Iterator[CompactTransaction]:
+        return iter(self._transactions)
+
+    @overload
+    def __getitem__(self, index: int) -> CompactTransaction: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[CompactTransaction]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[CompactTransaction, List[CompactTransaction]]:
+        return self._transactions[index]
+
+    def append(self, transaction: Union[Transaction, dict, CompactTransaction]) -> None:
+        """Adds a transaction given as a model, the dictionary returned by the API or a compact transaction."""
+        if isinstance(transaction, dict):
+            transaction = CompactTransaction.from_dict(transaction)
+        elif not isinstance(transaction, CompactTransaction):
+            transaction = CompactTransaction.from_model(transaction)
+        self._transactions.append(transaction)
+
+    def extend(self, transactions: Iterable[Union[Transaction, dict, CompactTransaction]]) -> None:
+        for transaction in transactions:
+            self.append(transaction)
+
+    def to_models(self, session: Optional[HttpSession] = None) -> Iterator[Transaction]:
+        """Yields the full model of each transaction, one at a time so they can be processed without all being kept.
+
+        :param session: the session the models use for actions such as adding tags
+        """
+        for transaction in self._transactions:
+            yield transaction.to_model(session)
+
+
+_INTERNED = {"status", "description", "raw_text", "currency", "cashback_description", "account_id", "category",
+             "parent_category"}
+
+
+def _restore(cls: type, state: tuple) -> CompactTransaction:
+    transaction = cls.__new__(cls)
+    for name, value in zip(cls.__slots__, state):
+        if name in _INTERNED and value is not None:
+            value = sys.intern(value)
+        setattr(transaction, name, value)
+    transaction.tags = _tags(transaction.tags)
+    transaction._timezone = _timezone(transaction._timezone.utcoffset(None))
+    return transaction
+
+
+def _microseconds(value: datetime) -> int:
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _timezone(offset: Optional[timedelta]) -> timezone:
+    offset = offset or timedelta()
+    seconds = int(offset.total_seconds())
+    shared = _TIMEZONES.get(seconds)
+    if shared is None:
+        if len(_TIMEZONES) >= MAX_SHARED:
+            _TIMEZONES.clear()
+        shared = _TIMEZONES[seconds] = timezone(offset)
+    return shared
+
+
+def _tags(tags: Iterable[str]) -> Tuple[str, ...]:
+    key = tuple(sys.intern(tag) for tag in tags)
+    if not key:
+        return ()
+    shared = _TAGS.get(key)
+    if shared is None:
+        if len(_TAGS) >= MAX_SHARED:
+            _TAGS.clear()
+        shared = _TAGS[key] = key
+    return shared
+
+
+def _format_value(base_units: int, exponent: int = 2) -> str:
+    """Formats base units as a decimal string with `exponent` decimals."""
+    if exponent <= 0:
+        return str(base_units)
+    sign = "-" if base_units < 0 else ""
+    whole, fraction = divmod(abs(base_units), 10 ** exponent)
+    return f"{sign}{whole}.{fraction:0{exponent}d}"
+
+
+def _money(base_units: int, currency: str) -> dict:
+    return {"currencyCode": currency, "value": _format_value(base_units), "valueInBaseUnits": base_units}
+
+
+def _foreign(money: Optional[ForeignMoney]) -> Optional[ForeignMoney]:
+    if money is None:
+        return None
+    return ForeignMoney(sys.intern(money.currency), money.value, money.base_units)
+
+
+def _foreign_from_dict(money: Optional[dict]) -> Optional[ForeignMoney]:
+    if not money:
+        return None
+    return ForeignMoney(money["currencyCode"], money["value"], money["valueInBaseUnits"])
+
+
+def _foreign_to_dict(money: Optional[ForeignMoney]) -> Optional[dict]:
+    if money is None:
+        return None
+    return {"currencyCode": money.currency, "value": money.value, "valueInBaseUnits": money.base_units}
@@ -0,0 +1,45 @@
+import ssl
+from typing import Optional
+
+import aiohttp
+
+
+class ConnectionPool:
+    """Connection pool and keep-alive settings for the connector used by a HttpSession.
+
+    Connections are kept alive and reused, so the TCP and TLS handshakes are paid once per connection rather than once per
+    request. TLS sessions are not resumed, a new connection always makes a full handshake.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        ttl_dns_cache: Optional[int] = 300,
+        ssl_context: Optional[ssl.SSLContext] = None,
+    ) -> None:
+        """Connection pool settings.
+
+        :param limit: maximum number of simultaneous connections (0 for no limit)
+        :param limit_per_host: maximum number of simultaneous connections to the same host (0 for no limit)
+        :param keepalive_timeout: seconds an idle connection is kept open for reuse
+        :param ttl_dns_cache: seconds DNS lookups are cached for (None to cache forever)
+        :param ssl_context: SSL context shared by every connection, one is created if not provided
+        """
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        # Loading the trust store is expensive so one context is shared by every connector made from this pool.
+        self.ssl_context = ssl_context if ssl_context else ssl.create_default_context()
+
+    def create_connector(self) -> aiohttp.TCPConnector:
+        """Creates a connector with these settings, it can be shared between several clients."""
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+            use_dns_cache=True,
+            ssl=self.ssl_context)
@@ -3,6 +3,14 @@ from enum import Enum
 BASE_URL = "https://api.up.com.au/api/v1"
 PAGE_SIZE = "page[size]"
 
+# ISO 4217 currencies whose minor unit isn't 2 decimals, such as AUD's cents.
+CURRENCY_EXPONENTS = {
+    "BIF": 0, "CLP": 0, "DJF": 0, "GNF": 0, "ISK": 0, "JPY": 0, "KMF": 0, "KRW": 0, "PYG": 0, "RWF": 0, "UGX": 0,
+    "UYI": 0, "VND": 0, "VUV": 0, "XAF": 0, "XOF": 0, "XPF": 0,
+    "BHD": 3, "IQD": 3, "JOD": 3, "KWD": 3, "LYD": 3, "OMR": 3, "TND": 3,
+    "CLF": 4, "UYW": 4,
+}
+
 
 class AccountType(Enum):
     SAVER = "SAVER"
@@ -0,0 +1,201 @@
+"""Resolves the transactions that webhook events refer to in batches."""
+from __future__ import annotations
+import asyncio
+import logging
+from typing import (TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence,
+                    Set, Tuple)
+
+from asyncupbankapi.cache import MemoryCache
+from asyncupbankapi.const import WebhookEventType
+from asyncupbankapi.exceptions import NotFoundException
+from asyncupbankapi.models.transactions import Transaction
+from asyncupbankapi.models.webhooks import WebhookEvent
+
+if TYPE_CHECKING:
+    from asyncupbankapi.client import Client
+
+_LOGGER = logging.getLogger(__name__)
+
+EnrichedEvent = Tuple[WebhookEvent, Optional[Transaction]]
+
+
+def transaction_id(event: WebhookEvent) -> Optional[str]:
+    """Returns the id of the transaction an event refers to, None for pings and deleted transactions."""
+    if event.attributes.eventType in (WebhookEventType.PING, WebhookEventType.DELETED):
+        return None
+    transaction = event.relationships.transaction
+    if transaction is None or transaction.data is None:
+        return None
+    return str(transaction.data.id)
+
+
+class TransactionEnricher:
+    """Fetches the transaction of each webhook event, de-duplicating lookups within a batch and across recent batches.
+
+    Lookups are only shared between events of the same type, a TRANSACTION_SETTLED event never gets the held transaction
+    fetched for the TRANSACTION_CREATED event before it.
+
+    Events can be enriched a batch at a time with `enrich`, one at a time with `submit` which collects events over a short
+    window, or as a stream with `stream`. Close the enricher, or use it with `async with`, to finish the batches collected by
+    `submit` on shutdown.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        window: float = 0.05,
+        max_batch: int = 100,
+        concurrency: int = 8,
+        ttl: float = 30.0,
+        cache_size: int = 4096,
+    ) -> None:
+        """Transaction enricher.
+
+        :param client: client used to fetch transactions
+        :param window: seconds `submit` waits for more events before resolving a batch
+        :param max_batch: number of events after which `submit` resolves a batch without waiting
+        :param concurrency: maximum number of transactions fetched at the same time
+        :param ttl: seconds a fetched transaction is reused for
+        :param cache_size: maximum number of transactions kept for reuse
+        """
+        self._client = client
+        self._window = window
+        self._max_batch = max(1, max_batch)
+        self._concurrency = max(1, concurrency)
+        self._ttl = ttl
+        self._cache = MemoryCache(maxsize=cache_size)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pending: List[Tuple[WebhookEvent, asyncio.Future]] = []
+        self._flush: Optional[asyncio.TimerHandle] = None
+        # The event loop only keeps weak references to tasks, batches being resolved are kept here until done.
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.events = 0
+        self.fetched = 0
+
+    async def __aenter__(self) -> TransactionEnricher:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """Resolves the events waiting for their batch and waits for every batch being resolved."""
+        self.__resolve_pending()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counts of events enriched, transactions fetched and lookups saved by the cache."""
+        return {"events": self.events, "fetched": self.fetched, "cache_hits": self._cache.hits}
+
+    async def enrich(self, events: Sequence[WebhookEvent]) -> List[Optional[Transaction]]:
+        """Returns the transaction of each event in the same order, None when the event has no transaction.
+
+        :param events: webhook events
+        """
+        keys = [(transaction_id(event), event.attributes.eventType) for event in events]
+        unique = list(dict.fromkeys(key for key in keys if key[0]))
+        transactions = dict(zip(unique, await asyncio.gather(*(self.__fetch(*key) for key in unique))))
+        self.events += len(events)
+        return [transactions[key] if key[0] else None for key in keys]
+
+    def submit(self, event: WebhookEvent) -> Awaitable[Optional[Transaction]]:
+        """Queues an event to be resolved with the next batch and returns a future for its transaction.
+
+        :param event: webhook event
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((event, future))
+
+        if len(self._pending) >= self._max_batch:
+            self.__resolve_pending()
+        elif self._flush is None:
+            self._flush = loop.call_later(self._window, self.__resolve_pending)
+        return future
+
+    async def stream(self, events: AsyncIterable[WebhookEvent]) -> AsyncIterator[EnrichedEvent]:
+        """Enriches a stream of events, yielding each event with its transaction in the order received.
+
+        :param events: webhook events
+        """
+        submitted: asyncio.Queue = asyncio.Queue(maxsize=self._max_batch * 2)
+
+        async def submit_all() -> None:
+            async for event in events:
+                await submitted.put((event, self.submit(event)))
+            await submitted.put(None)
+
+        producer = asyncio.ensure_future(submit_all())
+        try:
+            while True:
+                item = await submitted.get()
+                if item is None:
+                    break
+                event, transaction = item
+                yield event, await transaction
+            await producer
+        finally:
+            producer.cancel()
+
+    def handler(self, callback: Callable[[List[EnrichedEvent]], Awaitable[None]]) -> Callable[[List[WebhookEvent]], Awaitable[None]]:
+        """Returns a WebhookReceiver handler that enriches each batch before passing it to `callback`.
+
+        :param callback: coroutine called with a list of (event, transaction) pairs
+        """
+        async def handle(events: List[WebhookEvent]) -> None:
+            await callback(list(zip(events, await self.enrich(events))))
+        return handle
+
+    def __resolve_pending(self) -> None:
+        if self._flush is not None:
+            self._flush.cancel()
+            self._flush = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.ensure_future(self.__resolve(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self.__resolved)
+
+    def __resolved(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.error("Resolving a batch of webhook events failed", exc_info=task.exception())
+
+    async def __resolve(self, batch: List[Tuple[WebhookEvent, asyncio.Future]]) -> None:
+        try:
+            transactions = await self.enrich([event for event, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), transaction in zip(batch, transactions):
+            if not future.done():
+                future.set_result(transaction)
+
+    async def __fetch(self, transaction_id: str, event_type: WebhookEventType) -> Optional[Transaction]:
+        key = f"{transaction_id}/{event_type.value}"
+        transaction = self._cache.get(key)
+        if transaction is not None:
+            return transaction
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._concurrency)
+        async with self._semaphore:
+            try:
+                transaction = await self._client.transaction(transaction_id)
+            except NotFoundException:
+                # The transaction was deleted after the event was sent.
+                _LOGGER.debug("Transaction %s of a webhook event was not found", transaction_id)
+                return None
+
+        self.fetched += 1
+        self._cache.set(key, transaction, self._ttl)
+        return transaction
@@ -76,3 +76,10 @@ class RateLimitExceededException(UpBankException):
 
 class BadResponseException(UpBankException):
     """Raised when a response from the API is not formatted correctly."""
+
+
+class PaginationClosedException(UpBankException):
+    """Raised when waiting for or fetching a page of a pager whose prefetch or client has been closed."""
+
+    def __init__(self, detail: str):
+        super().__init__({"title": "Pagination Closed", "detail": detail})
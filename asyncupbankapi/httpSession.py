@@ -1,49 +1,207 @@
-from json import dumps
+from __future__ import annotations
+import asyncio
+import hashlib
+from concurrent.futures import Executor
 from os import getenv
-from typing import Optional
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Set, Union
 
 import aiohttp
 from aiohttp.client_reqrep import ClientResponse
 from aiohttp.hdrs import AUTHORIZATION, CONTENT_TYPE
 from aiohttp.typedefs import StrOrURL
+from yarl import URL
 
+from asyncupbankapi.codec import JsonCodec, get_codec
+from asyncupbankapi.connectionPool import ConnectionPool
+from asyncupbankapi.const import BASE_URL
 from asyncupbankapi.exceptions import (NotAuthorizedException, NotFoundException,
                                   RateLimitExceededException, UpBankException)
+from asyncupbankapi.instrumentation import Hooks, RequestEnd, RequestStart, Retry, _RequestTiming, _trace_config, emit
+from asyncupbankapi.rateLimiter import RateLimiter
+
+if TYPE_CHECKING:
+    from asyncupbankapi.cache import ResponseCache
+
+API_PREFIX = "/api/v1"
+
+
+def endpoint_template(url: StrOrURL) -> str:
+    """Returns the endpoint a url belongs to with ids replaced, for example "/accounts/{id}/transactions"."""
+    path = URL(url).path
+    if path.startswith(API_PREFIX):
+        path = path[len(API_PREFIX):]
+    segments = path.strip("/").split("/")
+    # Every resource is addressed as /<collection>/<id>/..., apart from the utility endpoints.
+    if len(segments) > 1 and segments[0] != "util":
+        segments[1] = "{id}"
+    return "/" + "/".join(segments)
+
+
+def _affected_resources(url: URL) -> List[str]:
+    """Returns the url prefixes of every cached resource that a write to `url` can change."""
+    path = url.path
+    base = API_PREFIX if path.startswith(API_PREFIX) else ""
+    segments = path[len(base):].strip("/").split("/")
+    origin = str(url.origin()) + base
+
+    prefixes = [f"{origin}/{segments[0]}"]
+    if "relationships" in segments:
+        # Changing a relationship such as a transactions tags also changes the related collection.
+        prefixes.extend(f"{origin}/{segment}" for segment in segments[segments.index("relationships") + 1:])
+    return prefixes
 
 
 class HttpSession:
 
-    def __init__(self, token: Optional[str] = None):
+    def __init__(
+        self,
+        token: Optional[str] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        pool: Optional[ConnectionPool] = None,
+        connector: Optional[aiohttp.BaseConnector] = None,
+        cache: Optional[ResponseCache] = None,
+        coalesce: bool = True,
+        codec: Optional[JsonCodec] = None,
+        base_url: str = BASE_URL,
+        hooks: Optional[Sequence[Hooks]] = None,
+        client_session: Optional[aiohttp.ClientSession] = None,
+        executor: Optional[Executor] = None,
+    ):
         """UP Bank API HTTP Session.
 
         :param token UP Bank Token if not provided fetches "UP_TOKEN" from environment variables
+        :param rate_limiter: optional rate limiter used to throttle requests and retry rate limited ones
+        :param pool: optional connection pool settings used to create the connector
+        :param connector: optional connector shared with other sessions, it is not closed when this session is closed
+        :param cache: optional cache for responses of slow changing resources such as categories
+        :param coalesce: share one request between identical GET requests made at the same time
+        :param codec: JSON codec used for request and response bodies, defaults to the fastest installed (orjson, ujson or json)
+        :param base_url: url of the API that endpoints are built from
+        :param hooks: instrumentation hooks notified of every request, retry and parsed page
+        :param client_session: optional aiohttp session shared with other sessions, such as those of a ClientPool. The
+            token is sent with each request instead of as a session header and it is not closed when this session is closed
+        :param executor: optional executor, such as a ProcessPoolExecutor, that pages are decoded and validated in instead
+            of on the event loop. It is not shut down when this session is closed
         """
         up_token = token if token else getenv('UP_TOKEN')
 
         if up_token is None:
             raise NotAuthorizedException()
 
-        self._session = aiohttp.ClientSession(
-            headers={AUTHORIZATION: f"Bearer {up_token}",
-                     CONTENT_TYPE: "application/json"})
+        if client_session is not None:
+            self._session = client_session
+            self._session_owner = False
+            self._headers: Optional[Dict[str, str]] = {AUTHORIZATION: f"Bearer {up_token}"}
+        else:
+            if connector is None:
+                connector = (pool if pool else ConnectionPool()).create_connector()
+                connector_owner = True
+            else:
+                connector_owner = False
+
+            self._session = aiohttp.ClientSession(
+                headers={AUTHORIZATION: f"Bearer {up_token}",
+                         CONTENT_TYPE: "application/json"},
+                connector=connector,
+                connector_owner=connector_owner,
+                trace_configs=[_trace_config()] if hooks else None)
+            self._session_owner = True
+            self._headers = None
+        self._rate_limiter = rate_limiter
+        self._cache = cache
+        # Part of every cache key so a cache shared between tokens keeps their responses apart, hashed as keys may be on disk.
+        self._cache_scope = hashlib.sha256(up_token.encode()).hexdigest()[:16]
+        self._coalesce = coalesce
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        self._coalesced_requests = 0
+        self._codec = codec if codec is not None else get_codec()
+        self._base_url = base_url.rstrip("/")
+        self._hooks: List[Hooks] = list(hooks) if hooks else []
+        self._executor = executor
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        return self._rate_limiter
+
+    @property
+    def cache(self) -> Optional[ResponseCache]:
+        return self._cache
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @property
+    def hooks(self) -> List[Hooks]:
+        return self._hooks
+
+    @property
+    def codec(self) -> JsonCodec:
+        return self._codec
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def executor(self) -> Optional[Executor]:
+        return self._executor
+
+    @property
+    def coalesced_requests(self) -> int:
+        """The number of requests saved by sharing a request that was already in flight."""
+        return self._coalesced_requests
+
+    @property
+    def connector(self) -> Optional[aiohttp.BaseConnector]:
+        return self._session.connector
+
+    def add_task(self, task: asyncio.Task) -> None:
+        """Keeps a background task, such as a pager fetching pages ahead, until it is done or the session is closed."""
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
 
     async def close(self):
-        await self._session.close()
+        """Cancels background tasks and requests still in flight and closes the aiohttp session when it is not shared."""
+        self._closed = True
+        pending = [*self._tasks, *self._in_flight.values()]
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self._session_owner:
+            await self._session.close()
+
+    async def warm_up(self, endpoint: StrOrURL, connections: int = 1) -> None:
+        """Opens connections ahead of time so the first requests do not pay for TCP and TLS setup.
+
+        :param endpoint: a cheap endpoint to request, each concurrent request leaves an open connection in the pool
+        :param connections: number of connections to open
+        """
+        # Bypass the cache and coalescing, every request needs its own connection.
+        await asyncio.gather(*(self.__request("GET", endpoint) for _ in range(connections)))
 
-    async def __handle_response(self, response: ClientResponse) -> dict:
+    async def __handle_response(
+        self, response: ClientResponse, timing: Optional[_RequestTiming] = None, decode: bool = True
+    ) -> Any:
         if response.status == 204:
             await response.wait_for_close()
-            return {}
+            return {} if decode else b""
 
         if response.status >= 400:
             try:
                 if response.content_type == "application/json":
-                    data = await response.json()
+                    data = self._codec.loads(await response.read())
                     error = data["errors"][0]
                 else:
                     error = {}
-            except ValueError:
+            except (ValueError, KeyError, IndexError, TypeError):
                 error = {}
+            # The status of the response when the body does not say, for example an error page from a proxy.
+            error = {"status": str(response.status), **error}
 
             if response.status == 401:
                 raise NotAuthorizedException(error)
@@ -56,25 +214,158 @@ class HttpSession:
 
             raise UpBankException(error)
 
-        return await response.json()
+        if not decode:
+            body = await response.read()
+            if timing is not None:
+                timing.bytes = len(body)
+            return body
+        return await self.__decode(response, timing)
+
+    async def __decode(self, response: ClientResponse, timing: Optional[_RequestTiming] = None) -> Any:
+        # Decoded from the raw bytes, skipping the copy to str that response.json() makes.
+        body = await response.read()
+        if not body.strip():
+            return None
+        if timing is None:
+            return self._codec.loads(body)
+
+        timing.bytes = len(body)
+        start = perf_counter()
+        value = self._codec.loads(body)
+        timing.decode = perf_counter() - start
+        return value
+
+    async def __request(
+        self,
+        method: str,
+        endpoint: StrOrURL,
+        params: Optional[dict] = None,
+        data: Optional[Union[str, bytes]] = None,
+        decode: bool = True,
+    ) -> Any:
+        attempt = 0
+        while True:
+            if self._rate_limiter:
+                await self._rate_limiter.acquire()
+
+            timing = self.__start(method, endpoint, params, attempt) if self._hooks else None
+            status = None
+            try:
+                async with self._session.request(
+                        method, endpoint, params=params, data=data, headers=self._headers,
+                        trace_request_ctx=timing) as response:
+                    status = response.status
+                    if self._rate_limiter:
+                        self._rate_limiter.update(response.headers)
+
+                        # Back off and try again while there are retries left, the limiter holds back every other request.
+                        if response.status == 429 and attempt < self._rate_limiter.max_retries:
+                            delay = self._rate_limiter.backoff(attempt, response.headers)
+                            if timing:
+                                self.__end(timing, status)
+                                emit(self._hooks, "on_retry", Retry(
+                                    timing.method, timing.url, timing.endpoint, attempt, delay, status))
+                            attempt += 1
+                            continue
+
+                    result = await self.__handle_response(response, timing, decode)
+            except BaseException as e:
+                if timing:
+                    self.__end(timing, status, e)
+                raise
+
+            if timing:
+                self.__end(timing, status)
+            return result
+
+    def __start(self, method: str, endpoint: StrOrURL, params: Optional[dict], attempt: int) -> _RequestTiming:
+        url = URL(endpoint)
+        if params:
+            url = url.update_query(params)
+        timing = _RequestTiming(method, str(url), endpoint_template(url), attempt)
+        emit(self._hooks, "on_request_start", RequestStart(timing.method, timing.url, timing.endpoint, attempt))
+        return timing
+
+    def __end(self, timing: _RequestTiming, status: Optional[int], error: Optional[BaseException] = None) -> None:
+        emit(self._hooks, "on_request_end", RequestEnd(
+            timing.method, timing.url, timing.endpoint, timing.attempt, status, perf_counter() - timing.start,
+            timing.queued, timing.connect, timing.bytes, timing.decode, error))
 
     async def get(
         self, endpoint: StrOrURL, params: Optional[dict] = None
     ) -> dict:
         """This method is used to directly interact the up bank api."""
-        async with self._session.get(endpoint, params=params) as response:
-            return await self.__handle_response(response)
+        if self._cache is None and not self._coalesce:
+            return await self.__request("GET", endpoint, params=params)
+
+        url = URL(endpoint)
+        if params:
+            url = url.update_query(params)
+        key = str(url)
+
+        ttl = 0.0
+        if self._cache is not None:
+            ttl = self._cache.ttl(endpoint_template(url))
+            if ttl > 0:
+                response = self._cache.get(f"{key}#{self._cache_scope}")
+                if response is not None:
+                    return response
+
+        if self._coalesce:
+            response = await self.__coalesced_get(key, url)
+        else:
+            response = await self.__request("GET", url)
+
+        if ttl > 0:
+            self._cache.set(f"{key}#{self._cache_scope}", response, ttl)
+        return response
+
+    async def get_bytes(self, endpoint: StrOrURL, params: Optional[dict] = None) -> bytes:
+        """Returns the undecoded body of a GET request, for decoding elsewhere such as in the session's executor.
+
+        Error responses still raise, the request bypasses the cache and coalescing.
+        """
+        return await self.__request("GET", endpoint, params=params, decode=False)
+
+    async def __coalesced_get(self, key: str, url: URL) -> dict:
+        request = self._in_flight.get(key)
+        if request is None:
+            request = asyncio.ensure_future(self.__request("GET", url))
+            self._in_flight[key] = request
+            request.add_done_callback(lambda done: self.__request_done(key, done))
+        else:
+            self._coalesced_requests += 1
+
+        # Shielded so a caller giving up does not cancel the request for everyone else waiting on it.
+        return await asyncio.shield(request)
+
+    def __request_done(self, key: str, request: asyncio.Future) -> None:
+        if self._in_flight.get(key) is request:
+            del self._in_flight[key]
+        if not request.cancelled():
+            # Mark the exception as retrieved in case every caller has given up.
+            request.exception()
 
     async def post(
         self, endpoint: StrOrURL, payload: Optional[dict] = None, params: Optional[dict] = None,
     ) -> dict:
         """This method is used to directly interact the up bank api."""
-        async with self._session.post(endpoint, params=params, data=dumps(payload)) as response:
-            return await self.__handle_response(response)
+        try:
+            return await self.__request("POST", endpoint, params=params, data=self._codec.dumps(payload))
+        finally:
+            self.__invalidate(endpoint)
 
     async def delete(
         self, endpoint: StrOrURL, payload: Optional[dict] = None, params: Optional[dict] = None
     ) -> dict:
         """This method is used to directly interact the up bank api."""
-        async with self._session.delete(endpoint, params=params, data=dumps(payload)) as response:
-            return await self.__handle_response(response)
+        try:
+            return await self.__request("DELETE", endpoint, params=params, data=self._codec.dumps(payload))
+        finally:
+            self.__invalidate(endpoint)
+
+    def __invalidate(self, endpoint: StrOrURL) -> None:
+        # Invalidate even when the request failed as it may have been applied anyway.
+        if self._cache is not None:
+            for prefix in _affected_resources(URL(endpoint)):
+                self._cache.invalidate(prefix)
@@ -0,0 +1,136 @@
+"""Hooks for observing the requests made by HttpSession and the pages parsed from their responses."""
+from __future__ import annotations
+import logging
+from time import perf_counter
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RequestStart(NamedTuple):
+    """A request is about to be sent."""
+    method: str
+    url: str
+    endpoint: str
+    attempt: int
+
+
+class RequestEnd(NamedTuple):
+    """A request has finished, successfully or not.
+
+    `duration` covers the whole request including `queued`, `connect` and `decode`, so the time spent on the network is
+    roughly `duration - decode`.
+    """
+    method: str
+    url: str
+    endpoint: str
+    attempt: int
+    status: Optional[int]
+    duration: float
+    queued: float
+    connect: float
+    bytes: int
+    decode: float
+    error: Optional[BaseException] = None
+
+
+class Retry(NamedTuple):
+    """A request failed and is retried after `delay` seconds."""
+    method: str
+    url: str
+    endpoint: str
+    attempt: int
+    delay: float
+    status: Optional[int] = None
+    error: Optional[BaseException] = None
+
+
+class PageParsed(NamedTuple):
+    """A page of records was parsed, `duration` is the time spent validating it (almost nothing when raw)."""
+    resource: str
+    items: int
+    duration: float
+    raw: bool
+
+
+class Hooks:
+    """Base class for instrumentation, override the events of interest.
+
+    Hooks are called synchronously from the event loop so they should be cheap, exceptions raised by a hook are logged
+    and otherwise ignored.
+    """
+
+    def on_request_start(self, event: RequestStart) -> None:
+        pass
+
+    def on_request_end(self, event: RequestEnd) -> None:
+        pass
+
+    def on_retry(self, event: Retry) -> None:
+        pass
+
+    def on_page_parsed(self, event: PageParsed) -> None:
+        pass
+
+
+def emit(hooks: Iterable[Hooks], name: str, event: NamedTuple) -> None:
+    """Calls the hook `name` of every hook with `event`."""
+    for hook in hooks:
+        try:
+            getattr(hook, name)(event)
+        except Exception:
+            _LOGGER.exception("Instrumentation hook %s failed", name)
+
+
+class _RequestTiming:
+    """Collects the timings of a single request, passed to aiohttp as the trace request context."""
+    __slots__ = (
+        "method", "url", "endpoint", "attempt", "start", "queued", "connect", "bytes", "decode", "_queued_at", "_connect_at")
+
+    def __init__(self, method: str, url: str, endpoint: str, attempt: int) -> None:
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.attempt = attempt
+        self.start = perf_counter()
+        self.queued = 0.0
+        self.connect = 0.0
+        self.bytes = 0
+        self.decode = 0.0
+        self._queued_at = 0.0
+        self._connect_at = 0.0
+
+
+async def _on_queued_start(session, context, params) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx._queued_at = perf_counter()
+
+
+async def _on_queued_end(session, context, params) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx.queued += perf_counter() - context.trace_request_ctx._queued_at
+
+
+async def _on_create_start(session, context, params) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx._connect_at = perf_counter()
+
+
+async def _on_create_end(session, context, params) -> None:
+    if context.trace_request_ctx is not None:
+        context.trace_request_ctx.connect += perf_counter() - context.trace_request_ctx._connect_at
+
+
+def _trace_config() -> aiohttp.TraceConfig:
+    """Measures how long requests wait for a free connection in the pool and for new connections to open."""
+    import aiohttp
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_connection_queued_start.append(_on_queued_start)
+    trace_config.on_connection_queued_end.append(_on_queued_end)
+    trace_config.on_connection_create_start.append(_on_create_start)
+    trace_config.on_connection_create_end.append(_on_create_end)
+    return trace_config
@@ -0,0 +1,59 @@
+import asyncio
+import heapq
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence
+
+
+class _Reversed:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Reversed) and self.value == other.value
+
+    def __lt__(self, other: "_Reversed") -> bool:
+        return other.value < self.value
+
+
+async def _next(iterator: AsyncIterator) -> Optional[tuple]:
+    try:
+        return (await iterator.__anext__(),)
+    except StopAsyncIteration:
+        return None
+
+
+async def merge(
+    iterators: Sequence[AsyncIterator], key: Callable[[Any], Any], reverse: bool = False
+) -> AsyncIterator:
+    """Merges async iterators that are each sorted by `key` into one sorted iterator.
+
+    The first record of every iterator is fetched concurrently, records with the same key are returned in the order of `iterators`.
+
+    :param iterators: iterators sorted by `key`
+    :param key: returns the value a record is sorted by
+    :param reverse: set to True when the iterators are sorted in descending order
+    """
+    iterators = [iterator.__aiter__() for iterator in iterators]
+    heap: List[tuple] = []
+
+    try:
+        heads = await asyncio.gather(*(_next(iterator) for iterator in iterators))
+        for index, head in enumerate(heads):
+            if head:
+                value = key(head[0])
+                heapq.heappush(heap, (_Reversed(value) if reverse else value, index, head[0]))
+
+        while heap:
+            _, index, record = heapq.heappop(heap)
+            yield record
+
+            head = await _next(iterators[index])
+            if head:
+                value = key(head[0])
+                heapq.heappush(heap, (_Reversed(value) if reverse else value, index, head[0]))
+    finally:
+        for iterator in iterators:
+            aclose = getattr(iterator, "aclose", None)
+            if aclose:
+                await aclose()
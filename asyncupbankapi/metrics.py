@@ -0,0 +1,288 @@
+"""Metrics collected from instrumentation hooks, with Prometheus text and OpenTelemetry adapters."""
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from asyncupbankapi.instrumentation import Hooks, PageParsed, RequestEnd, RequestStart, Retry
+
+# Upper bounds in seconds, the same defaults as Prometheus client libraries with finer resolution below 5ms.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Counts observations in cumulative buckets."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        # The last count is for observations above every bucket.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """Returns (upper bound, observations at or below it) pairs ending with infinity."""
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def quantile(self, q: float) -> float:
+        """Estimates the q-th quantile (0-1) by interpolating within the bucket it falls in."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        lower = 0.0
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= rank:
+                return lower + (bound - lower) * (rank - seen) / count
+            seen += count
+            lower = bound
+        # Above the largest bucket nothing better than its bound is known.
+        return self.buckets[-1]
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+
+class EndpointMetrics:
+    """Counters and latency histograms of the requests to one endpoint."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes = 0
+        self.statuses: Dict[int, int] = defaultdict(int)
+        self.duration = Histogram(buckets)
+        self.decode = Histogram(buckets)
+        self.queued = Histogram(buckets)
+        self.connect = Histogram(buckets)
+
+
+class PageMetrics:
+    """Counters and parse time histogram of the pages of one resource."""
+
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.pages = 0
+        self.items = 0
+        self.parse = Histogram(buckets)
+
+
+class MetricsCollector(Hooks):
+    """Aggregates requests by method and endpoint template such as ("GET", "/accounts/{id}") and pages by resource.
+
+    Pass it to the client as a hook, `Client(hooks=[collector])`.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        """Metrics collector.
+
+        :param buckets: upper bounds in seconds of the latency histograms
+        """
+        self._buckets = tuple(buckets)
+        self.endpoints: Dict[Tuple[str, str], EndpointMetrics] = {}
+        self.pages: Dict[str, PageMetrics] = {}
+        self.in_flight = 0
+
+    def on_request_start(self, event: RequestStart) -> None:
+        self.in_flight += 1
+
+    def on_request_end(self, event: RequestEnd) -> None:
+        self.in_flight -= 1
+        metrics = self.__endpoint(event.method, event.endpoint)
+        metrics.requests += 1
+        if event.status is not None:
+            metrics.statuses[event.status] += 1
+        if event.error is not None or event.status is None or event.status >= 400:
+            metrics.errors += 1
+        metrics.bytes += event.bytes
+        metrics.duration.observe(event.duration)
+        metrics.decode.observe(event.decode)
+        metrics.queued.observe(event.queued)
+        metrics.connect.observe(event.connect)
+
+    def on_retry(self, event: Retry) -> None:
+        self.__endpoint(event.method, event.endpoint).retries += 1
+
+    def on_page_parsed(self, event: PageParsed) -> None:
+        metrics = self.pages.get(event.resource)
+        if metrics is None:
+            metrics = self.pages[event.resource] = PageMetrics(self._buckets)
+        metrics.pages += 1
+        metrics.items += event.items
+        metrics.parse.observe(event.duration)
+
+    def reset(self) -> None:
+        self.endpoints.clear()
+        self.pages.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        """Returns the totals and latency percentiles (in seconds) of every endpoint and resource."""
+        def latency(histogram: Histogram) -> Dict[str, float]:
+            return {
+                "mean": histogram.mean,
+                "p50": histogram.quantile(0.5),
+                "p90": histogram.quantile(0.9),
+                "p99": histogram.quantile(0.99),
+                "total": histogram.sum}
+
+        return {
+            "endpoints": {
+                f"{method} {endpoint}": {
+                    "requests": metrics.requests,
+                    "errors": metrics.errors,
+                    "retries": metrics.retries,
+                    "bytes": metrics.bytes,
+                    "statuses": dict(metrics.statuses),
+                    "duration": latency(metrics.duration),
+                    "decode": latency(metrics.decode),
+                    "queued": latency(metrics.queued),
+                    "connect": latency(metrics.connect)}
+                for (method, endpoint), metrics in self.endpoints.items()},
+            "pages": {
+                resource: {"pages": metrics.pages, "items": metrics.items, "parse": latency(metrics.parse)}
+                for resource, metrics in self.pages.items()}}
+
+    def __endpoint(self, method: str, endpoint: str) -> EndpointMetrics:
+        metrics = self.endpoints.get((method, endpoint))
+        if metrics is None:
+            metrics = self.endpoints[(method, endpoint)] = EndpointMetrics(self._buckets)
+        return metrics
+
+
+def prometheus_text(collector: MetricsCollector, namespace: str = "upbank") -> str:
+    """Returns the collected metrics in the Prometheus text exposition format.
+
+    :param collector: the collector to export
+    :param namespace: prefix of every metric name
+    """
+    lines: List[str] = []
+
+    def header(name: str, kind: str, help_text: str) -> str:
+        name = f"{namespace}_{name}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def histogram(name: str, labels: str, value: Histogram) -> None:
+        for bound, count in value.cumulative():
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+        lines.append(f"{name}_sum{{{labels}}} {value.sum!r}")
+        lines.append(f"{name}_count{{{labels}}} {value.count}")
+
+    endpoints = [(_labels(method=method, endpoint=endpoint), metrics)
+                 for (method, endpoint), metrics in sorted(collector.endpoints.items())]
+
+    name = header("requests_total", "counter", "Requests made by endpoint and status.")
+    for labels, metrics in endpoints:
+        for status, count in sorted(metrics.statuses.items()):
+            lines.append(f'{name}{{{labels},status="{status}"}} {count}')
+        failed = metrics.requests - sum(metrics.statuses.values())
+        if failed:
+            lines.append(f'{name}{{{labels},status="none"}} {failed}')
+
+    for metric, attribute, help_text in (
+            ("request_errors_total", "errors", "Requests that failed or returned an error status."),
+            ("request_retries_total", "retries", "Requests retried after a failure."),
+            ("response_bytes_total", "bytes", "Bytes received in response bodies.")):
+        name = header(metric, "counter", help_text)
+        for labels, metrics in endpoints:
+            lines.append(f"{name}{{{labels}}} {getattr(metrics, attribute)}")
+
+    for metric, attribute, help_text in (
+            ("request_duration_seconds", "duration", "Time from sending a request to decoding its response."),
+            ("response_decode_seconds", "decode", "Time spent decoding response bodies."),
+            ("connection_queued_seconds", "queued", "Time spent waiting for a free connection in the pool."),
+            ("connection_connect_seconds", "connect", "Time spent opening new connections.")):
+        name = header(metric, "histogram", help_text)
+        for labels, metrics in endpoints:
+            histogram(name, labels, getattr(metrics, attribute))
+
+    name = header("requests_in_flight", "gauge", "Requests currently being made.")
+    lines.append(f"{name} {collector.in_flight}")
+
+    pages = [(_labels(resource=resource), metrics) for resource, metrics in sorted(collector.pages.items())]
+    for metric, attribute, help_text in (
+            ("pages_parsed_total", "pages", "Pages of records parsed."),
+            ("items_parsed_total", "items", "Records parsed.")):
+        name = header(metric, "counter", help_text)
+        for labels, metrics in pages:
+            lines.append(f"{name}{{{labels}}} {getattr(metrics, attribute)}")
+
+    name = header("page_parse_seconds", "histogram", "Time spent validating pages of records.")
+    for labels, metrics in pages:
+        histogram(name, labels, metrics.parse)
+
+    return "\n".join(lines) + "\n"
+
+
+def _labels(**labels: str) -> str:
+    def escape(value: str) -> str:
+        return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+class OpenTelemetryHooks(Hooks):
+    """Records requests, retries and parsed pages as OpenTelemetry metrics, requires opentelemetry-api.
+
+    Attributes follow the HTTP semantic conventions where they exist (`http.request.method`, `http.route`,
+    `http.response.status_code`).
+    """
+
+    def __init__(self, meter: Optional[Any] = None, prefix: str = "upbank") -> None:
+        """OpenTelemetry hooks.
+
+        :param meter: meter to create the instruments with, defaults to the meter of the global meter provider
+        :param prefix: prefix of every instrument name
+        """
+        if meter is None:
+            try:
+                from opentelemetry import metrics
+            except ImportError as e:
+                raise ImportError(
+                    "opentelemetry-api is required for this, install it with "
+                    "`pip install async-up-bank-api[opentelemetry]`") from e
+            meter = metrics.get_meter("asyncupbankapi")
+
+        self._requests = meter.create_counter(f"{prefix}.requests", unit="{request}", description="Requests made.")
+        self._retries = meter.create_counter(f"{prefix}.retries", unit="{request}", description="Requests retried.")
+        self._bytes = meter.create_counter(f"{prefix}.response.size", unit="By", description="Bytes received.")
+        self._duration = meter.create_histogram(
+            f"{prefix}.request.duration", unit="s", description="Time from sending a request to decoding its response.")
+        self._decode = meter.create_histogram(
+            f"{prefix}.response.decode", unit="s", description="Time spent decoding response bodies.")
+        self._queued = meter.create_histogram(
+            f"{prefix}.connection.queued", unit="s", description="Time spent waiting for a free connection.")
+        self._items = meter.create_counter(f"{prefix}.items.parsed", unit="{item}", description="Records parsed.")
+        self._parse = meter.create_histogram(
+            f"{prefix}.page.parse", unit="s", description="Time spent validating pages of records.")
+
+    def on_request_end(self, event: RequestEnd) -> None:
+        attributes: Dict[str, Any] = {"http.request.method": event.method, "http.route": event.endpoint}
+        if event.status is not None:
+            attributes["http.response.status_code"] = event.status
+        if event.error is not None:
+            attributes["error.type"] = type(event.error).__name__
+        self._requests.add(1, attributes)
+        self._bytes.add(event.bytes, attributes)
+        self._duration.record(event.duration, attributes)
+        self._decode.record(event.decode, attributes)
+        self._queued.record(event.queued, attributes)
+
+    def on_retry(self, event: Retry) -> None:
+        self._retries.add(1, {"http.request.method": event.method, "http.route": event.endpoint})
+
+    def on_page_parsed(self, event: PageParsed) -> None:
+        attributes = {"resource": event.resource, "raw": event.raw}
+        self._items.add(event.items, attributes)
+        self._parse.record(event.duration, attributes)
@@ -1,7 +1,44 @@
-"""Typed python client for interacting with Up's banking API."""
-from asyncupbankapi.models.accounts import Account, Accounts
-from asyncupbankapi.models.categories import Category, Categories
-from asyncupbankapi.models.tags import Tags
-from asyncupbankapi.models.transactions import Transaction, Transactions
-from asyncupbankapi.models.utility import Ping
-from asyncupbankapi.models.webhooks import Webhook, WebhookEvent, WebhookLogs, Webhooks
+"""Typed python client for interacting with Up's banking API.
+
+Model modules are imported on first use, building their validators is a large part of importing the package.
+"""
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from asyncupbankapi.models.accounts import Account, Accounts
+    from asyncupbankapi.models.categories import Category, Categories
+    from asyncupbankapi.models.tags import Tags
+    from asyncupbankapi.models.transactions import Transaction, Transactions
+    from asyncupbankapi.models.utility import Ping
+    from asyncupbankapi.models.webhooks import Webhook, WebhookEvent, WebhookLogs, Webhooks
+
+_LAZY = {
+    "Account": "accounts",
+    "Accounts": "accounts",
+    "Category": "categories",
+    "Categories": "categories",
+    "Tags": "tags",
+    "Transaction": "transactions",
+    "Transactions": "transactions",
+    "Ping": "utility",
+    "Webhook": "webhooks",
+    "WebhookEvent": "webhooks",
+    "WebhookLogs": "webhooks",
+    "Webhooks": "webhooks",
+}
+
+__all__ = list(_LAZY)
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(_LAZY))
@@ -1,9 +1,11 @@
 # Account Classes
-from typing import List
+import asyncio
+from typing import List, Optional
 from asyncupbankapi.models.transactions import Transactions
-from asyncupbankapi.models.baseModels import Money, RelatedLinks, Self, TypeandUUID, Pagination
-from asyncupbankapi.const import AccountType
-from pydantic import BaseModel, root_validator
+from asyncupbankapi.models.baseModels import (CheckpointCallback, Money, RelatedLinks, Self, TypeandUUID, Pagination,
+                                              parse_timestamp)
+from asyncupbankapi.const import AccountType, PAGE_SIZE
+from pydantic import BaseModel, root_validator, validator
 from datetime import datetime
 
 
@@ -13,6 +15,10 @@ class AccountAttributes(BaseModel):
     balance: Money
     createdAt: datetime
 
+    @ validator("createdAt", pre=True)
+    def _parse_timestamp(cls, v):
+        return parse_timestamp(v)
+
 
 class AccountRelationship(BaseModel):
     transactions: RelatedLinks
@@ -33,10 +39,47 @@ class Account(TypeandUUID):
         """Return the representation of the account."""
         return f"<Account '{self.attributes.displayName}' ({self.attributes.accountType}): {self.attributes.balance.value} {self.attributes.balance.currencyCode}>"
 
-    async def transactions(self) -> Transactions:
-        return Transactions(
-            data=await self._session.get(self.relationships.transactions.links.related),
-            session=self._session)
+    async def transactions(
+        self,
+        limit: Optional[int] = None,
+        page_size: Optional[int] = None,
+        prefetch: int = 1,
+        retain: bool = True,
+        raw: bool = False,
+        on_checkpoint: Optional[CheckpointCallback] = None,
+        checkpoint_every: int = 1,
+        requests: Optional[asyncio.Semaphore] = None,
+    ) -> Transactions:
+        """Returns the transactions of this account.
+
+        :param limit: maximum number of records to return (set to None for all transactions)
+        :param page_size: number of records to fetch in each request (max 100)
+        :param prefetch: number of pages to fetch ahead while iterating
+        :param retain: keep every record in memory, set to False to drop pages once iterated
+        :param raw: return each record as the dictionary returned by the API, skipping model validation
+        :param on_checkpoint: called with a token to resume from, see `resume`, every `checkpoint_every` pages iterated
+        :param checkpoint_every: number of pages iterated between checkpoints
+        :param requests: semaphore shared with other pagers that bounds their page requests in flight
+        """
+        if limit and page_size and limit < page_size:
+            page_size = limit
+
+        params = {}
+
+        if page_size:
+            params.update({PAGE_SIZE: str(page_size)})
+
+        return await Transactions.fetch(
+            self._session,
+            self.relationships.transactions.links.related,
+            params,
+            limit=limit,
+            prefetch=prefetch,
+            retain=retain,
+            raw=raw,
+            on_checkpoint=on_checkpoint,
+            checkpoint_every=checkpoint_every,
+            requests=requests)
 
 
 class Accounts(Pagination):
@@ -1,12 +1,28 @@
 # Common Classes
 from __future__ import annotations
 from pydantic import BaseModel, root_validator, validator, PrivateAttr
+from pydantic.datetime_parse import parse_datetime
 from yarl import URL
 from uuid import UUID
-from typing import AsyncIterator, Awaitable, Iterator, Optional, List, Union
-from asyncupbankapi.const import PAGE_SIZE
-from asyncupbankapi.httpSession import HttpSession
+from datetime import datetime
+from decimal import Decimal
+from typing import (TYPE_CHECKING, Any, AsyncIterator, Callable, Iterator, NamedTuple, Optional, List, Type as TypeOf,
+                    Union)
+from asyncupbankapi.codec import get_codec
+from asyncupbankapi.const import CURRENCY_EXPONENTS, PAGE_SIZE
+from asyncupbankapi.exceptions import PaginationClosedException
+from asyncupbankapi.instrumentation import PageParsed, emit
+from time import perf_counter
 import asyncio
+import base64
+import functools
+import inspect
+import json
+
+if TYPE_CHECKING:
+    # Only needed for annotations, parsing webhook events does not need the HTTP client.
+    from aiohttp.typedefs import StrOrURL
+    from asyncupbankapi.httpSession import HttpSession
 
 
 class Self(BaseModel):
@@ -84,11 +100,51 @@ class PaginationLinks(BaseModel):
             return URL(v, encoded=True)
 
 
+def parse_timestamp(value: Any) -> datetime:
+    """Parses a timestamp, quickly when in the format Up returns them ("2021-01-01T10:00:00+10:00").
+
+    Anything else, such as a "Z" suffix or fractional seconds, goes through pydantic's generic parser.
+    """
+    if type(value) is str and len(value) == 25:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return parse_datetime(value)
+
+
 class Money(BaseModel):
     currencyCode: str
     value: float
     valueInBaseUnits: int
 
+    @classmethod
+    def validate(cls, value: Any) -> Money:
+        # Every transaction has a few amounts, those in the shape returned by the API skip the generic field validation.
+        if type(value) is dict and len(value) == 3:
+            currency, amount, units = value.get("currencyCode"), value.get("value"), value.get("valueInBaseUnits")
+            if type(currency) is str and type(amount) is str and type(units) is int:
+                try:
+                    fields = {"currencyCode": currency, "value": float(amount), "valueInBaseUnits": units}
+                except ValueError:
+                    return super().validate(value)
+                # What `construct` does without its handling of defaults and aliases, Money has neither.
+                money = cls.__new__(cls)
+                object.__setattr__(money, "__dict__", fields)
+                object.__setattr__(money, "__fields_set__", set(fields))
+                return money
+        return super().validate(value)
+
+    @ property
+    def decimal(self) -> Decimal:
+        """The exact amount, computed from the base units as `value` is a float."""
+        return Decimal(self.valueInBaseUnits).scaleb(-self.exponent)
+
+    @ property
+    def exponent(self) -> int:
+        """Number of decimals of the currency, 2 for AUD and 0 for currencies without minor units such as JPY."""
+        return CURRENCY_EXPONENTS.get(self.currencyCode, 2)
+
 
 class TypeInternal():
     session: Optional[HttpSession] = None
@@ -99,6 +155,9 @@ class Type(BaseModel):
     _session: HttpSession = PrivateAttr()
 
     def __init__(self, session: Optional[HttpSession] = None, **data: dict, ) -> None:
+        if set(data) == {"data"}:
+            # Given a response as data=response, the resource itself is unwrapped by the root validator.
+            data = data["data"]
         super().__init__(**data)
         if session:
             self._session = session
@@ -124,42 +183,265 @@ class TypeandUUID(Type):
 class TypeAndId(Type):
     id: str
 
+
 # Pagination
+class Checkpoint(NamedTuple):
+    """The position of a pager after its last fully iterated page, saved as a token to resume from later."""
+    resource: str
+    next: Optional[str]
+    count: int
+    limit: Optional[int] = None
+    raw: bool = False
+
+    VERSION = 1
+
+    @ property
+    def done(self) -> bool:
+        """Whether every record has been iterated, resuming returns no records."""
+        return self.next is None or bool(self.limit and self.count >= self.limit)
+
+    def encode(self) -> str:
+        """Returns the checkpoint as a url safe token. The token holds the url of the next page, which includes the filters."""
+        value = json.dumps([self.VERSION, *self], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(value).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, token: str) -> Checkpoint:
+        """Reads a token returned by `encode`."""
+        try:
+            version, *fields = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+            if version != cls.VERSION:
+                raise ValueError(f"unsupported version {version}")
+            checkpoint = cls(*fields)
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"invalid pagination checkpoint: {e}") from e
+        if not isinstance(checkpoint.resource, str):
+            raise ValueError("invalid pagination checkpoint: bad resource")
+        if checkpoint.next is not None and not isinstance(checkpoint.next, str):
+            raise ValueError("invalid pagination checkpoint: bad next")
+        if not _is_count(checkpoint.count):
+            raise ValueError("invalid pagination checkpoint: bad count")
+        if checkpoint.limit is not None and not _is_count(checkpoint.limit):
+            raise ValueError("invalid pagination checkpoint: bad limit")
+        if not isinstance(checkpoint.raw, bool):
+            raise ValueError("invalid pagination checkpoint: bad raw")
+        return checkpoint
+
+
+def _is_count(value: Any) -> bool:
+    # bool is an int subclass but never a count.
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+
+CheckpointCallback = Callable[[str], Any]
+
+
+class _ParsedPage(NamedTuple):
+    """A page decoded and validated in an executor, `duration` is the time that took."""
+    links: PaginationLinks
+    data: list
+    duration: float
+
+
 class Pagination(BaseModel):
     links: PaginationLinks
     data: List[Type]
-    _next_page: Optional[Awaitable[dict]] = PrivateAttr(default=None)
+    _prefetch: int = PrivateAttr(default=1)
+    _retain: bool = PrivateAttr(default=True)
+    _offset: int = PrivateAttr(default=0)
+    _raw: bool = PrivateAttr(default=False)
+    _pages: Optional[asyncio.Queue] = PrivateAttr(default=None)
+    _window: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    # Shared between pagers to bound their page requests in flight, such as the accounts of a fan-out.
+    _requests: Optional[asyncio.Semaphore] = PrivateAttr(default=None)
+    _producer: Optional[asyncio.Task] = PrivateAttr(default=None)
     _limit: Optional[int] = PrivateAttr(default=None)
     _session: HttpSession = PrivateAttr(default=None)
+    _on_checkpoint: Optional[CheckpointCallback] = PrivateAttr(default=None)
+    _checkpoint_every: int = PrivateAttr(default=1)
+    _pages_done: int = PrivateAttr(default=0)
 
     class Config:
         arbitrary_types_allowed = True
 
-    def __init__(self, data: dict, session: HttpSession, limit: Optional[int] = None) -> None:
-        super().__init__(**data)
+    def __init__(
+        self,
+        data: Union[dict, _ParsedPage],
+        session: HttpSession,
+        limit: Optional[int] = None,
+        prefetch: int = 1,
+        retain: bool = True,
+        raw: bool = False,
+        on_checkpoint: Optional[CheckpointCallback] = None,
+        checkpoint_every: int = 1,
+        requests: Optional[asyncio.Semaphore] = None,
+    ) -> None:
+        """A page of records that fetches the following pages as it is iterated.
+
+        :param data: the response of the first page, or the page already parsed in the session's executor
+        :param session: the session used to fetch the following pages
+        :param limit: maximum number of records to return (set to None for all records)
+        :param prefetch: number of pages to read ahead of the consumer (set to 0 to only fetch pages when needed)
+        :param retain: keep every fetched record in `data`, when False only the current page is kept
+        :param raw: skip validation and return each record as the dictionary returned by the API
+        :param on_checkpoint: called with a checkpoint token, see `checkpoint`, after every `checkpoint_every` pages have
+            been iterated and once more when iteration finishes. It can be a coroutine function
+        :param checkpoint_every: number of pages iterated between checkpoints
+        :param requests: semaphore shared with other pagers that every page request, including those read ahead, waits
+            for, bounding the requests in flight across all of them
+        """
+        hooks = getattr(session, "hooks", None)
+        start = perf_counter() if hooks else 0.0
+        if isinstance(data, _ParsedPage):
+            # Validated by the executor already, only the session is left to set on the records.
+            super().__init__(links=data.links, data=[])
+            self.data = data.data
+            start -= data.duration
+        elif raw:
+            # Only the links are needed to paginate, the records are handed over untouched.
+            super().__init__(links=data["links"], data=[])
+            self.data = data["data"]
+        else:
+            super().__init__(**data)
+        if limit and len(self.data) > limit:
+            # The first page is fetched with the default page size which can be larger than the limit.
+            self.data = self.data[:limit]
         self._session = session
         self._limit = limit
-        for i in self.data:
-            i._session = self._session
+        self._prefetch = max(0, prefetch)
+        self._retain = retain
+        self._raw = raw
+        self._on_checkpoint = on_checkpoint
+        self._checkpoint_every = max(1, checkpoint_every)
+        self._requests = requests
+        if not raw:
+            for i in self.data:
+                i._session = self._session
+        if hooks:
+            emit(hooks, "on_page_parsed", PageParsed(type(self).__name__, len(self.data), perf_counter() - start, raw))
+
+    @classmethod
+    async def fetch(
+        cls,
+        session: HttpSession,
+        url: StrOrURL,
+        params: Optional[dict] = None,
+        limit: Optional[int] = None,
+        prefetch: int = 1,
+        retain: bool = True,
+        raw: bool = False,
+        on_checkpoint: Optional[CheckpointCallback] = None,
+        checkpoint_every: int = 1,
+        requests: Optional[asyncio.Semaphore] = None,
+    ) -> Pagination:
+        """Requests the first page and returns it, parsed in the session's executor when it has one.
+
+        :param session: the session used to fetch every page
+        :param url: url of the first page
+        :param params: query parameters of the first page, such as the page size and filters
+        :param requests: semaphore bounding the page requests in flight, the first page waits for it too
+        """
+        if requests is None:
+            data = await _fetch_page(cls, session, url, params, limit, raw)
+        else:
+            async with requests:
+                data = await _fetch_page(cls, session, url, params, limit, raw)
+        return cls(data, session, limit, prefetch, retain, raw, on_checkpoint, checkpoint_every, requests)
+
+    @classmethod
+    async def resume(
+        cls,
+        session: HttpSession,
+        checkpoint: Union[str, Checkpoint],
+        prefetch: int = 1,
+        retain: bool = True,
+        on_checkpoint: Optional[CheckpointCallback] = None,
+        checkpoint_every: int = 1,
+    ) -> Pagination:
+        """Continues iterating from a checkpoint of a pager of this type, fetching the page that follows it.
+
+        The filters, page size, limit and `raw` of the original pager are kept and `count` carries on from the records
+        iterated before the checkpoint. Indexing only works for records fetched after resuming.
+
+        :param session: the session used to fetch every page, it can belong to a new client
+        :param checkpoint: a token returned by `checkpoint` or passed to an `on_checkpoint` callback
+        """
+        if isinstance(checkpoint, str):
+            checkpoint = Checkpoint.decode(checkpoint)
+        if checkpoint.resource != cls.__name__:
+            raise ValueError(f"checkpoint of {checkpoint.resource} can not resume {cls.__name__}")
+
+        pager = cls(
+            {"links": {"next": checkpoint.next}, "data": []}, session, checkpoint.limit, prefetch, retain,
+            checkpoint.raw, on_checkpoint, checkpoint_every)
+        pager._offset = checkpoint.count
+        if pager.has_next:
+            await pager.next()
+        return pager
+
+    async def __aenter__(self) -> Pagination:
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Cancels the pages being fetched ahead of the consumer, they are fetched again if iteration carries on.
+
+        A consumer already waiting for the next page gets a PaginationClosedException.
+        """
+        producer = self.__stop_prefetch()
+        if producer is not None:
+            await asyncio.gather(producer, return_exceptions=True)
 
     async def __getitem__(self, index: Union[int, slice]) -> Union[Type, Pagination._Slice]:
         assert isinstance(index, (int, slice))
         if isinstance(index, int):
             await self._fetch_to(index)
+            if index >= 0:
+                if index < self._offset:
+                    raise IndexError(
+                        f"record {index} has already been dropped, only records from {self._offset} are kept when retain is False")
+                index -= self._offset
             return self.data[index]
         return Pagination._Slice(self, index)
 
     async def __aiter__(self) -> AsyncIterator:
-        for element in self.data:
-            yield element
-        while self.has_next:
-            new_elements = await self.next()
-            for element in new_elements:
+        try:
+            for element in self.data:
                 yield element
+            while self.has_next:
+                # Every record of the page has been handed over, resuming can start from the next page.
+                await self.__page_done()
+                new_elements = await self.next()
+                for element in new_elements:
+                    yield element
+            if self._on_checkpoint is not None:
+                await self.__save_checkpoint()
+        finally:
+            # Also reached when the consumer breaks out of the loop and the iterator is closed, nobody is left to take
+            # the pages read ahead.
+            self.__stop_prefetch()
+
+    async def stream(self) -> AsyncIterator:
+        """Iterates the remaining records dropping each page once it has been consumed, keeping memory use to a few pages."""
+        self._retain = False
+        async for element in self:
+            yield element
+
+    def checkpoint(self) -> str:
+        """Returns a token to resume iterating from after the last page fetched, see `resume`.
+
+        Taken while a page is being iterated, the records of that page not yet iterated are skipped when resuming, the
+        tokens passed to `on_checkpoint` are always taken between pages.
+        """
+        next_url = str(self.links.next) if self.links.next else None
+        return Checkpoint(type(self).__name__, next_url, self.count, self._limit, self._raw).encode()
 
     @ property
     def count(self) -> int:
-        return len(self.data)
+        """The number of records fetched so far, including records that have been dropped."""
+        return self._offset + len(self.data)
 
     @ property
     def has_next(self) -> bool:
@@ -170,44 +452,102 @@ class Pagination(BaseModel):
         return True
 
     async def _fetch_to(self, index) -> None:
-        while len(self.data) <= index and self.has_next:
+        while self.count <= index and self.has_next:
             await self.next()
 
     async def next(self) -> List:
         assert self._session
+        if getattr(self._session, "closed", False):
+            raise PaginationClosedException("the client of this pager has been closed")
+
+        if self._prefetch:
+            if self._producer is None:
+                # First call start reading ahead from the next page
+                self._pages = asyncio.Queue()
+                # A page takes a slot from being requested until the consumer receives it, so at most `prefetch` pages
+                # are fetched or in flight ahead of the consumer.
+                self._window = asyncio.Semaphore(self._prefetch)
+                self._producer = asyncio.create_task(self.__produce(self._pages, self._window))
+                self._producer.add_done_callback(functools.partial(_wake_consumer, self._pages))
+                # Held by the session until done so closing the client cancels it, even when the pager is abandoned.
+                add_task = getattr(self._session, "add_task", None)
+                if add_task is not None:
+                    add_task(self._producer)
+
+            pages, window = self._pages, self._window
+            page = await pages.get()
+
+            if isinstance(page, BaseException):
+                # The producer has stopped, the next call starts again from the last page we received.
+                if self._pages is pages:
+                    self._producer = None
+                    self._pages = None
+                    self._window = None
+                raise page
+            window.release()
+        else:
+            page = await self.__fetch_page(self.__get_next_url(self.links.next, self.count))
 
-        if self._next_page:
-            response = await self._next_page
+        self.links = page.links
+        if self._retain:
+            self.data += page.data
         else:
-            # First call fetch the next page
-            response = await self._session.get(self.__get_next_url())
+            self._offset += len(self.data)
+            self.data = page.data
 
-        data = self.__class__(
-            response, self._session, self._limit)
+        return page.data
 
-        self.links = data.links
+    def __stop_prefetch(self) -> Optional[asyncio.Task]:
+        producer, self._producer, self._pages, self._window = self._producer, None, None, None
+        if producer is not None:
+            producer.cancel()
+        return producer
 
-        # Queue up the next page if we need to
-        if self.has_next:
-            self._next_page = asyncio.create_task(self._session.get(
-                self.__get_next_url(len(data.data))))
+    async def __produce(self, pages: asyncio.Queue, window: asyncio.Semaphore) -> None:
+        """Follows the next links ahead of the consumer, waits whenever `prefetch` pages have not been consumed yet."""
+        url = self.links.next
+        records = self.count
+
+        try:
+            while url and (not self._limit or records < self._limit):
+                await window.acquire()
+                page = await self.__fetch_page(self.__get_next_url(url, records))
+                records += len(page.data)
+                url = page.links.next
+                pages.put_nowait(page)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            pages.put_nowait(e)
+
+    async def __fetch_page(self, url: URL) -> Pagination:
+        # Pages are fetched one after another as each holds the link to the next, so they are always parsed in order.
+        if self._requests is None:
+            response = await _fetch_page(self.__class__, self._session, url, None, self._limit, self._raw)
+        else:
+            async with self._requests:
+                response = await _fetch_page(self.__class__, self._session, url, None, self._limit, self._raw)
+        return self.__class__(response, self._session, self._limit, prefetch=0, raw=self._raw)
 
-        self.data += data.data
+    async def __page_done(self) -> None:
+        self._pages_done += 1
+        if self._on_checkpoint is not None and self._pages_done % self._checkpoint_every == 0:
+            await self.__save_checkpoint()
 
-        return data.data
+    async def __save_checkpoint(self) -> None:
+        result = self._on_checkpoint(self.checkpoint())
+        if inspect.isawaitable(result):
+            await result
 
-    def __get_next_url(self, new_records: int = 0) -> URL:
+    def __get_next_url(self, url: Optional[URL], records: int) -> URL:
         # Next must exist otherwise something is wrong..
-        assert self.links.next
-
-        url = self.links.next
+        assert url
 
         # If there is a limit see if we have hit it.
         if self._limit:
             page_size = url.query.get(PAGE_SIZE)
             # Page Size MUST exist otherwise something is wrong..
             assert page_size
-            records = self.count + new_records
             diff = records + int(page_size) - self._limit
             if diff > 0:
                 # Only load what we need to on the next page load
@@ -230,3 +570,29 @@ class Pagination(BaseModel):
                     index += self.__step
                 else:
                     return
+
+
+async def _fetch_page(
+    cls: TypeOf[Pagination], session: HttpSession, url: StrOrURL, params: Optional[dict], limit: Optional[int], raw: bool
+) -> Union[dict, _ParsedPage]:
+    """Returns the response of a page, or with an executor on the session the page parsed in it from the response body."""
+    executor = getattr(session, "executor", None)
+    if executor is None:
+        return await session.get(url, params=params)
+
+    body = await session.get_bytes(url, params=params)
+    return await asyncio.get_event_loop().run_in_executor(
+        executor, _parse_page, cls, body, session.codec.name, limit, raw)
+
+
+def _wake_consumer(pages: asyncio.Queue, producer: asyncio.Task) -> None:
+    # A cancelled producer puts nothing in the queue, a consumer waiting on it would never wake up.
+    if producer.cancelled():
+        pages.put_nowait(PaginationClosedException("prefetching was cancelled while waiting for the next page"))
+
+
+def _parse_page(cls: TypeOf[Pagination], body: bytes, codec: str, limit: Optional[int], raw: bool) -> _ParsedPage:
+    # Runs in the executor, in a process pool everything here and in the result has to be picklable.
+    start = perf_counter()
+    page = cls(get_codec(codec).loads(body), None, limit, prefetch=0, raw=raw)
+    return _ParsedPage(page.links, page.data, perf_counter() - start)
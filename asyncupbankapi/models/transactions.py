@@ -1,8 +1,8 @@
 # Transaction Classes
-from typing import Optional, List
+from typing import Iterable, Optional, List
 from asyncupbankapi.const import TransactionStatus
-from asyncupbankapi.models.baseModels import Money, Pagination, RelatedObject, RelatedUUIDObject, Self, TagsRelationship, TypeandUUID
-from pydantic import BaseModel, root_validator
+from asyncupbankapi.models.baseModels import Money, Pagination, RelatedObject, RelatedUUIDObject, Self, TagsRelationship, TypeandUUID, parse_timestamp
+from pydantic import BaseModel, root_validator, validator
 from datetime import datetime
 
 class HoldInfo(BaseModel):
@@ -33,6 +33,10 @@ class TransactionAttributes(BaseModel):
     settledAt: Optional[datetime] = None
     createdAt: datetime
 
+    @ validator("settledAt", "createdAt", pre=True)
+    def _parse_timestamp(cls, v):
+        return parse_timestamp(v) if v is not None else None
+
 
 class TransactionRelationships(BaseModel):
     account: RelatedUUIDObject
@@ -58,20 +62,22 @@ class Transaction(TypeandUUID):
         return f"<Transaction {self.attributes.status}: {self.attributes.amount.value} {self.attributes.amount.currencyCode} [{self.attributes.description}]>"
 
     async def add_tags(self, tags: list) -> None:
-        assert self._internal.session
+        assert self._session
         assert self.relationships.tags.links
-        await self._internal.session.post(endpoint=self.relationships.tags.links.self, payload=self.__get_tag_payload(tags))
+        await self._session.post(endpoint=self.relationships.tags.links.self, payload=tag_payload(tags))
 
     async def delete_tags(self, tags: list) -> None:
-        assert self._internal.session
+        assert self._session
         assert self.relationships.tags.links
-        await self._internal.session.delete(endpoint=self.relationships.tags.links.self, payload=self.__get_tag_payload(tags))
+        await self._session.delete(endpoint=self.relationships.tags.links.self, payload=tag_payload(tags))
+
 
-    def __get_tag_payload(self, tags: list) -> dict:
-        to_add = []
-        for tag in tags:
-            to_add.append({"type": "tags", "id": tag})
-        return {"data": to_add}
+def tag_payload(tags: Iterable[str]) -> dict:
+    """Returns the request body used to add or remove tags from a transaction."""
+    to_add = []
+    for tag in tags:
+        to_add.append({"type": "tags", "id": tag})
+    return {"data": to_add}
 
 
 class Transactions(Pagination):
@@ -1,8 +1,8 @@
 # Webhook Classes
 from typing import List, Optional
-from pydantic import BaseModel, root_validator
-from asyncupbankapi.const import BASE_URL, PAGE_SIZE, WebhookDeliveryStatus, WebhookEventType
-from asyncupbankapi.models.baseModels import Pagination, RelatedUUIDObject, RelatedUUIDObjectWithoutLinks, TypeandUUID, RelatedLinks, Self
+from pydantic import BaseModel, root_validator, validator
+from asyncupbankapi.const import PAGE_SIZE, WebhookDeliveryStatus, WebhookEventType
+from asyncupbankapi.models.baseModels import Pagination, RelatedUUIDObject, RelatedUUIDObjectWithoutLinks, TypeandUUID, RelatedLinks, Self, parse_timestamp
 from datetime import datetime
 
 
@@ -12,6 +12,10 @@ class WebhookAttributes(BaseModel):
     secretKey: Optional[str] = None
     createdAt: datetime
 
+    @ validator("createdAt", pre=True)
+    def _parse_timestamp(cls, v):
+        return parse_timestamp(v)
+
 
 class WebhookRelationship(BaseModel):
     logs: RelatedLinks
@@ -21,9 +25,14 @@ class WebhookEventAttributes(BaseModel):
     eventType: WebhookEventType
     createdAt: datetime
 
+    @ validator("createdAt", pre=True)
+    def _parse_timestamp(cls, v):
+        return parse_timestamp(v)
+
 
 class WebhookEventRelationships(BaseModel):
     webhook: RelatedUUIDObject
+    transaction: Optional[RelatedUUIDObject] = None
 
 
 class WebhookEvent(TypeandUUID):
@@ -46,6 +55,10 @@ class WebhookLogAttributes(BaseModel):
     deliveryStatus: WebhookDeliveryStatus
     createdAt: datetime
 
+    @ validator("createdAt", pre=True)
+    def _parse_timestamp(cls, v):
+        return parse_timestamp(v)
+
 
 class WebhookLogRelationships(BaseModel):
     webhookEvent: RelatedUUIDObjectWithoutLinks
@@ -80,13 +93,17 @@ class Webhook(TypeandUUID):
     async def delete(self) -> None:
         """Delete the webhook"""
         assert self._session
-        await self._session.delete(f"{BASE_URL}/webhooks/{self.id}")
+        await self._session.delete(f"{self._session.base_url}/webhooks/{self.id}")
 
-    async def logs(self, limit: Optional[int] = None, page_size: Optional[int] = None) -> WebhookLogs:
+    async def logs(
+        self, limit: Optional[int] = None, page_size: Optional[int] = None, prefetch: int = 1, retain: bool = True
+    ) -> WebhookLogs:
         """Returns a list of logs assoicated to this webhook.
 
         :param limit: maximum number of records to return (set to None for all records)
-        :param page_size: number of records to fetch in each request (max 100)"""
+        :param page_size: number of records to fetch in each request (max 100)
+        :param prefetch: number of pages to fetch ahead while iterating
+        :param retain: keep every record in memory, set to False to drop pages once iterated"""
 
         if limit and page_size and limit < page_size:
             page_size = limit
@@ -97,12 +114,18 @@ class Webhook(TypeandUUID):
             params.update({PAGE_SIZE: str(page_size)})
 
         assert self._session
-        return WebhookLogs(data=await self._session.get(self.relationships.logs.links.related), session=self._session, limit=limit)
+        return await WebhookLogs.fetch(
+            self._session,
+            self.relationships.logs.links.related,
+            params,
+            limit=limit,
+            prefetch=prefetch,
+            retain=retain)
 
     async def ping(self) -> WebhookEvent:
         """Pings a webhook by its unique id."""
         assert self._session
-        return WebhookEvent.parse_obj(await self._session.post(f"{BASE_URL}/webhooks/{self.id}/ping"))
+        return WebhookEvent.parse_obj(await self._session.post(f"{self._session.base_url}/webhooks/{self.id}/ping"))
 
 
 class Webhooks(Pagination):
@@ -0,0 +1,153 @@
+import asyncio
+import random
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from time import monotonic
+from typing import Mapping, Optional
+
+RETRY_AFTER = "Retry-After"
+RATE_LIMIT_REMAINING = ("RateLimit-Remaining", "X-RateLimit-Remaining")
+RATE_LIMIT_RESET = ("RateLimit-Reset", "X-RateLimit-Reset")
+EPOCH_THRESHOLD = 1e9
+
+
+class RateLimiter:
+    """Token bucket shared by every coroutine making requests through a HttpSession.
+
+    A single instance can be given to several clients that share the same token so they stay under the same quota.
+    """
+
+    def __init__(
+        self,
+        rate: float = 10.0,
+        burst: int = 10,
+        max_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 60.0,
+    ) -> None:
+        """Token bucket rate limiter.
+
+        :param rate: number of requests allowed per second on average
+        :param burst: maximum number of requests that can be made back to back
+        :param max_retries: number of times a request is retried after a 429 before raising RateLimitExceededException
+        :param backoff_base: initial backoff delay in seconds, doubled on each retry
+        :param backoff_max: maximum backoff delay in seconds
+        """
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be positive and burst must be at least 1")
+
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._tokens = float(burst)
+        self._updated = monotonic()
+        self._blocked_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def tokens(self) -> float:
+        """The number of requests that can currently be made without waiting."""
+        self.__refill(monotonic())
+        return self._tokens
+
+    async def acquire(self) -> None:
+        """Waits until a request can be made, waiters are served in order."""
+        if self._lock is None:
+            # Created lazily so the lock is bound to the running event loop.
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while True:
+                now = monotonic()
+
+                # The API told us to back off, nobody gets through until then.
+                if self._blocked_until > now:
+                    await asyncio.sleep(self._blocked_until - now)
+                    continue
+
+                self.__refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def update(self, headers: Mapping[str, str]) -> None:
+        """Adjusts the bucket from the rate limit headers of a response."""
+        remaining = self.__header(headers, RATE_LIMIT_REMAINING)
+        if remaining is None:
+            return
+
+        try:
+            remaining_requests = int(float(remaining))
+        except ValueError:
+            return
+
+        self.__refill(monotonic())
+        self._tokens = min(self._tokens, float(remaining_requests))
+
+        if remaining_requests <= 0:
+            reset = self.__parse_delay(self.__header(headers, RATE_LIMIT_RESET))
+            if reset is not None:
+                self.block_for(reset)
+
+    def backoff(self, attempt: int, headers: Optional[Mapping[str, str]] = None) -> float:
+        """Returns the delay before retrying and blocks the bucket for that long.
+
+        :param attempt: the number of retries already made for this request
+        :param headers: headers of the rate limited response
+        """
+        delay = None
+        if headers is not None:
+            delay = self.__parse_delay(headers.get(RETRY_AFTER))
+            if delay is None:
+                delay = self.__parse_delay(self.__header(headers, RATE_LIMIT_RESET))
+
+        if delay is None:
+            # Full jitter so clients sharing a token do not retry in lock step.
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+        self.__refill(monotonic())
+        self._tokens = 0.0
+        self.block_for(delay)
+        return delay
+
+    def block_for(self, delay: float) -> None:
+        """Stops any request from being made for the next `delay` seconds."""
+        self._blocked_until = max(self._blocked_until, monotonic() + delay)
+
+    def __refill(self, now: float) -> None:
+        self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    @staticmethod
+    def __header(headers: Mapping[str, str], names: tuple) -> Optional[str]:
+        for name in names:
+            value = headers.get(name)
+            if value is not None:
+                return value
+        return None
+
+    @staticmethod
+    def __parse_delay(value: Optional[str]) -> Optional[float]:
+        """Parses a delay given either in seconds or as a HTTP date."""
+        if value is None:
+            return None
+        try:
+            seconds = float(value)
+            if seconds > EPOCH_THRESHOLD:
+                # Some servers send the reset as a unix timestamp rather than a delta.
+                seconds -= datetime.now(timezone.utc).timestamp()
+            return max(0.0, seconds)
+        except ValueError:
+            pass
+        try:
+            date = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+        return max(0.0, (date - datetime.now(timezone.utc)).total_seconds())
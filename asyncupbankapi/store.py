@@ -0,0 +1,266 @@
+"""Local SQLite store of transactions that can be kept up to date incrementally."""
+from __future__ import annotations
+import json
+import sqlite3
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterable, List, Optional, Set, Union
+
+from asyncupbankapi.const import TransactionStatus
+from asyncupbankapi.models.accounts import Account
+from asyncupbankapi.models.transactions import Transaction
+
+if TYPE_CHECKING:
+    from asyncupbankapi.client import Client
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    id TEXT PRIMARY KEY,
+    display_name TEXT NOT NULL,
+    account_type TEXT NOT NULL,
+    balance INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    json TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS categories (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    parent_id TEXT
+);
+CREATE TABLE IF NOT EXISTS tags (
+    id TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS transactions (
+    id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    description TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    category_id TEXT,
+    parent_category_id TEXT,
+    created_at REAL NOT NULL,
+    settled_at REAL,
+    json TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS transaction_tags (
+    transaction_id TEXT NOT NULL,
+    tag_id TEXT NOT NULL,
+    PRIMARY KEY (transaction_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS transactions_account ON transactions (account_id, created_at);
+CREATE INDEX IF NOT EXISTS transactions_created_at ON transactions (created_at);
+CREATE INDEX IF NOT EXISTS transactions_category ON transactions (category_id, created_at);
+CREATE INDEX IF NOT EXISTS transactions_status ON transactions (status);
+CREATE INDEX IF NOT EXISTS transaction_tags_tag ON transaction_tags (tag_id);
+"""
+
+
+class TransactionStore:
+    """Stores accounts, categories, tags and transactions in a SQLite database so they can be queried without the API."""
+
+    def __init__(self, path: str = ":memory:") -> None:
+        """Opens or creates a store.
+
+        :param path: path of the SQLite database file
+        """
+        self._db = sqlite3.connect(path)
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> TransactionStore:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    async def sync(self, client: Client, page_size: int = 100) -> int:
+        """Fetches everything that changed since the last sync, returns the number of transactions fetched.
+
+        Transactions are fetched from the oldest transaction that is still held, or the newest transaction when none are held,
+        so held transactions are updated once they settle. Held transactions that are no longer returned, such as a reversed
+        or expired authorisation, are removed.
+
+        :param client: client used to fetch records
+        :param page_size: number of records to fetch in each request (max 100)
+        """
+        self.upsert_accounts([account async for account in await client.accounts(page_size=page_size, raw=True)])
+
+        categories = await client.categories()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO categories (id, name, parent_id) VALUES (?, ?, ?)",
+                [(category.id, category.attributes.name,
+                  category.relationships.parent.data.id if category.relationships.parent.data else None)
+                 for category in categories.data])
+
+        tags = [tag.id async for tag in await client.tags()]
+        with self._db:
+            self._db.executemany("INSERT OR IGNORE INTO tags (id) VALUES (?)", [(tag,) for tag in tags])
+
+        fetched = 0
+        seen: Set[str] = set()
+        page: List[dict] = []
+        since = self.sync_from()
+        pager = await client.transactions(since=since, page_size=page_size, retain=False, raw=True)
+        async for transaction in pager:
+            page.append(transaction)
+            seen.add(transaction["id"])
+            if len(page) >= page_size:
+                fetched += self.upsert_transactions(page)
+                page = []
+        fetched += self.upsert_transactions(page)
+        if since is not None:
+            self.__remove_missing_held(since, seen)
+        return fetched
+
+    def sync_from(self) -> Optional[datetime]:
+        """Returns where the next sync starts from, None when the store is empty."""
+        held = self._db.execute(
+            "SELECT MIN(created_at) FROM transactions WHERE status = ?", (TransactionStatus.HELD.value,)).fetchone()[0]
+        if held is not None:
+            return datetime.fromtimestamp(held).astimezone()
+        newest = self._db.execute("SELECT MAX(created_at) FROM transactions").fetchone()[0]
+        if newest is not None:
+            return datetime.fromtimestamp(newest).astimezone()
+        return None
+
+    def __remove_missing_held(self, since: datetime, seen: Set[str]) -> None:
+        # Every transaction from `since` was fetched, a hold that was not is gone and would otherwise pin `sync_from`.
+        held = self._db.execute(
+            "SELECT id FROM transactions WHERE status = ? AND created_at >= ?",
+            (TransactionStatus.HELD.value, since.timestamp())).fetchall()
+        missing = [row for row in held if row[0] not in seen]
+        with self._db:
+            self._db.executemany("DELETE FROM transactions WHERE id = ?", missing)
+            self._db.executemany("DELETE FROM transaction_tags WHERE transaction_id = ?", missing)
+
+    def upsert_accounts(self, accounts: Iterable[dict]) -> None:
+        """Inserts or updates accounts given as returned by the API."""
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO accounts (id, display_name, account_type, balance, currency, json) VALUES (?, ?, ?, ?, ?, ?)",
+                [(account["id"],
+                  account["attributes"]["displayName"],
+                  account["attributes"]["accountType"],
+                  account["attributes"]["balance"]["valueInBaseUnits"],
+                  account["attributes"]["balance"]["currencyCode"],
+                  json.dumps(account))
+                 for account in accounts])
+
+    def upsert_transactions(self, transactions: Iterable[dict]) -> int:
+        """Inserts or updates transactions given as returned by the API, returns the number of transactions.
+
+        A held transaction keeps its id once it settles so it is replaced by its settled version."""
+        rows = []
+        tags = []
+        for transaction in transactions:
+            attributes = transaction["attributes"]
+            relationships = transaction["relationships"]
+            category = relationships["category"].get("data")
+            parent_category = relationships["parentCategory"].get("data")
+            rows.append((
+                transaction["id"],
+                relationships["account"]["data"]["id"],
+                attributes["status"],
+                attributes["description"],
+                attributes["amount"]["valueInBaseUnits"],
+                attributes["amount"]["currencyCode"],
+                category["id"] if category else None,
+                parent_category["id"] if parent_category else None,
+                _timestamp(attributes["createdAt"]),
+                _timestamp(attributes["settledAt"]),
+                json.dumps(transaction)))
+            tags.extend((transaction["id"], tag["id"]) for tag in relationships["tags"]["data"])
+
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO transactions (id, account_id, status, description, amount, currency, category_id, "
+                "parent_category_id, created_at, settled_at, json) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows)
+            self._db.executemany("DELETE FROM transaction_tags WHERE transaction_id = ?", [(row[0],) for row in rows])
+            self._db.executemany("INSERT OR IGNORE INTO transaction_tags (transaction_id, tag_id) VALUES (?, ?)", tags)
+            self._db.executemany("INSERT OR IGNORE INTO tags (id) VALUES (?)", [(tag,) for _, tag in tags])
+        return len(rows)
+
+    def accounts(self) -> List[Account]:
+        """Returns the stored accounts."""
+        return [Account.parse_raw(row[0]) for row in self._db.execute("SELECT json FROM accounts ORDER BY display_name")]
+
+    def categories(self, parent: Optional[str] = None) -> List[tuple]:
+        """Returns the stored categories as (id, name, parent id) tuples.
+
+        :param parent: only return the children of this category
+        """
+        if parent:
+            return self._db.execute(
+                "SELECT id, name, parent_id FROM categories WHERE parent_id = ? ORDER BY id", (parent,)).fetchall()
+        return self._db.execute("SELECT id, name, parent_id FROM categories ORDER BY id").fetchall()
+
+    def tags(self) -> List[str]:
+        """Returns the stored tags."""
+        return [row[0] for row in self._db.execute("SELECT id FROM tags ORDER BY id")]
+
+    def transactions(
+        self,
+        account_id: Optional[str] = None,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        limit: Optional[int] = None,
+        raw: bool = False,
+    ) -> List[Union[Transaction, dict]]:
+        """Returns stored transactions newest first, the filters match those of `Client.transactions`.
+
+        :param account_id: only return transactions of this account
+        :param status:
+        :param since:
+        :param until:
+        :param category: only return transactions in this category or its children
+        :param tag:
+        :param limit: maximum number of records to return (set to None for all transactions)
+        :param raw: return each record as the dictionary returned by the API, skipping model validation
+        """
+        query = "SELECT json FROM transactions"
+        conditions = []
+        params: list = []
+
+        if account_id:
+            conditions.append("account_id = ?")
+            params.append(str(account_id))
+        if status:
+            conditions.append("status = ?")
+            params.append(status)
+        if since:
+            conditions.append("created_at >= ?")
+            params.append(since.astimezone().timestamp())
+        if until:
+            conditions.append("created_at <= ?")
+            params.append(until.astimezone().timestamp())
+        if category:
+            conditions.append("(category_id = ? OR parent_category_id = ?)")
+            params.extend((category, category))
+        if tag:
+            conditions.append("id IN (SELECT transaction_id FROM transaction_tags WHERE tag_id = ?)")
+            params.append(tag)
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY created_at DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        rows = self._db.execute(query, params)
+        if raw:
+            return [json.loads(row[0]) for row in rows]
+        return [Transaction.parse_raw(row[0]) for row in rows]
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    return datetime.fromisoformat(value).timestamp()
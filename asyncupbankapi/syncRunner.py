@@ -0,0 +1,280 @@
+"""Syncs the accounts and transactions of many tokens across a pool of processes.
+
+Parsing and validating records costs far more CPU than making the requests, so a single process runs out of CPU long before
+the network is busy. The tokens are split into one shard per process, each process runs its own event loop and
+ClientPool and streams the records back as compact transactions along with its progress.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import sys
+from datetime import datetime
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+
+from asyncupbankapi.compact import CompactTransaction, CompactTransactions
+from asyncupbankapi.const import BASE_URL
+
+
+class SyncBatch(NamedTuple):
+    """Records of one token fetched by a worker."""
+    shard: int
+    key: str
+    accounts: List[dict]
+    transactions: List[CompactTransaction]
+
+
+class TokenDone(NamedTuple):
+    """A token has been synced, `error` describes why when it failed."""
+    shard: int
+    key: str
+    accounts: int
+    transactions: int
+    elapsed: float
+    error: Optional[str] = None
+
+
+class ShardProgress(NamedTuple):
+    """Progress of a worker, sent after every batch and once more when `finished`."""
+    shard: int
+    tokens: int
+    tokens_done: int
+    accounts: int
+    transactions: int
+    elapsed: float
+    finished: bool = False
+
+    @property
+    def transactions_per_sec(self) -> float:
+        return self.transactions / self.elapsed if self.elapsed else 0.0
+
+
+SyncEvent = Union[SyncBatch, TokenDone, ShardProgress]
+
+
+class SyncResult(NamedTuple):
+    """Everything fetched by a SyncRunner, by token key."""
+    accounts: Dict[str, List[dict]]
+    transactions: Dict[str, CompactTransactions]
+    errors: Dict[str, str]
+    shards: Dict[int, ShardProgress]
+    elapsed: float
+
+    @property
+    def transactions_per_sec(self) -> float:
+        total = sum(len(transactions) for transactions in self.transactions.values())
+        return total / self.elapsed if self.elapsed else 0.0
+
+
+class _Options(NamedTuple):
+    base_url: str
+    concurrency: int
+    page_size: int
+    batch_size: int
+    since: Optional[datetime]
+    validate: bool
+    rate: Optional[float]
+
+
+class SyncRunner:
+    """Syncs many tokens with one worker process per shard of tokens."""
+
+    def __init__(
+        self,
+        tokens: Mapping[str, str],
+        processes: Optional[int] = None,
+        concurrency: int = 10,
+        page_size: int = 100,
+        batch_size: int = 500,
+        since: Optional[datetime] = None,
+        validate: bool = False,
+        rate: Optional[float] = None,
+        base_url: str = BASE_URL,
+        queue_size: int = 64,
+    ) -> None:
+        """Sync runner.
+
+        :param tokens: personal access tokens by key, such as a customer id, keys are used in every event and result
+        :param processes: number of worker processes, defaults to the number of CPUs
+        :param concurrency: number of tokens each worker syncs at once
+        :param page_size: number of records to fetch in each request (max 100)
+        :param batch_size: number of transactions sent back from a worker at once
+        :param since: only fetch transactions created from this time
+        :param validate: validate transactions with the pydantic models before making them compact
+        :param rate: requests per second allowed for each token, unlimited by default
+        :param base_url: url of the API, for example a local mock server
+        :param queue_size: number of batches that can wait for the consumer before the workers pause
+        """
+        self.tokens = dict(tokens)
+        self.processes = max(1, min(processes if processes else os.cpu_count() or 1, len(self.tokens)))
+        self.queue_size = queue_size
+        self._options = _Options(base_url, concurrency, page_size, batch_size, since, validate, rate)
+
+    def shards(self) -> List[List[Tuple[str, str]]]:
+        """Returns the (key, token) pairs of each worker, dealt out in turn so shards differ by at most one token."""
+        items = list(self.tokens.items())
+        return [items[shard::self.processes] for shard in range(self.processes)]
+
+    def run(self) -> Iterator[SyncEvent]:
+        """Starts the workers and yields their batches, finished tokens and progress as they arrive.
+
+        The workers are stopped when the iterator is closed, for example by breaking out of a loop over it.
+        """
+        if not self.tokens:
+            return
+
+        context = multiprocessing.get_context("spawn")
+        events = context.Queue(maxsize=self.queue_size)
+        workers = [
+            context.Process(target=_worker, args=(shard, tokens, self._options, events), daemon=True)
+            for shard, tokens in enumerate(self.shards())]
+        for worker in workers:
+            worker.start()
+
+        running = set(range(len(workers)))
+        try:
+            while running:
+                try:
+                    event = events.get(timeout=0.1)
+                except queue.Empty:
+                    # A worker flushes its events before exiting, one that exited with nothing left to read has failed.
+                    for shard in running:
+                        if not workers[shard].is_alive() and events.empty():
+                            raise RuntimeError(f"sync worker {shard} exited with code {workers[shard].exitcode}")
+                    continue
+                if isinstance(event, ShardProgress) and event.finished:
+                    running.discard(event.shard)
+                yield event
+        finally:
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+
+    def collect(self, on_event: Optional[Callable[[SyncEvent], Any]] = None) -> SyncResult:
+        """Runs the sync and returns everything fetched.
+
+        :param on_event: called with every event, for example to report progress
+        """
+        start = perf_counter()
+        accounts: Dict[str, List[dict]] = {key: [] for key in self.tokens}
+        transactions = {key: CompactTransactions() for key in self.tokens}
+        errors: Dict[str, str] = {}
+        shards: Dict[int, ShardProgress] = {}
+        for event in self.run():
+            if isinstance(event, SyncBatch):
+                accounts[event.key].extend(event.accounts)
+                transactions[event.key].extend(event.transactions)
+            elif isinstance(event, TokenDone):
+                if event.error is not None:
+                    errors[event.key] = event.error
+            else:
+                shards[event.shard] = event
+            if on_event is not None:
+                on_event(event)
+        return SyncResult(accounts, transactions, errors, shards, perf_counter() - start)
+
+
+def _worker(shard: int, tokens: List[Tuple[str, str]], options: _Options, events: Any) -> None:
+    asyncio.run(_sync_shard(shard, tokens, options, events))
+
+
+async def _sync_shard(shard: int, tokens: List[Tuple[str, str]], options: _Options, events: Any) -> None:
+    from asyncupbankapi.clientPool import ClientPool
+    from asyncupbankapi.rateLimiter import RateLimiter
+
+    start = perf_counter()
+    totals = {"tokens_done": 0, "accounts": 0, "transactions": 0}
+    loop = asyncio.get_event_loop()
+
+    def progress(finished: bool = False) -> ShardProgress:
+        return ShardProgress(shard, len(tokens), elapsed=perf_counter() - start, finished=finished, **totals)
+
+    async def put(event: SyncEvent) -> None:
+        # Putting blocks while the consumer is behind, in a thread it only pauses the token sending the event.
+        await loop.run_in_executor(None, events.put, event)
+
+    async def sync(key: str, client) -> None:
+        token_start = perf_counter()
+        accounts = transactions = 0
+        try:
+            records = [account async for account in await client.accounts(page_size=options.page_size, raw=True)]
+            accounts = len(records)
+            totals["accounts"] += accounts
+            await put(SyncBatch(shard, key, records, []))
+
+            batch: List[CompactTransaction] = []
+            pager = await client.transactions(
+                since=options.since, page_size=options.page_size, retain=False, raw=not options.validate)
+            async for transaction in pager:
+                batch.append(
+                    CompactTransaction.from_model(transaction) if options.validate else
+                    CompactTransaction.from_dict(transaction))
+                if len(batch) >= options.batch_size:
+                    transactions += len(batch)
+                    totals["transactions"] += len(batch)
+                    await put(SyncBatch(shard, key, [], batch))
+                    await put(progress())
+                    batch = []
+            if batch:
+                transactions += len(batch)
+                totals["transactions"] += len(batch)
+                await put(SyncBatch(shard, key, [], batch))
+            error = None
+        except Exception as e:
+            # Exceptions are described rather than sent as not all of them can be pickled.
+            error = f"{type(e).__name__}: {e}"
+        totals["tokens_done"] += 1
+        await put(TokenDone(shard, key, accounts, transactions, perf_counter() - token_start, error))
+        await put(progress())
+
+    rate_limiter = (lambda: RateLimiter(rate=options.rate, burst=max(1, int(options.rate)))) if options.rate else None
+    async with ClientPool(concurrency=options.concurrency, rate_limiter=rate_limiter, base_url=options.base_url) as pool:
+        for key, token in tokens:
+            try:
+                pool.add(key, token)
+            except Exception as e:
+                totals["tokens_done"] += 1
+                await put(TokenDone(shard, key, 0, 0, 0.0, f"{type(e).__name__}: {e}"))
+        await pool.run([(key, lambda client, key=key: sync(key, client)) for key, _ in tokens if key in pool])
+    await put(progress(finished=True))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tokens", help='file with a "key token" pair on each line')
+    parser.add_argument("--processes", type=int, default=None, help="defaults to the number of CPUs")
+    parser.add_argument("--concurrency", type=int, default=10, help="tokens synced at once by each process")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None, help="ISO 8601 time to sync from")
+    parser.add_argument("--validate", action="store_true", help="validate transactions with the models")
+    parser.add_argument("--rate", type=float, default=None, help="requests per second allowed for each token")
+    parser.add_argument("--base-url", default=BASE_URL)
+    args = parser.parse_args()
+
+    with open(args.tokens) as f:
+        tokens = dict(line.split(None, 1) for line in f.read().splitlines() if line.strip())
+    tokens = {key: token.strip() for key, token in tokens.items()}
+
+    def report(event: SyncEvent) -> None:
+        if isinstance(event, TokenDone) and event.error is not None:
+            print(f"{event.key}: {event.error}", file=sys.stderr)
+        elif isinstance(event, ShardProgress) and event.finished:
+            print(f"shard {event.shard}: {event.tokens_done}/{event.tokens} tokens, {event.accounts:,} accounts, "
+                  f"{event.transactions:,} transactions, {event.transactions_per_sec:,.0f} transactions/sec")
+
+    runner = SyncRunner(
+        tokens, args.processes, args.concurrency, args.page_size, since=args.since, validate=args.validate,
+        rate=args.rate, base_url=args.base_url)
+    result = runner.collect(report)
+    total = sum(len(transactions) for transactions in result.transactions.values())
+    print(f"{len(tokens) - len(result.errors)}/{len(tokens)} tokens synced by {runner.processes} processes, {total:,} "
+          f"transactions in {result.elapsed:.1f}s ({result.transactions_per_sec:,.0f}/sec)")
+    if result.errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""Receives webhook events from Up, verifying, de-duplicating and queueing them for a pool of workers."""
+from __future__ import annotations
+import asyncio
+import hashlib
+import hmac
+import logging
+from collections import OrderedDict
+from time import monotonic
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Union
+
+from pydantic import ValidationError
+
+from asyncupbankapi.codec import JsonCodec, get_codec
+from asyncupbankapi.models.webhooks import WebhookEvent
+
+SIGNATURE_HEADER = "X-Up-Authenticity-Signature"
+
+_LOGGER = logging.getLogger(__name__)
+
+if TYPE_CHECKING:
+    from aiohttp import web
+
+EventHandler = Callable[[List[WebhookEvent]], Awaitable[None]]
+
+
+def verify_signature(secret_key: Union[str, bytes], body: bytes, signature: Optional[str]) -> bool:
+    """Checks that a request was sent by Up, compared in constant time.
+
+    :param secret_key: the secret key returned when the webhook was created
+    :param body: the raw request body
+    :param signature: the value of the X-Up-Authenticity-Signature header
+    """
+    if not signature:
+        return False
+    if isinstance(secret_key, str):
+        secret_key = secret_key.encode()
+    expected = hmac.new(secret_key, body, hashlib.sha256).hexdigest()
+    # Compared as bytes as compare_digest raises on non-ASCII strings, headers are decoded as latin-1.
+    return hmac.compare_digest(expected.encode(), signature.encode("latin-1", "replace"))
+
+
+class WebhookReceiver:
+    """Verifies and parses webhook deliveries and hands them to `handler` in batches from a pool of workers.
+
+    Deliveries are acknowledged as soon as they are queued. When the queue is full the delivery is rejected with a 503 so
+    Up delivers it again later, and events delivered more than once within `dedup_window` are only handled once.
+
+    The receiver is an ASGI application, `aiohttp_app()` returns the same receiver as an aiohttp application.
+    """
+
+    def __init__(
+        self,
+        secret_key: Union[str, bytes],
+        handler: EventHandler,
+        workers: int = 4,
+        queue_size: int = 1000,
+        batch_size: int = 1,
+        batch_timeout: float = 0.05,
+        dedup_window: float = 3600,
+        dedup_size: int = 100_000,
+        max_body_size: int = 64 * 1024,
+        codec: Optional[JsonCodec] = None,
+    ) -> None:
+        """Webhook receiver.
+
+        :param secret_key: the secret key returned when the webhook was created
+        :param handler: coroutine called with a list of events
+        :param workers: number of handlers running at the same time
+        :param queue_size: maximum number of events waiting to be handled
+        :param batch_size: maximum number of events passed to the handler at once
+        :param batch_timeout: seconds a worker waits to fill a batch before handling a partial one
+        :param dedup_window: seconds an event id is remembered for
+        :param dedup_size: maximum number of event ids remembered
+        :param max_body_size: largest request body in bytes that is read, larger deliveries are answered with a 413
+        :param codec: JSON codec used to decode deliveries, defaults to the fastest installed
+        """
+        self._secret_key = secret_key
+        self._handler = handler
+        self._workers = max(1, workers)
+        self._queue_size = queue_size
+        self._batch_size = max(1, batch_size)
+        self._batch_timeout = batch_timeout
+        self._dedup_window = dedup_window
+        self._dedup_size = dedup_size
+        self._max_body_size = max_body_size
+        self._codec = codec if codec is not None else get_codec()
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopped = False
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+
+        self.received = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.dropped = 0
+        self.handled = 0
+        self.failed = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "dropped": self.dropped,
+            "handled": self.handled,
+            "failed": self.failed,
+            "queued": self._queue.qsize() if self._queue else 0}
+
+    async def start(self) -> None:
+        """Starts the workers, called automatically by the ASGI and aiohttp applications."""
+        self._stopped = False
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self._queue_size)
+        self._tasks = [asyncio.ensure_future(self.__work()) for _ in range(self._workers)]
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stops the workers.
+
+        :param drain: handle the events that are already queued before stopping
+        """
+        # Deliveries from now on are refused so Up retries them, nothing would be left to handle them.
+        self._stopped = True
+        if not self._tasks:
+            return
+        if drain and self._queue:
+            await self._queue.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def __aenter__(self) -> WebhookReceiver:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+    async def receive(self, body: bytes, signature: Optional[str]) -> int:
+        """Verifies, parses and queues a delivery, returns the HTTP status code to respond with.
+
+        :param body: the raw request body
+        :param signature: the value of the X-Up-Authenticity-Signature header
+        """
+        self.received += 1
+
+        if not verify_signature(self._secret_key, body, signature):
+            self.rejected += 1
+            return 401
+
+        try:
+            event = WebhookEvent.parse_obj(self._codec.loads(body))
+        except (ValidationError, ValueError):
+            self.rejected += 1
+            return 400
+
+        event_id = str(event.id)
+        if self.__is_duplicate(event_id):
+            self.duplicates += 1
+            return 200
+
+        if self._stopped:
+            self.dropped += 1
+            return 503
+        if self._queue is None:
+            await self.start()
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Not remembered as seen so the delivery is accepted when Up retries it.
+            self.dropped += 1
+            return 503
+
+        # Remembered while queued so a delivery retried in the meantime is not handled twice, forgotten if handling fails.
+        self.__remember(event_id)
+        return 200
+
+    def __is_duplicate(self, event_id: str) -> bool:
+        now = monotonic()
+        while self._seen:
+            oldest, seen_at = next(iter(self._seen.items()))
+            if now - seen_at <= self._dedup_window:
+                break
+            del self._seen[oldest]
+        return event_id in self._seen
+
+    def __remember(self, event_id: str) -> None:
+        self._seen[event_id] = monotonic()
+        while len(self._seen) > self._dedup_size:
+            self._seen.popitem(last=False)
+
+    async def __work(self) -> None:
+        assert self._queue
+        loop = asyncio.get_event_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._batch_timeout
+            while len(batch) < self._batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._handler(batch)
+                self.handled += len(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failed += len(batch)
+                _LOGGER.exception("Webhook handler failed for %d events", len(batch))
+                # Accept the events again when they are delivered again.
+                for event in batch:
+                    self._seen.pop(str(event.id), None)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def __too_large(self) -> int:
+        # Rejected before the body is read in full, whoever sent it the signature can't be checked.
+        self.received += 1
+        self.rejected += 1
+        return 413
+
+    # ASGI
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await self.start()
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await self.stop()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        if scope["type"] != "http":
+            return
+
+        if scope["method"] != "POST":
+            status = 405
+        else:
+            chunks: List[bytes] = []
+            size = 0
+            more_body = True
+            while more_body and size <= self._max_body_size:
+                message = await receive()
+                chunk = message.get("body", b"")
+                chunks.append(chunk)
+                size += len(chunk)
+                more_body = message.get("more_body", False)
+
+            if size > self._max_body_size:
+                status = self.__too_large()
+            else:
+                signature = None
+                for name, value in scope["headers"]:
+                    if name.decode("latin-1").lower() == SIGNATURE_HEADER.lower():
+                        signature = value.decode("latin-1")
+                status = await self.receive(b"".join(chunks), signature)
+
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-length", b"0")]})
+        await send({"type": "http.response.body", "body": b""})
+
+    # aiohttp
+
+    def aiohttp_app(self, path: str = "/") -> web.Application:
+        """Returns an aiohttp application receiving deliveries at `path`."""
+        # Imported here as the ASGI application does not need aiohttp.
+        from aiohttp import web
+
+        async def handle(request: web.Request) -> web.Response:
+            try:
+                body = await request.read()
+            except web.HTTPRequestEntityTooLarge:
+                return web.Response(status=self.__too_large())
+            return web.Response(status=await self.receive(body, request.headers.get(SIGNATURE_HEADER)))
+
+        async def on_startup(_: web.Application) -> None:
+            await self.start()
+
+        async def on_cleanup(_: web.Application) -> None:
+            await self.stop()
+
+        app = web.Application(client_max_size=self._max_body_size)
+        app.router.add_post(path, handle)
+        app.on_startup.append(on_startup)
+        app.on_cleanup.append(on_cleanup)
+        return app
@@ -0,0 +1 @@
+"""Benchmarks for asyncupbankapi, run each module with `python -m benchmarks.<module>` from the repository root."""
@@ -0,0 +1,45 @@
+"""Compares the number of transactions decoded per second from page bodies by each installed JSON codec."""
+import argparse
+import json
+from time import perf_counter
+
+from asyncupbankapi.codec import CODECS, get_codec
+from benchmarks import payloads
+
+
+def run(items: int, page_size: int, repeat: int) -> dict:
+    records = payloads.transactions(items)
+    bodies = [json.dumps(payloads.page(records[i:i + page_size])).encode() for i in range(0, items, page_size)]
+
+    results = {}
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            continue
+        best = None
+        for _ in range(repeat):
+            start = perf_counter()
+            for body in bodies:
+                codec.loads(body)
+            elapsed = perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = items / best
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.items, args.page_size, args.repeat)
+    for name, rate in results.items():
+        print(f"{name:>6}: {rate:>12,.0f} items/sec")
+    print(f"default: {get_codec().name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measures the per item cost of parsing timestamps, amounts and the models containing them.
+
+Each field is parsed both with its fast path and with pydantic's generic validation, which the models used before.
+"""
+import argparse
+import random
+from timeit import Timer
+from typing import Callable, Dict, Tuple
+
+from pydantic.datetime_parse import parse_datetime
+
+from asyncupbankapi.models.accounts import Account
+from asyncupbankapi.models.baseModels import Money, parse_timestamp
+from asyncupbankapi.models.transactions import Transaction
+from asyncupbankapi.models.webhooks import WebhookEvent
+from benchmarks import payloads
+
+
+def _cases() -> Dict[str, Tuple[Callable, Callable]]:
+    rng = random.Random(0)
+    transaction = payloads.transactions(1)[0]
+    account = payloads.account(rng)
+    timestamp = transaction["attributes"]["createdAt"]
+    amount = transaction["attributes"]["amount"]
+    event = {
+        "type": "webhook-events",
+        "id": payloads.uuid(rng),
+        "attributes": {"eventType": "TRANSACTION_CREATED", "createdAt": timestamp},
+        "relationships": {
+            "webhook": {"data": {"type": "webhooks", "id": payloads.uuid(rng)}},
+            "transaction": {"data": {"type": "transactions", "id": transaction["id"]}}}}
+
+    # Each case is (fast, generic), models have no generic counterpart left so only their current cost is measured.
+    return {
+        "timestamp": (lambda: parse_timestamp(timestamp), lambda: parse_datetime(timestamp)),
+        "money": (lambda: Money.validate(amount), lambda: Money(**amount)),
+        "transaction": (lambda: Transaction.parse_obj(transaction), None),
+        "account": (lambda: Account.parse_obj(account), None),
+        "webhook event": (lambda: WebhookEvent.parse_obj(event), None),
+    }
+
+
+def _per_item(function: Callable, number: int, repeat: int) -> float:
+    return min(Timer(function).repeat(repeat, number)) / number * 1e6
+
+
+def run(number: int = 20_000, repeat: int = 5) -> Dict[str, dict]:
+    """Returns the best time per item in microseconds of each case."""
+    results = {}
+    for name, (fast, generic) in _cases().items():
+        results[name] = {"fast_us": _per_item(fast, number, repeat)}
+        if generic is not None:
+            results[name]["generic_us"] = _per_item(generic, number, repeat)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20_000, help="items parsed per measurement")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'':>14}{'fast us':>10}{'generic us':>12}{'speedup':>10}")
+    for name, result in run(args.number, args.repeat).items():
+        generic = result.get("generic_us")
+        speedup = f"{generic / result['fast_us']:.1f}x" if generic else ""
+        print(f"{name:>14}{result['fast_us']:>10.2f}{(f'{generic:.2f}' if generic else ''):>12}{speedup:>10}")
+
+
+if __name__ == "__main__":
+    main()
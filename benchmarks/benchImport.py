@@ -0,0 +1,91 @@
+"""Measures the import time of common entry points with `python -X importtime` and checks them against a budget.
+
+Each scenario runs in a fresh interpreter, modules imported by the interpreter itself at startup are excluded and the
+median of several runs is reported. Exits with status 1 when a scenario is over its budget so it can gate CI.
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Optional, Set
+
+
+class Scenario(NamedTuple):
+    statement: str
+    # Milliseconds, generous enough for a slow CI machine while still catching eager imports creeping back in.
+    budget: float
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "package": Scenario("import asyncupbankapi", 50),
+    "ping": Scenario("from asyncupbankapi import Client; from asyncupbankapi.models import Ping", 400),
+    "webhook": Scenario("from asyncupbankapi.webhookReceiver import WebhookReceiver", 250),
+    "client": Scenario("from asyncupbankapi import Client", 400),
+    "everything": Scenario(
+        "from asyncupbankapi import *; import asyncupbankapi.models as m; [getattr(m, name) for name in m.__all__]", 600),
+}
+
+
+def parse_importtime(output: str, exclude: Optional[Set[str]] = None) -> Dict[str, float]:
+    """Returns the cumulative import time in milliseconds of each top level import in `-X importtime` output.
+
+    :param output: the standard error of the interpreter
+    :param exclude: modules to leave out, such as those imported at interpreter startup
+    """
+    times: Dict[str, float] = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith(" ") and not name.startswith("  "):
+            module = name.strip()
+            if cumulative.strip().isdigit() and (not exclude or module not in exclude):
+                times[module] = times.get(module, 0.0) + int(cumulative) / 1000
+    return times
+
+
+def _importtime(statement: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True, check=True)
+    return result.stderr
+
+
+def measure(statement: str, runs: int = 5) -> Dict[str, float]:
+    """Returns the median total import time and the median time of the slowest top level imports, in milliseconds."""
+    startup = set(parse_importtime(_importtime("pass")))
+    samples: List[Dict[str, float]] = [parse_importtime(_importtime(statement), startup) for _ in range(runs)]
+    totals = [sum(sample.values()) for sample in samples]
+    modules = {module for sample in samples for module in sample}
+    result = {module: statistics.median(sample.get(module, 0.0) for sample in samples) for module in modules}
+    result["total"] = statistics.median(totals)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--budget-scale", type=float, default=1.0, help="multiply every budget, e.g. for slow machines")
+    parser.add_argument("--top", type=int, default=3, help="number of slowest top level imports shown")
+    args = parser.parse_args()
+
+    over = []
+    for name in args.scenarios:
+        scenario = SCENARIOS[name]
+        result = measure(scenario.statement, args.runs)
+        total = result.pop("total")
+        budget = scenario.budget * args.budget_scale
+        slowest = sorted(result.items(), key=lambda item: -item[1])[:args.top]
+        status = "ok" if total <= budget else "OVER BUDGET"
+        print(f"{name:>10}: {total:8.1f} ms (budget {budget:.0f} ms) {status}")
+        print(" " * 12 + ", ".join(f"{module} {ms:.1f} ms" for module, ms in slowest))
+        if total > budget:
+            over.append(name)
+
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compares the memory retained by a million transactions kept as models, raw dictionaries, compact records and columns.
+
+Records are decoded from JSON chunk by chunk, as they arrive from the API, and converted before the next chunk so only
+the retained representation is measured. Models and raw dictionaries take several gigabytes at a million transactions so
+by default they are measured on a sample and extrapolated, marked with *. Tracing every allocation is slow, a million
+compact records take a few minutes.
+"""
+import argparse
+import gc
+import tracemalloc
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
+
+from asyncupbankapi.codec import get_codec
+from asyncupbankapi.columnar import TransactionColumns
+from asyncupbankapi.compact import CompactTransactions
+from asyncupbankapi.models.transactions import Transaction
+from benchmarks import payloads
+
+CHUNK = 10_000
+
+
+def _models(records: List[dict], into: list) -> None:
+    into.extend(Transaction.parse_obj(record) for record in records)
+
+
+def _raw(records: List[dict], into: list) -> None:
+    into.extend(records)
+
+
+def _compact(records: List[dict], into: CompactTransactions) -> None:
+    into.extend(records)
+
+
+def _columns(records: List[dict], into: TransactionColumns) -> None:
+    into.extend(records)
+
+
+REPRESENTATIONS: Dict[str, tuple] = {
+    "models": (list, _models),
+    "raw": (list, _raw),
+    "compact": (CompactTransactions, _compact),
+    "columns": (TransactionColumns, _columns),
+}
+
+
+def measure(chunk: bytes, count: int, create: Callable, add: Callable, memory: bool = True) -> dict:
+    """Returns the bytes retained per transaction, or the time spent converting them as tracing allocations slows
+    conversion down.
+
+    :param chunk: a JSON encoded list of transactions, decoded again for every chunk so no objects are shared
+    :param count: number of transactions to keep
+    """
+    loads = get_codec().loads
+    gc.collect()
+    if memory:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+    kept = create()
+    elapsed = 0.0
+    remaining = count
+    while remaining > 0:
+        records = loads(chunk)[:remaining]
+        start = perf_counter()
+        add(records, kept)
+        elapsed += perf_counter() - start
+        remaining -= len(records)
+        del records
+    if not memory:
+        return {"convert_us_per_item": elapsed / count * 1e6}
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del kept
+    return {"bytes_per_item": retained / count}
+
+
+def run(count: int = 1_000_000, sample: int = 50_000, names: Optional[List[str]] = None) -> Dict[str, dict]:
+    """Measures each representation, models and raw dictionaries only on `sample` transactions.
+
+    Conversion is timed on `sample` transactions of every representation.
+    """
+    chunk = get_codec().dumps(payloads.transactions(CHUNK))
+    chunk = chunk if isinstance(chunk, bytes) else chunk.encode()
+    results = {}
+    for name in names if names else list(REPRESENTATIONS):
+        measured = min(count, sample) if name in ("models", "raw") else count
+        result = measure(chunk, measured, *REPRESENTATIONS[name])
+        result.update(measure(chunk, min(count, sample), *REPRESENTATIONS[name], memory=False))
+        result.update({
+            "measured": measured,
+            "total_mib": result["bytes_per_item"] * count / 2 ** 20,
+            "extrapolated": measured < count})
+        results[name] = result
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--sample", type=int, default=50_000, help="transactions measured for models and raw")
+    parser.add_argument("--representations", nargs="+", choices=list(REPRESENTATIONS), default=list(REPRESENTATIONS))
+    args = parser.parse_args()
+
+    results = run(args.count, args.sample, args.representations)
+    print(f"{'':>8}{'bytes/item':>12}{'MiB total':>12}{'convert us':>12}")
+    for name, result in results.items():
+        total = f"{result['total_mib']:,.0f}" + ("*" if result["extrapolated"] else "")
+        print(f"{name:>8}{result['bytes_per_item']:>12,.0f}{total:>12}{result['convert_us_per_item']:>12,.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Measures how long the event loop stalls while a backfill parses pages on it, in a thread pool or in a process pool.
+
+A ticker task records how late each of its wake-ups is, the longest delays are the time other tasks on the loop, such as a
+web server, wait behind page parsing. CPU is that of the benchmark's own process, so it includes the thread pool but not the
+process pool, whose workers only hand back validated records to unpickle.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from time import perf_counter, process_time
+from typing import Dict, List, Optional
+
+from asyncupbankapi import Client
+from benchmarks.benchPagination import percentile
+from benchmarks.mockServer import MockServerProcess
+
+TICK = 0.001
+
+
+def _executor(mode: str, workers: int) -> Optional[Executor]:
+    if mode == "thread":
+        return ThreadPoolExecutor(workers)
+    if mode == "process":
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+    return None
+
+
+async def _ticker(delays: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = perf_counter()
+        await asyncio.sleep(TICK)
+        delays.append(perf_counter() - start - TICK)
+
+
+async def measure(base_url: str, mode: str, workers: int, page_size: int, raw: bool) -> dict:
+    executor = _executor(mode, workers)
+    client = Client("BENCHMARK", base_url=base_url, coalesce=False, executor=executor)
+    try:
+        # Start the workers and open a connection before measuring.
+        await client.transactions(page_size=page_size, limit=page_size, raw=raw)
+
+        delays: List[float] = []
+        stop = asyncio.Event()
+        ticker = asyncio.ensure_future(_ticker(delays, stop))
+        items = 0
+        start, cpu = perf_counter(), process_time()
+        async for _ in await client.transactions(page_size=page_size, retain=False, prefetch=2, raw=raw):
+            items += 1
+        elapsed, cpu = perf_counter() - start, process_time() - cpu
+        stop.set()
+        await ticker
+    finally:
+        await client.close()
+        if executor is not None:
+            executor.shutdown()
+
+    return {
+        "items_per_sec": items / elapsed,
+        "cpu_us_per_item": cpu / max(1, items) * 1e6,
+        "stall_p50_ms": percentile(delays, 50) * 1e3,
+        "stall_p99_ms": percentile(delays, 99) * 1e3,
+        "stall_max_ms": max(delays, default=0.0) * 1e3}
+
+
+def run(
+    transactions: int = 10_000,
+    page_size: int = 100,
+    workers: int = 2,
+    modes: Optional[List[str]] = None,
+    raw: bool = False,
+) -> Dict[str, dict]:
+    """Backfills `transactions` transactions with each mode ("loop", "thread" or "process") and returns their results."""
+    modes = modes if modes else ["loop", "thread", "process"]
+    with MockServerProcess(transactions=transactions, accounts=2, max_page_size=max(100, page_size)) as server:
+        return {mode: asyncio.run(measure(server.base_url, mode, workers, page_size, raw)) for mode in modes}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=10_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=2, help="threads or processes of the executor")
+    parser.add_argument("--modes", nargs="+", choices=["loop", "thread", "process"], default=["loop", "thread", "process"])
+    parser.add_argument("--raw", action="store_true", help="skip validating transactions with the models")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.transactions, args.page_size, args.workers, args.modes, args.raw)
+    print(f"{'mode':>8}{'items/s':>12}{'cpu us/item':>13}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for mode, result in results.items():
+        print(f"{mode:>8}{result['items_per_sec']:>12,.0f}{result['cpu_us_per_item']:>13,.1f}"
+              f"{result['stall_p50_ms']:>9.2f}{result['stall_p99_ms']:>9.2f}{result['stall_max_ms']:>9.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
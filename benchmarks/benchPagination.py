@@ -0,0 +1,214 @@
+"""Measures the Pagination iteration paths against a local mock of the Up API.
+
+For each path reports pages/sec, items/sec, client CPU per item split into JSON decoding and page parsing, time to first
+item, page request latency percentiles and peak memory (measured in a separate run as tracing allocations slows
+iteration down). The cost of parsing alone is also measured offline on the same pages. Results can be saved with --json to compare before and after a change.
+"""
+import argparse
+import asyncio
+import json
+import math
+import tracemalloc
+from datetime import datetime, timedelta
+from time import perf_counter, process_time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from asyncupbankapi import Client, Hooks
+from asyncupbankapi.instrumentation import PageParsed, RequestEnd
+from benchmarks import benchParse
+from benchmarks.mockServer import MockServer, MockServerProcess, MockUpApi
+
+Path = Callable[[Client, dict], Awaitable[AsyncIterator]]
+
+
+async def _models(client: Client, options: dict) -> AsyncIterator:
+    return await client.transactions(page_size=options["page_size"])
+
+
+async def _stream(client: Client, options: dict) -> AsyncIterator:
+    return await client.transactions(page_size=options["page_size"], retain=False)
+
+
+async def _raw(client: Client, options: dict) -> AsyncIterator:
+    return await client.transactions(page_size=options["page_size"], retain=False, raw=True)
+
+
+async def _prefetch(client: Client, options: dict) -> AsyncIterator:
+    return await client.transactions(page_size=options["page_size"], retain=False, prefetch=4)
+
+
+async def _accounts(client: Client, options: dict) -> AsyncIterator:
+    return client.accounts_transactions(page_size=options["page_size"])
+
+
+async def _parallel(client: Client, options: dict) -> AsyncIterator:
+    return client.transactions_parallel(
+        options["since"], options["until"], shards=4, page_size=options["page_size"])
+
+
+PATHS: Dict[str, Path] = {
+    "models": _models,
+    "stream": _stream,
+    "raw": _raw,
+    "prefetch": _prefetch,
+    "accounts": _accounts,
+    "parallel": _parallel,
+}
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Returns the q-th percentile (0-100) of `values` by nearest rank."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered), max(1, math.ceil(q / 100 * len(ordered)))) - 1]
+
+
+class _Recorder(Hooks):
+    """Records the latency and decode time of every request and the time spent parsing pages."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.latencies: List[float] = []
+        self.decode = 0.0
+        self.parse = 0.0
+
+    def on_request_end(self, event: RequestEnd) -> None:
+        self.latencies.append(event.duration)
+        self.decode += event.decode
+
+    def on_page_parsed(self, event: PageParsed) -> None:
+        self.parse += event.duration
+
+
+async def measure(base_url: str, path: Path, options: dict, memory: bool = False) -> dict:
+    recorder = _Recorder()
+    client = Client("BENCHMARK", base_url=base_url, coalesce=False, hooks=[recorder])
+    await client.warm_up(4)
+    recorder.reset()
+    latencies = recorder.latencies
+
+    items = 0
+    first_item: Optional[float] = None
+    try:
+        if memory:
+            tracemalloc.start()
+        start, cpu = perf_counter(), process_time()
+        async for _ in await path(client, options):
+            items += 1
+            if first_item is None:
+                first_item = perf_counter() - start
+        elapsed, cpu = perf_counter() - start, process_time() - cpu
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return {"peak_memory_mib": peak / 2 ** 20}
+    finally:
+        await client.close()
+
+    return {
+        "items": items,
+        "pages": len(latencies),
+        "pages_per_sec": len(latencies) / elapsed,
+        "items_per_sec": items / elapsed,
+        "cpu_us_per_item": cpu / max(1, items) * 1e6,
+        "decode_us_per_item": recorder.decode / max(1, items) * 1e6,
+        "parse_us_per_item": recorder.parse / max(1, items) * 1e6,
+        "first_item_ms": (first_item or 0.0) * 1e3,
+        "latency_p50_ms": percentile(latencies, 50) * 1e3,
+        "latency_p90_ms": percentile(latencies, 90) * 1e3,
+        "latency_p99_ms": percentile(latencies, 99) * 1e3}
+
+
+async def run_paths(base_url: str, api: MockUpApi, paths: List[str], page_size: int, repeat: int) -> Dict[str, dict]:
+    created_at = sorted(record["attributes"]["createdAt"] for record in api.transactions)
+    options = {
+        "page_size": page_size,
+        "since": datetime.fromisoformat(created_at[0]),
+        "until": datetime.fromisoformat(created_at[-1]) + timedelta(seconds=1)}
+
+    results = {}
+    for name in paths:
+        runs = [await measure(base_url, PATHS[name], options) for _ in range(repeat)]
+        best = max(runs, key=lambda result: result["items_per_sec"])
+        best.update(await measure(base_url, PATHS[name], options, memory=True))
+        results[name] = best
+    return results
+
+
+def run(
+    transactions: int = 5000,
+    accounts: int = 2,
+    page_size: int = 100,
+    latency: float = 0.0,
+    repeat: int = 3,
+    paths: Optional[List[str]] = None,
+    in_process: bool = False,
+) -> dict:
+    """Runs the benchmark and returns the results by path along with the offline parse cost.
+
+    :param in_process: serve the mock API from the benchmark's own event loop instead of a separate process
+    """
+    paths = paths if paths else list(PATHS)
+    options = {"transactions": transactions, "accounts": accounts, "latency": latency, "max_page_size": max(100, page_size)}
+    # The process serving requests generates the same data from the same seed.
+    api = MockUpApi(**options)
+
+    async def in_loop() -> Dict[str, dict]:
+        async with MockServer(api) as server:
+            return await run_paths(server.base_url, api, paths, page_size, repeat)
+
+    if in_process:
+        results = asyncio.run(in_loop())
+    else:
+        with MockServerProcess(**options) as server:
+            results = asyncio.run(run_paths(server.base_url, api, paths, page_size, repeat))
+
+    parse = benchParse.run(min(transactions, 20_000), page_size, repeat)
+    return {
+        "options": {"transactions": transactions, "accounts": accounts, "page_size": page_size, "latency": latency},
+        "parse_us_per_item": {name: 1e6 / rate for name, rate in parse.items()},
+        "paths": results}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transactions", type=int, default=5000)
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock server adds to every response")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--paths", nargs="+", choices=list(PATHS), default=list(PATHS))
+    parser.add_argument("--in-process", action="store_true", help="serve the mock API from the same event loop")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(
+        args.transactions, args.accounts, args.page_size, args.latency, args.repeat, args.paths, args.in_process)
+
+    columns = [
+        ("pages/s", "pages_per_sec", "{:,.0f}"),
+        ("items/s", "items_per_sec", "{:,.0f}"),
+        ("cpu us/item", "cpu_us_per_item", "{:,.1f}"),
+        ("decode us", "decode_us_per_item", "{:,.1f}"),
+        ("parse us", "parse_us_per_item", "{:,.1f}"),
+        ("first ms", "first_item_ms", "{:,.1f}"),
+        ("p50 ms", "latency_p50_ms", "{:,.1f}"),
+        ("p90 ms", "latency_p90_ms", "{:,.1f}"),
+        ("p99 ms", "latency_p99_ms", "{:,.1f}"),
+        ("peak MiB", "peak_memory_mib", "{:,.1f}"),
+    ]
+    print(f"{'path':>10}" + "".join(f"{title:>13}" for title, _, _ in columns))
+    for name, result in results["paths"].items():
+        print(f"{name:>10}" + "".join(f"{fmt.format(result[key]):>13}" for _, key, fmt in columns))
+    print("parse cost: " + ", ".join(f"{name} {cost:.1f} us/item" for name, cost in results["parse_us_per_item"].items()))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
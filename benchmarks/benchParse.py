@@ -0,0 +1,46 @@
+"""Compares the number of transactions parsed per second with and without model validation."""
+import argparse
+from time import perf_counter
+
+from asyncupbankapi.models.transactions import Transactions
+from benchmarks import payloads
+
+
+def parse_pages(pages: list, raw: bool) -> int:
+    items = 0
+    for response in pages:
+        items += len(Transactions(response, session=None, prefetch=0, raw=raw).data)
+    return items
+
+
+def run(items: int, page_size: int, repeat: int) -> dict:
+    records = payloads.transactions(items)
+    pages = [payloads.page(records[i:i + page_size]) for i in range(0, items, page_size)]
+
+    results = {}
+    for name, raw in (("model", False), ("raw", True)):
+        best = None
+        for _ in range(repeat):
+            start = perf_counter()
+            parse_pages(pages, raw)
+            elapsed = perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        results[name] = items / best
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = run(args.items, args.page_size, args.repeat)
+    for name, rate in results.items():
+        print(f"{name:>6}: {rate:>12,.0f} items/sec")
+    print(f"{'raw is':>6}: {results['raw'] / results['model']:>12,.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
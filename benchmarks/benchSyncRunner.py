@@ -0,0 +1,67 @@
+"""Measures how the sync runner scales with the number of worker processes against a local mock of the Up API.
+
+Every token syncs the same mock data. The mock server runs in a process of its own, so on a machine with N cores expect close
+to linear scaling up to about N - 1 workers.
+"""
+import argparse
+import json
+import os
+from typing import Dict, List
+
+from asyncupbankapi.syncRunner import SyncRunner
+from benchmarks.mockServer import MockServerProcess
+
+
+def run(
+    processes: List[int],
+    tokens: int = 32,
+    transactions: int = 2000,
+    latency: float = 0.0,
+    validate: bool = True,
+    concurrency: int = 4,
+) -> Dict[int, dict]:
+    """Syncs `tokens` tokens with each number of processes and returns the throughput of each."""
+    results = {}
+    with MockServerProcess(transactions=transactions, accounts=2, latency=latency) as server:
+        keys = {f"customer-{i}": f"token-{i}" for i in range(tokens)}
+        for count in processes:
+            runner = SyncRunner(
+                keys, processes=count, concurrency=concurrency, validate=validate, base_url=server.base_url)
+            result = runner.collect()
+            if result.errors:
+                raise RuntimeError(f"sync failed: {result.errors}")
+            results[count] = {
+                "seconds": result.elapsed,
+                "transactions_per_sec": result.transactions_per_sec,
+                "shards": {shard: progress.transactions_per_sec for shard, progress in result.shards.items()}}
+
+    baseline = results[processes[0]]["transactions_per_sec"] / processes[0]
+    for count, result in results.items():
+        result["efficiency"] = result["transactions_per_sec"] / (baseline * count)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    default_processes = sorted({1, 2, 4, max(1, (os.cpu_count() or 2) - 1)})
+    parser.add_argument("--processes", type=int, nargs="+", default=default_processes)
+    parser.add_argument("--tokens", type=int, default=32)
+    parser.add_argument("--transactions", type=int, default=2000, help="transactions of every token")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds the mock server adds to every response")
+    parser.add_argument("--concurrency", type=int, default=4, help="tokens synced at once by each process")
+    parser.add_argument("--raw", action="store_true", help="skip validating transactions with the models")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = run(args.processes, args.tokens, args.transactions, args.latency, not args.raw, args.concurrency)
+    print(f"{'processes':>10}{'seconds':>10}{'txn/sec':>12}{'efficiency':>12}")
+    for count, result in results.items():
+        print(f"{count:>10}{result['seconds']:>10.2f}{result['transactions_per_sec']:>12,.0f}{result['efficiency']:>12.0%}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
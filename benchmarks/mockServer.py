@@ -0,0 +1,457 @@
+"""A local aiohttp server emulating the Up API for offline benchmarks and tests.
+
+Serves accounts, transactions (with cursor pagination and the status, since, until, category and tag filters),
+categories, tags and webhooks generated by `payloads`. Records are encoded once up front so the server costs as little
+as possible next to the client being measured.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import random
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from aiohttp import web
+
+from benchmarks import payloads
+
+API_PREFIX = "/api/v1"
+
+
+class MockUpApi:
+    """Generated Up API data and the handlers serving it."""
+
+    def __init__(
+        self,
+        transactions: int = 10_000,
+        accounts: int = 2,
+        latency: float = 0.0,
+        default_page_size: int = 10,
+        max_page_size: int = 100,
+        seed: int = 0,
+    ) -> None:
+        """Mock Up API.
+
+        :param transactions: number of transactions to generate
+        :param accounts: number of accounts the transactions are spread over
+        :param latency: seconds added to every response
+        :param default_page_size: page size used when a request does not ask for one
+        :param max_page_size: largest page size a request can ask for
+        :param seed: seed for the generated data
+        """
+        self.latency = latency
+        self.default_page_size = default_page_size
+        self.max_page_size = max_page_size
+        self.requests = 0
+
+        rng = random.Random(seed)
+        names = ["Spending"] + [f"Saver {i}" for i in range(1, accounts)]
+        self.accounts = [
+            payloads.account(rng, name, "TRANSACTIONAL" if i == 0 else "SAVER") for i, name in enumerate(names)]
+        self.transactions = payloads.transactions(
+            transactions, seed=seed, account_ids=[account["id"] for account in self.accounts])
+        self.categories = payloads.categories()
+        self.tags = payloads.tags()
+        self.webhooks: Dict[str, dict] = {}
+        self.webhook_logs: Dict[str, List[dict]] = {}
+
+        self._encoded: Dict[str, List[bytes]] = {
+            "accounts": [self.__encode(record) for record in self.accounts],
+            "transactions": [self.__encode(record) for record in self.transactions],
+            "tags": [self.__encode(record) for record in self.tags]}
+        self._index = {record["id"]: i for i, record in enumerate(self.transactions)}
+        self._created_at = [datetime.fromisoformat(record["attributes"]["createdAt"]) for record in self.transactions]
+        self._filtered: Dict[Tuple, List[int]] = {}
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.__middleware])
+        routes = [
+            web.get(f"{API_PREFIX}/util/ping", self.ping),
+            web.get(f"{API_PREFIX}/accounts", self.list_accounts),
+            web.get(f"{API_PREFIX}/accounts/{{id}}", self.get_account),
+            web.get(f"{API_PREFIX}/accounts/{{id}}/transactions", self.list_transactions),
+            web.get(f"{API_PREFIX}/transactions", self.list_transactions),
+            web.get(f"{API_PREFIX}/transactions/{{id}}", self.get_transaction),
+            web.post(f"{API_PREFIX}/transactions/{{id}}/relationships/tags", self.update_tags),
+            web.delete(f"{API_PREFIX}/transactions/{{id}}/relationships/tags", self.update_tags),
+            web.get(f"{API_PREFIX}/categories", self.list_categories),
+            web.get(f"{API_PREFIX}/categories/{{id}}", self.get_category),
+            web.get(f"{API_PREFIX}/tags", self.list_tags),
+            web.get(f"{API_PREFIX}/webhooks", self.list_webhooks),
+            web.post(f"{API_PREFIX}/webhooks", self.create_webhook),
+            web.get(f"{API_PREFIX}/webhooks/{{id}}", self.get_webhook),
+            web.delete(f"{API_PREFIX}/webhooks/{{id}}", self.delete_webhook),
+            web.post(f"{API_PREFIX}/webhooks/{{id}}/ping", self.ping_webhook),
+            web.get(f"{API_PREFIX}/webhooks/{{id}}/logs", self.list_webhook_logs),
+        ]
+        app.add_routes(routes)
+        return app
+
+    @web.middleware
+    async def __middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if not request.headers.get("Authorization", "").startswith("Bearer "):
+            return _error(401, "Not Authorized", "The request was not authenticated.")
+        return await handler(request)
+
+    # Utility
+
+    async def ping(self, request: web.Request) -> web.Response:
+        return _json(request, {"meta": {"id": str(uuid4()), "statusEmoji": "⚡️"}})
+
+    # Accounts
+
+    async def list_accounts(self, request: web.Request) -> web.Response:
+        indexes = list(range(len(self.accounts)))
+        account_type = request.query.get("filter[accountType]")
+        if account_type:
+            indexes = [i for i in indexes if self.accounts[i]["attributes"]["accountType"] == account_type]
+        return self.__page(request, self._encoded["accounts"], indexes)
+
+    async def get_account(self, request: web.Request) -> web.Response:
+        for record in self.accounts:
+            if record["id"] == request.match_info["id"]:
+                return _json(request, {"data": record})
+        return _not_found(request)
+
+    # Transactions
+
+    async def list_transactions(self, request: web.Request) -> web.Response:
+        account_id = request.match_info.get("id")
+        if account_id is not None and not any(record["id"] == account_id for record in self.accounts):
+            return _not_found(request)
+
+        try:
+            indexes = self.__filter_transactions(
+                account_id,
+                request.query.get("filter[status]"),
+                _datetime(request.query.get("filter[since]")),
+                _datetime(request.query.get("filter[until]")),
+                request.query.get("filter[category]"),
+                request.query.get("filter[tag]"))
+        except ValueError as e:
+            return _error(400, "Invalid Parameter", str(e))
+        return self.__page(request, self._encoded["transactions"], indexes)
+
+    async def get_transaction(self, request: web.Request) -> web.Response:
+        index = self._index.get(request.match_info["id"])
+        if index is None:
+            return _not_found(request)
+        return _json(request, {"data": self.transactions[index]})
+
+    async def update_tags(self, request: web.Request) -> web.Response:
+        index = self._index.get(request.match_info["id"])
+        if index is None:
+            return _not_found(request)
+
+        tags = [tag["id"] for tag in (await request.json())["data"]]
+        record = self.transactions[index]
+        current = [tag["id"] for tag in record["relationships"]["tags"]["data"]]
+        if request.method == "POST":
+            current.extend(tag for tag in tags if tag not in current)
+        else:
+            current = [tag for tag in current if tag not in tags]
+        record["relationships"]["tags"]["data"] = [{"type": "tags", "id": tag} for tag in current]
+        self._encoded["transactions"][index] = self.__encode(record)
+        self._filtered.clear()
+        return web.Response(status=204)
+
+    def __filter_transactions(
+        self,
+        account_id: Optional[str],
+        status: Optional[str],
+        since: Optional[datetime],
+        until: Optional[datetime],
+        category: Optional[str],
+        tag: Optional[str],
+    ) -> List[int]:
+        key = (account_id, status, since, until, category, tag)
+        indexes = self._filtered.get(key)
+        if indexes is not None:
+            return indexes
+
+        indexes = []
+        for i, record in enumerate(self.transactions):
+            relationships = record["relationships"]
+            if account_id and relationships["account"]["data"]["id"] != account_id:
+                continue
+            if status and record["attributes"]["status"] != status:
+                continue
+            if since and self._created_at[i] < since:
+                continue
+            if until and self._created_at[i] >= until:
+                continue
+            if category and (relationships["category"]["data"] or {}).get("id") != category \
+                    and (relationships["parentCategory"]["data"] or {}).get("id") != category:
+                continue
+            if tag and not any(t["id"] == tag for t in relationships["tags"]["data"]):
+                continue
+            indexes.append(i)
+
+        self._filtered[key] = indexes
+        return indexes
+
+    # Categories and tags
+
+    async def list_categories(self, request: web.Request) -> web.Response:
+        parent = request.query.get("filter[parent]")
+        records = self.categories
+        if parent:
+            records = [record for record in records
+                       if (record["relationships"]["parent"]["data"] or {}).get("id") == parent]
+        return _json(request, {"data": records})
+
+    async def get_category(self, request: web.Request) -> web.Response:
+        for record in self.categories:
+            if record["id"] == request.match_info["id"]:
+                return _json(request, {"data": record})
+        return _not_found(request)
+
+    async def list_tags(self, request: web.Request) -> web.Response:
+        return self.__page(request, self._encoded["tags"], list(range(len(self.tags))))
+
+    # Webhooks
+
+    async def list_webhooks(self, request: web.Request) -> web.Response:
+        records = [self.__encode(self.__webhook(request, webhook_id)) for webhook_id in self.webhooks]
+        return self.__page(request, records, list(range(len(records))))
+
+    async def create_webhook(self, request: web.Request) -> web.Response:
+        attributes = (await request.json())["data"]["attributes"]
+        webhook_id = str(uuid4())
+        self.webhooks[webhook_id] = {
+            "url": attributes["url"],
+            "description": attributes.get("description"),
+            "secretKey": base64.b64encode(uuid4().bytes).decode(),
+            "createdAt": payloads.timestamp(datetime.now(timezone.utc))}
+        self.webhook_logs[webhook_id] = []
+        return _json(request, {"data": self.__webhook(request, webhook_id, secret=True)}, status=201)
+
+    async def get_webhook(self, request: web.Request) -> web.Response:
+        if request.match_info["id"] not in self.webhooks:
+            return _not_found(request)
+        return _json(request, {"data": self.__webhook(request, request.match_info["id"])})
+
+    async def delete_webhook(self, request: web.Request) -> web.Response:
+        if self.webhooks.pop(request.match_info["id"], None) is None:
+            return _not_found(request)
+        del self.webhook_logs[request.match_info["id"]]
+        return web.Response(status=204)
+
+    async def ping_webhook(self, request: web.Request) -> web.Response:
+        webhook_id = request.match_info["id"]
+        if webhook_id not in self.webhooks:
+            return _not_found(request)
+
+        base = _base_url(request)
+        created_at = payloads.timestamp(datetime.now(timezone.utc))
+        event = {
+            "type": "webhook-events",
+            "id": str(uuid4()),
+            "attributes": {"eventType": "PING", "createdAt": created_at},
+            "relationships": {"webhook": {
+                "data": {"type": "webhooks", "id": webhook_id},
+                "links": {"related": f"{base}/webhooks/{webhook_id}"}}}}
+        self.webhook_logs[webhook_id].insert(0, {
+            "type": "webhook-delivery-logs",
+            "id": str(uuid4()),
+            "attributes": {
+                "request": {"body": json.dumps({"data": event})},
+                "response": {"statusCode": 200, "body": "OK"},
+                "deliveryStatus": "DELIVERED",
+                "createdAt": created_at},
+            "relationships": {"webhookEvent": {"data": {"type": "webhook-events", "id": event["id"]}}}})
+        return _json(request, {"data": event}, status=201)
+
+    async def list_webhook_logs(self, request: web.Request) -> web.Response:
+        logs = self.webhook_logs.get(request.match_info["id"])
+        if logs is None:
+            return _not_found(request)
+        return self.__page(request, [self.__encode(log) for log in logs], list(range(len(logs))))
+
+    def __webhook(self, request: web.Request, webhook_id: str, secret: bool = False) -> dict:
+        base = _base_url(request)
+        attributes = dict(self.webhooks[webhook_id])
+        if not secret:
+            attributes.pop("secretKey")
+        return {
+            "type": "webhooks",
+            "id": webhook_id,
+            "attributes": attributes,
+            "relationships": {"logs": {"links": {"related": f"{base}/webhooks/{webhook_id}/logs"}}},
+            "links": {"self": f"{base}/webhooks/{webhook_id}"}}
+
+    # Pagination
+
+    def __page(self, request: web.Request, encoded: List[bytes], indexes: List[int]) -> web.Response:
+        try:
+            page_size = int(request.query.get("page[size]", self.default_page_size))
+            offset = _decode_cursor(request.query.get("page[after]"))
+        except ValueError:
+            return _error(400, "Invalid Parameter", "The page size or cursor is not valid.")
+        if not 0 < page_size <= self.max_page_size:
+            return _error(400, "Invalid Parameter", f"The page size must be between 1 and {self.max_page_size}.")
+
+        end = offset + page_size
+        next_url = None
+        if end < len(indexes):
+            next_url = str(request.url.update_query({"page[after]": _encode_cursor(end)}))
+        prev_url = None
+        if offset > 0:
+            prev_url = str(request.url.update_query({"page[after]": _encode_cursor(max(0, offset - page_size))}))
+
+        body = b"".join((
+            b'{"data":[',
+            b",".join(encoded[i] for i in indexes[offset:end]),
+            b'],"links":',
+            json.dumps({"prev": prev_url, "next": next_url}).encode(),
+            b"}"))
+        return web.Response(body=_rebase(request, body), content_type="application/json")
+
+    @staticmethod
+    def __encode(record: dict) -> bytes:
+        return json.dumps(record, separators=(",", ":")).encode()
+
+
+def _base_url(request: web.Request) -> str:
+    return str(request.url.origin()) + API_PREFIX
+
+
+def _rebase(request: web.Request, body: bytes) -> bytes:
+    # Generated records link to the real API, point them at this server so links can be followed.
+    return body.replace(payloads.BASE_URL.encode(), _base_url(request).encode())
+
+
+def _json(request: web.Request, value: dict, status: int = 200) -> web.Response:
+    return web.Response(body=_rebase(request, json.dumps(value).encode()), status=status, content_type="application/json")
+
+
+def _datetime(value: Optional[str]) -> Optional[datetime]:
+    if not value:
+        return None
+    # An unencoded "+" in a utc offset is decoded as a space.
+    return datetime.fromisoformat(value.replace(" ", "+"))
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError) as e:
+        raise ValueError(cursor) from e
+
+
+def _error(status: int, title: str, detail: str) -> web.Response:
+    return web.json_response({"errors": [{"status": str(status), "title": title, "detail": detail}]}, status=status)
+
+
+def _not_found(request: web.Request) -> web.Response:
+    return _error(404, "Not Found", f"{request.path} does not exist.")
+
+
+class MockServer:
+    """Serves a MockUpApi on localhost from the running event loop, `base_url` is the url to pass to the client."""
+
+    def __init__(self, api: Optional[MockUpApi] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.api = api if api else MockUpApi()
+        self._host = host
+        self._port = port
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url = ""
+
+    async def start(self) -> str:
+        self._runner = web.AppRunner(self.api.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self._host, self._port)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}{API_PREFIX}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "MockServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.stop()
+
+
+class MockServerProcess:
+    """Serves a MockUpApi from a separate process so the server does not share the event loop or CPU with the client.
+
+    :param options: keyword arguments for MockUpApi
+    """
+
+    def __init__(self, **options) -> None:
+        self._options = options
+        self._process: Optional[multiprocessing.Process] = None
+        self.base_url = ""
+
+    def start(self) -> str:
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        self._process = context.Process(target=_serve, args=(self._options, sender), daemon=True)
+        self._process.start()
+        while not receiver.poll(0.1):
+            if not self._process.is_alive():
+                raise RuntimeError(f"The mock server exited with code {self._process.exitcode}")
+        self.base_url = receiver.recv()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._process:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self) -> "MockServerProcess":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+
+def _serve(options: dict, sender, port: int = 0) -> None:
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    server = MockServer(MockUpApi(**options), port=port)
+    sender.send(loop.run_until_complete(server.start()))
+    try:
+        loop.run_forever()
+    finally:
+        loop.run_until_complete(server.stop())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--transactions", type=int, default=10_000)
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    args = parser.parse_args()
+
+    class Printer:
+        def send(self, base_url: str) -> None:
+            print(f"Serving the mock Up API at {base_url}")
+
+    _serve({"transactions": args.transactions, "accounts": args.accounts, "latency": args.latency}, Printer(), args.port)
+
+
+if __name__ == "__main__":
+    main()
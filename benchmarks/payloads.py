@@ -0,0 +1,140 @@
+"""Generates realistic Up API payloads for benchmarks."""
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import UUID
+
+BASE_URL = "https://api.up.com.au/api/v1"
+
+CATEGORIES = {
+    "good-life": ["restaurants-and-cafes", "takeaway", "pubs-and-bars", "games-and-software"],
+    "home": ["groceries", "rent-and-mortgage", "utilities", "internet"],
+    "personal": ["clothing-and-accessories", "fitness-and-wellbeing", "technology"],
+    "transport": ["fuel", "public-transport", "taxis-and-share-cars", "parking"],
+}
+TAGS = ["Holiday", "Pizza Night", "Work", "Reimbursable", "Gifts"]
+DESCRIPTIONS = ["7-Eleven", "Woolworths", "Coles", "Uber", "David Taylor", "Interest", "Netflix", "Spotify"]
+TIMEZONE = timezone(timedelta(hours=10))
+START = datetime(2020, 1, 1, tzinfo=TIMEZONE)
+
+
+def uuid(rng: random.Random) -> str:
+    return str(UUID(int=rng.getrandbits(128), version=4))
+
+
+def timestamp(value: datetime) -> str:
+    return value.isoformat(timespec="seconds")
+
+
+def money(base_units: int, currency: str = "AUD") -> dict:
+    sign = "-" if base_units < 0 else ""
+    return {
+        "currencyCode": currency,
+        "value": f"{sign}{abs(base_units) // 100}.{abs(base_units) % 100:02d}",
+        "valueInBaseUnits": base_units}
+
+
+def account(rng: random.Random, name: str = "Spending", account_type: str = "TRANSACTIONAL") -> dict:
+    account_id = uuid(rng)
+    return {
+        "type": "accounts",
+        "id": account_id,
+        "attributes": {
+            "displayName": name,
+            "accountType": account_type,
+            "ownershipType": "INDIVIDUAL",
+            "balance": money(rng.randint(0, 10_000_000)),
+            "createdAt": timestamp(START)},
+        "relationships": {
+            "transactions": {"links": {"related": f"{BASE_URL}/accounts/{account_id}/transactions"}}},
+        "links": {"self": f"{BASE_URL}/accounts/{account_id}"}}
+
+
+def transaction(rng: random.Random, account_id: str, created_at: datetime, status: Optional[str] = None) -> dict:
+    transaction_id = uuid(rng)
+    amount = -rng.randint(100, 50_000)
+    status = status if status else rng.choice(["SETTLED"] * 9 + ["HELD"])
+    parent = rng.choice(list(CATEGORIES))
+    category = rng.choice(CATEGORIES[parent])
+    tags = rng.sample(TAGS, rng.randint(0, 2))
+
+    return {
+        "type": "transactions",
+        "id": transaction_id,
+        "attributes": {
+            "status": status,
+            "rawText": None,
+            "description": rng.choice(DESCRIPTIONS),
+            "message": None,
+            "isCategorizable": True,
+            "holdInfo": {"amount": money(amount), "foreignAmount": None} if status == "HELD" else None,
+            "roundUp": {"amount": money(-(100 + amount % 100)), "boostPortion": None} if rng.random() < 0.3 else None,
+            "cashback": None,
+            "amount": money(amount),
+            "foreignAmount": None,
+            "cardPurchaseMethod": None,
+            "settledAt": timestamp(created_at + timedelta(days=1)) if status == "SETTLED" else None,
+            "createdAt": timestamp(created_at)},
+        "relationships": {
+            "account": {
+                "data": {"type": "accounts", "id": account_id},
+                "links": {"related": f"{BASE_URL}/accounts/{account_id}"}},
+            "transferAccount": {"data": None},
+            "category": {
+                "data": {"type": "categories", "id": category},
+                "links": {
+                    "self": f"{BASE_URL}/transactions/{transaction_id}/relationships/category",
+                    "related": f"{BASE_URL}/categories/{category}"}},
+            "parentCategory": {
+                "data": {"type": "categories", "id": parent},
+                "links": {"related": f"{BASE_URL}/categories/{parent}"}},
+            "tags": {
+                "data": [{"type": "tags", "id": tag} for tag in tags],
+                "links": {"self": f"{BASE_URL}/transactions/{transaction_id}/relationships/tags"}}},
+        "links": {"self": f"{BASE_URL}/transactions/{transaction_id}"}}
+
+
+def categories() -> List[dict]:
+    records = []
+    for parent, children in CATEGORIES.items():
+        for category, parent_id, child_ids in [(parent, None, children)] + [(child, parent, []) for child in children]:
+            records.append({
+                "type": "categories",
+                "id": category,
+                "attributes": {"name": category.replace("-", " ").title()},
+                "relationships": {
+                    "parent": {
+                        "data": {"type": "categories", "id": parent_id} if parent_id else None,
+                        "links": {"related": f"{BASE_URL}/categories/{parent_id}"} if parent_id else None},
+                    "children": {
+                        "data": [{"type": "categories", "id": child} for child in child_ids],
+                        "links": {"related": f"{BASE_URL}/categories?filter[parent]={category}"}}},
+                "links": {"self": f"{BASE_URL}/categories/{category}"}})
+    return records
+
+
+def tags() -> List[dict]:
+    return [{
+        "type": "tags",
+        "id": tag,
+        "relationships": {"transactions": {"links": {"related": f"{BASE_URL}/transactions?filter[tag]={tag}"}}}}
+        for tag in sorted(TAGS)]
+
+
+def transactions(count: int, accounts: int = 2, seed: int = 0, account_ids: Optional[List[str]] = None) -> List[dict]:
+    """Returns `count` transactions spread over `accounts` accounts, newest first as returned by the API.
+
+    :param account_ids: ids of the accounts to use instead of generating `accounts` ids
+    """
+    rng = random.Random(seed)
+    account_ids = account_ids if account_ids else [uuid(rng) for _ in range(accounts)]
+    created_at = START + timedelta(hours=count)
+    records = []
+    for _ in range(count):
+        created_at -= timedelta(minutes=rng.randint(1, 120))
+        records.append(transaction(rng, rng.choice(account_ids), created_at))
+    return records
+
+
+def page(data: List[dict], next_url: Optional[str] = None, prev_url: Optional[str] = None) -> dict:
+    return {"data": data, "links": {"prev": prev_url, "next": next_url}}
@@ -1,27 +1,22 @@
-from typing import Optional
-from fastapi import FastAPI, Header, Request
-import hmac
-import hashlib
-import asyncio
-app = FastAPI()
+from typing import List, Optional
+from fastapi import FastAPI, Header, Request, Response
+from asyncupbankapi.models.webhooks import WebhookEvent
+from asyncupbankapi.webhookReceiver import WebhookReceiver
 
+SECRET_KEY = b"RFlOErmrv9FVQxHqYk3RzC1i5BZo56RWooY4UTzaP73BnWSS6xk9os8bDLsi7nCH"
 
-@app.post("/")
-async def handle_webhook(request: Request, x_up_authenticity_signature: Optional[str] = Header(None)):
-    if x_up_authenticity_signature is None:
-        return "No auth"
 
-    body = await request.body()
-    asyncio.create_task(run_async(body, x_up_authenticity_signature))
+async def handle_events(events: List[WebhookEvent]):
+    for event in events:
+        print(event)
 
-    return "Success"
 
+receiver = WebhookReceiver(SECRET_KEY, handle_events, workers=4, batch_size=10)
+app = FastAPI(on_startup=[receiver.start], on_shutdown=[receiver.stop])
 
-async def run_async(body: bytes, x_up_authenticity_signature: str):
-    SECRET_KEY = b"RFlOErmrv9FVQxHqYk3RzC1i5BZo56RWooY4UTzaP73BnWSS6xk9os8bDLsi7nCH"
 
-    # Check to see if this is a valid request from UP Bank.
-    if not hmac.compare_digest(hmac.new(SECRET_KEY, bytes(body), hashlib.sha256).hexdigest(), x_up_authenticity_signature):
-        # Bad Authentication Attempt
-        return
-    print(body)
+@app.post("/")
+async def handle_webhook(request: Request, x_up_authenticity_signature: Optional[str] = Header(None)):
+    # The signature is checked and the event queued for the workers, Up retries the delivery if the queue is full.
+    status = await receiver.receive(await request.body(), x_up_authenticity_signature)
+    return Response(status_code=status)
@@ -23,6 +23,13 @@ if __name__ == "__main__":
         long_description_content_type="text/markdown",
         python_requires=">=3.7",
         install_requires=["aiohttp[speedups]>=3.7.2","pydantic>=1.7.2"],
+        extras_require={
+            "columnar": ["numpy"],
+            "pandas": ["numpy", "pandas"],
+            "arrow": ["numpy", "pyarrow"],
+            "fast": ["orjson"],
+            "opentelemetry": ["opentelemetry-api"],
+        },
         classifiers=[
             "Programming Language :: Python :: 3.7",
             "Programming Language :: Python :: 3.8",
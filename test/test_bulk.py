@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from asyncupbankapi import Client, NotAuthorizedException, NotFoundException
+from asyncupbankapi.bulk import update_tags
+
+
+def tags_app(calls: dict) -> web.Application:
+    """Tags every transaction apart from a missing one, the flaky ones fail on their first attempt."""
+
+    async def tag(request: web.Request) -> web.Response:
+        transaction_id = request.match_info["id"]
+        calls[transaction_id] = calls.get(transaction_id, 0) + 1
+        first = calls[transaction_id] == 1
+        if transaction_id == "missing":
+            return web.json_response({"errors": [{"status": "404", "title": "Not Found", "detail": ""}]}, status=404)
+        if transaction_id == "revoked":
+            return web.Response(status=401, text="Unauthorized")
+        if transaction_id == "limited" and first:
+            return web.json_response({"errors": [{"status": "429", "title": "Too Many", "detail": ""}]}, status=429)
+        if transaction_id == "broken" and first:
+            return web.Response(status=502, text="Bad Gateway")
+        if transaction_id == "slow":
+            await asyncio.sleep(10)
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_post("/api/v1/transactions/{id}/relationships/tags", tag)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_results_retries_and_failures_are_reported_per_item():
+    calls = {}
+    async with TestServer(tags_app(calls)) as server:
+        client = Client("FAKE TOKEN", base_url=str(server.make_url("/api/v1")))
+        try:
+            items = [(transaction_id, ["Coffee"]) for transaction_id in
+                     ("first", "missing", "limited", "broken", "revoked", "second")]
+            results = await update_tags(client.session, "POST", items, concurrency=2, backoff=0.01)
+        finally:
+            await client.close()
+
+    assert [result.transaction_id for result in results] == ["first", "missing", "limited", "broken", "revoked", "second"]
+    assert [result.ok for result in results] == [True, False, True, True, False, True]
+    assert [result.attempts for result in results] == [1, 1, 2, 2, 1, 1]
+    assert isinstance(results[1].error, NotFoundException)
+    # An error without a JSON body is not retried unless its status says it is worth it.
+    assert isinstance(results[4].error, NotAuthorizedException) and calls["revoked"] == 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_items_do_not_stop_the_others():
+    calls = {}
+    async with TestServer(tags_app(calls)) as server:
+        client = Client("FAKE TOKEN", base_url=str(server.make_url("/api/v1")))
+        try:
+            items = [({"type": "transactions"}, ["a"]), (None, ["b"]), (42.0, ["c"])] * 4 + [("last", ["d"])]
+            results = await asyncio.wait_for(update_tags(client.session, "POST", items, concurrency=2), 5)
+        finally:
+            await client.close()
+
+    assert all(isinstance(result.error, TypeError) for result in results[:-1])
+    assert results[-1].ok and calls == {"last": 1}
+
+
+@pytest.mark.asyncio
+async def test_cancelling_stops_every_worker():
+    calls = {}
+    async with TestServer(tags_app(calls)) as server:
+        client = Client("FAKE TOKEN", base_url=str(server.make_url("/api/v1")))
+        try:
+            items = [("slow", ["a"])] + [(f"queued-{i}", ["a"]) for i in range(10)]
+            task = asyncio.ensure_future(update_tags(client.session, "POST", items, concurrency=1))
+            while not calls:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            workers = [t for t in asyncio.all_tasks() if "update_tags" in t.get_coro().__qualname__]
+            assert workers == [] and list(calls) == ["slow"]
+        finally:
+            await client.close()
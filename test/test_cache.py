@@ -0,0 +1,92 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from asyncupbankapi import DiskCache, HttpSession, MemoryCache
+from asyncupbankapi.cache import ResponseCache
+from asyncupbankapi.httpSession import endpoint_template
+
+
+@pytest.mark.parametrize("path, template", [
+    ("/api/v1/categories", "/categories"),
+    ("/api/v1/categories/good-life", "/categories/{id}"),
+    ("/api/v1/accounts/2c0e1f5a/transactions", "/accounts/{id}/transactions"),
+    ("/api/v1/transactions/2c0e1f5a/relationships/tags", "/transactions/{id}/relationships/tags"),
+    ("/api/v1/util/ping", "/util/ping"),
+])
+def test_endpoint_template(path, template):
+    assert endpoint_template(f"https://api.up.com.au{path}?page[size]=10") == template
+
+
+@pytest.mark.parametrize("cache", [MemoryCache(maxsize=2), DiskCache(":memory:", maxsize=2)])
+def test_lru_eviction_and_invalidation(cache):
+    cache.set("https://up/tags", {"a": 1}, 60)
+    cache.set("https://up/tags?page[size]=5", {"b": 2}, 60)
+    assert cache.get("https://up/tags") == {"a": 1}
+    cache.set("https://up/categories", {"c": 3}, 60)
+    assert cache.get("https://up/tags?page[size]=5") is None
+    assert cache.stats == {"hits": 1, "misses": 1, "evictions": 1, "size": 2}
+
+    cache.set("https://up/tagsets", {"d": 4}, 60)
+    assert cache.invalidate("https://up/tags") == 0
+    cache.set("https://up/tags", {"a": 1}, 60)
+    assert cache.invalidate("https://up/tags") == 1
+    cache.set("https://up/expired", {}, -1)
+    assert cache.get("https://up/expired") is None
+
+
+@pytest.mark.asyncio
+async def test_session_caches_and_invalidates_on_write():
+    requests = []
+
+    async def handler(request):
+        requests.append(request.path)
+        return web.json_response({"data": {"id": len(requests)}})
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+
+    async with TestServer(app) as server:
+        session = HttpSession("FAKE TOKEN", cache=MemoryCache())
+        try:
+            tags = server.make_url("/api/v1/tags")
+            transactions = server.make_url("/api/v1/transactions")
+            assert await session.get(tags) == await session.get(tags)
+            await session.get(transactions)
+            await session.get(transactions)
+            assert requests == ["/api/v1/tags", "/api/v1/transactions", "/api/v1/transactions"]
+
+            await session.post(server.make_url("/api/v1/transactions/1/relationships/tags"), payload={"data": []})
+            assert (await session.get(tags))["data"]["id"] == 5
+            assert session.cache.stats["hits"] == 1
+        finally:
+            await session.close()
+
+
+def test_response_cache_is_abstract():
+    with pytest.raises(TypeError):
+        ResponseCache()
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_keeps_tokens_apart():
+    async def handler(request):
+        return web.json_response({"data": {"token": request.headers["Authorization"]}})
+
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+
+    async with TestServer(app) as server:
+        cache = MemoryCache()
+        alice, bob, alice_again = HttpSession("ALICE", cache=cache), HttpSession("BOB", cache=cache), HttpSession("ALICE", cache=cache)
+        try:
+            tags = server.make_url("/api/v1/tags")
+            assert (await alice.get(tags))["data"]["token"] == "Bearer ALICE"
+            assert (await bob.get(tags))["data"]["token"] == "Bearer BOB"
+            assert (await alice_again.get(tags))["data"]["token"] == "Bearer ALICE"
+            assert cache.stats == {"hits": 1, "misses": 2, "evictions": 0, "size": 2}
+
+            assert cache.invalidate(str(tags)) == 2
+        finally:
+            for session in (alice, bob, alice_again):
+                await session.close()
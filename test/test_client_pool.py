@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from asyncupbankapi import NotAuthorizedException
+from asyncupbankapi.clientPool import ClientPool
+from benchmarks.mockServer import MockServer, MockUpApi
+
+
+def job(name: str, log: list, delay: float = 0.0):
+    async def run(client):
+        log.append(("start", name))
+        await asyncio.sleep(delay)
+        log.append(("end", name))
+        return name
+    return run
+
+
+@pytest.mark.asyncio
+async def test_jobs_are_scheduled_round_robin_between_tokens():
+    log = []
+    async with ClientPool(concurrency=1, base_url="http://localhost") as pool:
+        for key in "abc":
+            pool.add(key, f"token-{key}")
+        jobs = [("a", job("a1", log)), ("a", job("a2", log)), ("a", job("a3", log)), ("a", job("a4", log)),
+                ("b", job("b1", log)), ("b", job("b2", log)), ("c", job("c1", log))]
+        results = await pool.run(jobs)
+
+    assert [result.result for result in results] == ["a1", "a2", "a3", "a4", "b1", "b2", "c1"]
+    assert [name for event, name in log if event == "start"] == ["a1", "b1", "c1", "a2", "b2", "a3", "a4"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limits_and_error_isolation():
+    running = {"total": 0, "max": 0}
+    per_key = {}
+
+    def tracked(key: str, fail: bool = False):
+        async def run(client):
+            running["total"] += 1
+            per_key[key] = per_key.get(key, 0) + 1
+            running["max"] = max(running["max"], running["total"])
+            assert per_key[key] <= 2
+            await asyncio.sleep(0.01)
+            running["total"] -= 1
+            per_key[key] -= 1
+            if fail:
+                raise ValueError(key)
+            return key
+        return run
+
+    async with ClientPool(concurrency=3, per_token=2, base_url="http://localhost") as pool:
+        for key in "abcd":
+            pool.add(key, f"token-{key}")
+        results = await pool.run([(key, tracked(key, fail=key == "b")) for key in "abcd" * 4])
+
+    assert running["max"] == 3
+    assert all(result.ok for result in results if result.key != "b")
+    assert all(isinstance(result.error, ValueError) for result in results if result.key == "b")
+
+
+@pytest.mark.asyncio
+async def test_tokens_share_one_session_with_their_own_headers():
+    seen = []
+
+    async def ping(request: web.Request) -> web.Response:
+        token = request.headers["Authorization"]
+        seen.append(token)
+        if token == "Bearer revoked":
+            return web.json_response({"errors": [{"status": "401", "title": "Not Authorized", "detail": ""}]}, status=401)
+        return web.json_response({"meta": {"id": f"00000000-0000-4000-8000-00000000000{token[-1]}", "statusEmoji": "⚡️"}})
+
+    app = web.Application()
+    app.router.add_get("/api/v1/util/ping", ping)
+    async with TestServer(app) as server:
+        pool = ClientPool(concurrency=4, base_url=str(server.make_url("/api/v1")))
+        try:
+            for key, token in (("first", "token-1"), ("second", "token-2"), ("third", "revoked")):
+                pool.add(key, token)
+            results = await pool.run([(key, lambda client: client.ping()) for key in ("first", "second", "third")] * 2)
+            assert {pool[key].session.connector for key in ("first", "second", "third")} == {pool.session.connector}
+        finally:
+            session = pool.session
+            await pool.close()
+
+    assert [str(result.result.id)[-1] for result in results if result.ok] == ["1", "2", "1", "2"]
+    assert [type(result.error) for result in results if not result.ok] == [NotAuthorizedException] * 2
+    assert sorted(set(seen)) == ["Bearer revoked", "Bearer token-1", "Bearer token-2"]
+    assert session.closed and len(pool) == 0
+
+
+@pytest.mark.asyncio
+async def test_removing_a_token_lets_its_running_jobs_finish():
+    started = asyncio.Event()
+
+    async def backfill(client):
+        count = 0
+        async for _ in await client.transactions(page_size=10):
+            count += 1
+            started.set()
+        return count
+
+    async with MockServer(MockUpApi(transactions=50, latency=0.01)) as server:
+        async with ClientPool(base_url=server.base_url) as pool:
+            client = pool.add("a", "token-a")
+            running = pool.submit("a", backfill)
+            queued = pool.submit("a", backfill)
+            await started.wait()
+            await pool.remove("a")
+
+            assert await running == 50
+            assert queued.cancelled() and "a" not in pool and client.session.closed
@@ -0,0 +1,32 @@
+import pytest
+
+from asyncupbankapi.columnar import TransactionColumns
+from asyncupbankapi.models.transactions import Transaction
+from benchmarks import payloads
+
+np = pytest.importorskip("numpy")
+
+
+def test_models_and_raw_records_give_the_same_columns():
+    records = payloads.transactions(200)
+    raw = TransactionColumns(records)
+    models = TransactionColumns(Transaction.parse_obj(record) for record in records)
+
+    assert len(raw) == len(models) == 200
+    for name, column in raw.to_numpy().items():
+        np.testing.assert_array_equal(column, models.to_numpy()[name])
+    assert raw.category_values == models.category_values
+
+
+def test_spend_aggregations():
+    records = payloads.transactions(500)
+    columns = TransactionColumns(records)
+    spent = sum(-r["attributes"]["amount"]["valueInBaseUnits"] for r in records)
+
+    assert sum(columns.spend_by_category().values()) == spent
+    assert sum(columns.spend_by_account().values()) == spent
+    assert sum(columns.spend_by_month().values()) == spent
+
+    groceries = sum(-r["attributes"]["amount"]["valueInBaseUnits"] for r in records
+                    if r["relationships"]["category"]["data"]["id"] == "groceries")
+    assert columns.spend_by_category()["groceries"] == groceries
@@ -0,0 +1,56 @@
+import copy
+import pickle
+
+from asyncupbankapi import compact as compact_module
+from asyncupbankapi.compact import CompactTransaction, CompactTransactions, ForeignMoney
+from asyncupbankapi.models.transactions import Transaction
+from benchmarks import payloads
+
+
+def test_round_trips_through_dicts_and_models():
+    records = payloads.transactions(200)
+    foreign = copy.deepcopy(records[0])
+    foreign["attributes"].update({
+        "foreignAmount": {"currencyCode": "JPY", "value": "-1250", "valueInBaseUnits": -1250},
+        "cashback": {"description": "Cashback", "amount": payloads.money(150)},
+        "message": "Lunch"})
+    foreign["relationships"]["category"] = {"data": None}
+    foreign["relationships"]["parentCategory"] = {"data": None}
+    records.append(foreign)
+
+    compact = CompactTransactions(records)
+    from_models = CompactTransactions(Transaction.parse_obj(record) for record in records)
+
+    assert len(compact) == len(from_models) == 201
+    for record, transaction, from_model in zip(records, compact, from_models):
+        assert transaction == from_model
+        assert transaction.to_model() == Transaction.parse_obj(record)
+        assert CompactTransaction.from_dict(transaction.to_dict()) == transaction
+        assert transaction.link() == record["links"]["self"]
+        assert transaction.created_at.isoformat() == record["attributes"]["createdAt"]
+        assert transaction.value == record["attributes"]["amount"]["value"]
+
+    assert compact[-1].foreign_amount == ForeignMoney("JPY", "-1250", -1250)
+    assert compact[-1].category is None and compact[-1].cashback == 150
+    assert pickle.loads(pickle.dumps(compact[-1])) == compact[-1]
+
+
+def test_repeated_values_are_shared():
+    compact = CompactTransactions(payloads.transactions(100))
+    first, second = [t for t in compact if t.tags and t.parent_category == "home"][:2]
+    assert first.parent_category is second.parent_category
+    assert all(t.account_id is first.account_id for t in compact if t.account_id == first.account_id)
+    assert {id(t.tags) for t in compact if t.tags == first.tags} == {id(first.tags)}
+    assert {id(t._timezone) for t in compact} == {id(first._timezone)}
+
+
+def test_shared_values_are_bounded(monkeypatch):
+    monkeypatch.setattr(compact_module, "MAX_SHARED", 10)
+    records = payloads.transactions(50)
+    for index, record in enumerate(records):
+        record["relationships"]["tags"]["data"] = [{"type": "tags", "id": f"Tag {index}"}]
+
+    compact = CompactTransactions(records)
+    assert len(compact_module._TAGS) <= 10
+    assert [t.tags for t in compact] == [(f"Tag {index}",) for index in range(50)]
+    assert CompactTransactions(records[-1:])[0].tags is compact[-1].tags
@@ -0,0 +1,55 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from asyncupbankapi import Client, ConnectionPool
+
+
+@pytest.mark.asyncio
+async def test_clients_of_a_pool_share_its_settings(monkeypatch):
+    created = []
+
+    class Recording(aiohttp.TCPConnector):
+        def __init__(self, **options):
+            created.append(options)
+            super().__init__(**options)
+
+    monkeypatch.setattr(aiohttp, "TCPConnector", Recording)
+    pool = ConnectionPool(limit=20, limit_per_host=5, keepalive_timeout=60)
+    clients = [Client("FAKE TOKEN", pool=pool), Client("FAKE TOKEN", pool=pool)]
+    try:
+        assert all((client.session.connector.limit, client.session.connector.limit_per_host) == (20, 5) for client in clients)
+        assert len(created) == 2
+        # The trust store is only loaded once for every connector of the pool.
+        assert created[0]["ssl"] is created[1]["ssl"] is pool.ssl_context
+        assert all(options["keepalive_timeout"] == 60 for options in created)
+    finally:
+        for client in clients:
+            await client.close()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_opens_connections_that_are_reused():
+    peers = []
+
+    async def ping(request: web.Request) -> web.Response:
+        peers.append(request.transport.get_extra_info("peername"))
+        await asyncio.sleep(0.02)
+        return web.json_response({"meta": {"id": "00000000-0000-4000-8000-000000000000", "statusEmoji": "⚡️"}})
+
+    app = web.Application()
+    app.router.add_get("/api/v1/util/ping", ping)
+    async with TestServer(app) as server:
+        client = Client("FAKE TOKEN", base_url=str(server.make_url("/api/v1")), pool=ConnectionPool(limit=10),
+                        coalesce=False)
+        try:
+            await client.warm_up(connections=3)
+            assert len(set(peers)) == 3
+            await asyncio.gather(*(client.ping() for _ in range(3)))
+        finally:
+            await client.close()
+
+    assert len(peers) == 6 and len(set(peers)) == 3
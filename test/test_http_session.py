@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from asyncupbankapi import HttpSession
+from asyncupbankapi.codec import CODECS, JsonCodec, get_codec
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_are_coalesced():
+    requests = []
+
+    async def handler(request):
+        requests.append(request.path_qs)
+        await asyncio.sleep(0.05)
+        return web.json_response({"data": {"id": request.match_info["id"]}})
+
+    app = web.Application()
+    app.router.add_get("/api/v1/categories/{id}", handler)
+
+    async with TestServer(app) as server:
+        session = HttpSession("FAKE TOKEN")
+        try:
+            responses = await asyncio.gather(
+                *(session.get(server.make_url("/api/v1/categories/home")) for _ in range(5)),
+                session.get(server.make_url("/api/v1/categories/home"), params={"page[size]": "1"}),
+                session.get(server.make_url("/api/v1/categories/personal")))
+            assert [r["data"]["id"] for r in responses] == ["home"] * 6 + ["personal"]
+            assert len(requests) == 3
+            assert session.coalesced_requests == 4
+
+            # Finished requests are not shared.
+            await session.get(server.make_url("/api/v1/categories/home"))
+            assert len(requests) == 4
+        finally:
+            await session.close()
+
+
+@pytest.mark.asyncio
+async def test_codec_is_used_for_requests_and_responses():
+    bodies = []
+
+    class CountingCodec(JsonCodec):
+        decoded = 0
+        encoded = 0
+
+        def loads(self, data):
+            assert isinstance(data, bytes)
+            self.decoded += 1
+            return super().loads(data)
+
+        def dumps(self, value):
+            self.encoded += 1
+            return super().dumps(value)
+
+    async def handler(request):
+        bodies.append(await request.json())
+        return web.json_response({"data": [{"id": "holiday"}]})
+
+    app = web.Application()
+    app.router.add_post("/api/v1/tags", handler)
+
+    codec = CountingCodec()
+    async with TestServer(app) as server:
+        session = HttpSession("FAKE TOKEN", codec=codec)
+        try:
+            response = await session.post(server.make_url("/api/v1/tags"), payload={"data": [{"id": "holiday"}]})
+        finally:
+            await session.close()
+
+    assert response == {"data": [{"id": "holiday"}]}
+    assert bodies == [{"data": [{"id": "holiday"}]}]
+    assert (codec.encoded, codec.decoded) == (1, 1)
+
+
+def test_codecs_round_trip():
+    value = {"data": {"id": "1", "amount": -12.5, "description": "Café", "tags": [None, True]}}
+    for name in CODECS:
+        try:
+            codec = get_codec(name)
+        except ImportError:
+            continue
+        encoded = codec.dumps(value)
+        assert codec.loads(encoded if isinstance(encoded, bytes) else encoded.encode()) == value
+    assert get_codec().name in CODECS
+    with pytest.raises(ValueError):
+        get_codec("yaml")
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.benchImport import parse_importtime
+
+
+def imported_modules(statement: str) -> set:
+    output = subprocess.run(
+        [sys.executable, "-c", f"{statement}; import sys; print(' '.join(sys.modules))"],
+        stdout=subprocess.PIPE, universal_newlines=True, check=True).stdout
+    return set(output.split())
+
+
+def test_package_import_is_lazy():
+    modules = imported_modules("import asyncupbankapi")
+    assert not {"aiohttp", "pydantic", "sqlite3", "asyncupbankapi.client", "asyncupbankapi.models"} & modules
+
+
+def test_client_only_imports_models_when_used():
+    modules = imported_modules("from asyncupbankapi import Client")
+    assert "aiohttp" in modules
+    assert not {"sqlite3", "asyncupbankapi.models.transactions", "asyncupbankapi.bulk"} & modules
+
+    modules = imported_modules("from asyncupbankapi import Client; from asyncupbankapi.models import Ping")
+    assert "asyncupbankapi.models.utility" in modules
+    assert "asyncupbankapi.models.transactions" not in modules
+
+
+def test_webhook_receiver_does_not_import_http_client():
+    modules = imported_modules("from asyncupbankapi.webhookReceiver import WebhookReceiver")
+    assert "asyncupbankapi.models.webhooks" in modules
+    assert not {"aiohttp", "asyncupbankapi.httpSession", "sqlite3"} & modules
+
+
+def test_lazy_attributes():
+    import asyncupbankapi
+    from asyncupbankapi import models
+
+    assert asyncupbankapi.Client.__module__ == "asyncupbankapi.client"
+    assert models.Transactions.__module__ == "asyncupbankapi.models.transactions"
+    assert "Client" in dir(asyncupbankapi)
+    with pytest.raises(AttributeError):
+        asyncupbankapi.Missing
+
+
+def test_parse_importtime():
+    output = "\n".join([
+        "import time: self [us] | cumulative | imported package",
+        "import time:       100 |        100 |   encodings",
+        "import time:       200 |        300 | site",
+        "import time:       500 |        500 |     typing",
+        "import time:      1000 |       2500 |   asyncupbankapi.const",
+        "import time:      2000 |       5000 | asyncupbankapi",
+    ])
+    assert parse_importtime(output) == {"site": 0.3, "asyncupbankapi": 5.0}
+    assert parse_importtime(output, exclude={"site"}) == {"asyncupbankapi": 5.0}
@@ -0,0 +1,109 @@
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from asyncupbankapi import Client, HttpSession, MetricsCollector, RateLimiter, prometheus_text
+from asyncupbankapi.instrumentation import Hooks
+from asyncupbankapi.metrics import Histogram
+from benchmarks.mockServer import MockServer, MockUpApi
+
+
+class Events(Hooks):
+    def __init__(self):
+        self.events = []
+
+    def on_request_start(self, event):
+        self.events.append(("start", event))
+
+    def on_request_end(self, event):
+        self.events.append(("end", event))
+
+    def on_retry(self, event):
+        self.events.append(("retry", event))
+
+    def on_page_parsed(self, event):
+        self.events.append(("page", event))
+
+
+@pytest.mark.asyncio
+async def test_requests_and_pages_are_collected_by_endpoint():
+    collector = MetricsCollector()
+    async with MockServer(MockUpApi(transactions=120, accounts=2)) as server:
+        client = Client("FAKE TOKEN", base_url=server.base_url, hooks=[collector])
+        try:
+            accounts = [account async for account in await client.accounts()]
+            for account in accounts:
+                await client.account(account.id)
+            assert len([t async for t in await client.transactions(page_size=50)]) == 120
+            assert len([t async for t in await client.transactions(page_size=100, raw=True)]) == 120
+        finally:
+            await client.close()
+
+    transactions = collector.endpoints[("GET", "/transactions")]
+    assert transactions.requests == 5
+    assert transactions.statuses == {200: 5}
+    assert transactions.errors == 0
+    assert transactions.bytes > 0
+    assert transactions.duration.count == 5
+    assert 0 < transactions.decode.sum < transactions.duration.sum
+    assert collector.endpoints[("GET", "/accounts/{id}")].requests == 2
+    assert collector.in_flight == 0
+
+    assert collector.pages["Transactions"].pages == 5
+    assert collector.pages["Transactions"].items == 240
+    assert collector.pages["Accounts"].items == 2
+
+    summary = collector.summary()
+    assert summary["endpoints"]["GET /transactions"]["requests"] == 5
+    assert summary["pages"]["Transactions"]["parse"]["total"] > 0
+
+    text = prometheus_text(collector)
+    assert '# TYPE upbank_request_duration_seconds histogram' in text
+    assert 'upbank_requests_total{method="GET",endpoint="/transactions",status="200"} 5' in text
+    assert 'upbank_request_duration_seconds_count{method="GET",endpoint="/accounts/{id}"} 2' in text
+    assert 'upbank_items_parsed_total{resource="Transactions"} 240' in text
+
+
+@pytest.mark.asyncio
+async def test_retries_and_errors_are_reported():
+    responses = [429, 200, 404]
+
+    async def handler(request):
+        status = responses.pop(0)
+        if status == 429:
+            return web.json_response({"errors": [{"status": "429"}]}, status=429, headers={"Retry-After": "0"})
+        if status == 404:
+            return web.json_response({"errors": [{"status": "404"}]}, status=404)
+        return web.json_response({"meta": {"id": "1"}})
+
+    app = web.Application()
+    app.router.add_get("/api/v1/util/ping", handler)
+
+    hooks = Events()
+    async with TestServer(app) as server:
+        session = HttpSession("FAKE TOKEN", rate_limiter=RateLimiter(), coalesce=False, hooks=[hooks])
+        try:
+            assert await session.get(server.make_url("/api/v1/util/ping")) == {"meta": {"id": "1"}}
+            with pytest.raises(Exception):
+                await session.get(server.make_url("/api/v1/util/ping"))
+        finally:
+            await session.close()
+
+    kinds = [kind for kind, _ in hooks.events]
+    assert kinds == ["start", "end", "retry", "start", "end", "start", "end"]
+    first, retry, second, failed = hooks.events[1][1], hooks.events[2][1], hooks.events[4][1], hooks.events[6][1]
+    assert (first.status, first.attempt, first.error) == (429, 0, None)
+    assert (retry.endpoint, retry.attempt, retry.delay, retry.status) == ("/util/ping", 0, 0, 429)
+    assert (second.status, second.attempt) == (200, 1)
+    assert second.connect == 0 and first.connect > 0
+    assert failed.status == 404 and failed.error is not None
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(1, 2, 4))
+    for value in (0.5, 1.5, 1.5, 3, 10):
+        histogram.observe(value)
+    assert [count for _, count in histogram.cumulative()] == [1, 3, 4, 5]
+    assert histogram.quantile(0.5) == pytest.approx(1.75)
+    assert histogram.quantile(1) == 4
+    assert histogram.mean == pytest.approx(3.3)
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from asyncupbankapi import Client, Hooks, NotFoundException
+from benchmarks import benchPagination
+from benchmarks.mockServer import MockServer, MockUpApi
+
+
+@pytest.mark.asyncio
+async def test_transactions_are_paginated_and_filtered():
+    async with MockServer(MockUpApi(transactions=250, accounts=3)) as server:
+        client = Client("FAKE TOKEN", base_url=server.base_url)
+        try:
+            transactions = [t async for t in await client.transactions(page_size=40)]
+            assert [str(t.id) for t in transactions] == [r["id"] for r in server.api.transactions]
+            assert server.api.requests == 7
+
+            held = [t async for t in await client.transactions(page_size=40, status="HELD", category="home")]
+            assert held and all(t.attributes.status.value == "HELD" for t in held)
+            assert all(t.relationships.parentCategory.data.id == "home" for t in held)
+
+            since, until = transactions[200].attributes.createdAt, transactions[50].attributes.createdAt
+            window = [t async for t in await client.transactions(page_size=30, since=since, until=until)]
+            assert [t.id for t in window] == [t.id for t in transactions[51:201]]
+
+            limited = [t async for t in await client.transactions(limit=45, page_size=20, raw=True)]
+            assert [t["id"] for t in limited] == [str(t.id) for t in transactions[:45]]
+        finally:
+            await client.close()
+
+
+@pytest.mark.asyncio
+async def test_links_point_at_the_server():
+    async with MockServer(MockUpApi(transactions=100, accounts=2)) as server:
+        client = Client("FAKE TOKEN", base_url=server.base_url)
+        try:
+            accounts = [account async for account in await client.accounts()]
+            counts = [len([t async for t in await account.transactions(page_size=100)]) for account in accounts]
+            assert sum(counts) == 100
+
+            merged = [t async for t in client.accounts_transactions(accounts, page_size=25)]
+            assert [t.id for t in merged] == [t.id async for t in await client.transactions(page_size=100)]
+
+            webhook = await client.webhook.create("https://example.com/up", "Benchmarks")
+            await webhook.ping()
+            assert len([log async for log in await webhook.logs()]) == 1
+            await webhook.delete()
+            with pytest.raises(NotFoundException):
+                await client.webhook(webhook.id)
+        finally:
+            await client.close()
+
+
+@pytest.mark.asyncio
+async def test_parallel_backfill_matches_sequential():
+    async with MockServer(MockUpApi(transactions=400, accounts=2)) as server:
+        client = Client("FAKE TOKEN", base_url=server.base_url)
+        try:
+            created = [datetime.fromisoformat(r["attributes"]["createdAt"]) for r in server.api.transactions]
+            since, until = min(created), max(created) + timedelta(seconds=1)
+            expected = [str(t.id) async for t in await client.transactions(page_size=50, since=since, until=until)]
+            assert len(expected) == 400
+            for shards in (1, 3, 7):
+                parallel = [str(t.id) async for t in client.transactions_parallel(since, until, shards, page_size=30)]
+                assert parallel == expected
+
+            # With the boundary on a transaction's timestamp it falls in both windows, the overlap is de-duplicated.
+            edge = created[200]
+            window_until = edge + (edge - since)
+            window = [str(t.id) async for t in await client.transactions(since=since, until=window_until, page_size=100)]
+            edge_ids = [r["id"] for r, at in zip(server.api.transactions, created) if edge <= at <= edge + timedelta(seconds=1)]
+            assert edge_ids and set(edge_ids) <= set(window)
+            parallel = [str(t.id) async for t in client.transactions_parallel(since, window_until, 2, page_size=30)]
+            assert parallel == window
+
+            limited = [str(t.id) async for t in client.transactions_parallel(since, until, 4, limit=75, page_size=20)]
+            assert limited == expected[:75]
+            raw = [t["id"] async for t in client.transactions_parallel(since, until, 3, page_size=40, raw=True)]
+            assert raw == expected
+        finally:
+            await client.close()
+
+
+@pytest.mark.asyncio
+async def test_accounts_fan_out_is_merged_limited_and_bounded():
+    class InFlight(Hooks):
+        def __init__(self):
+            self.current = self.most = 0
+
+        def on_request_start(self, event):
+            self.current += 1
+            self.most = max(self.most, self.current)
+
+        def on_request_end(self, event):
+            self.current -= 1
+
+    in_flight = InFlight()
+    async with MockServer(MockUpApi(transactions=300, accounts=4, latency=0.005)) as server:
+        client = Client("FAKE TOKEN", base_url=server.base_url, hooks=[in_flight])
+        try:
+            accounts = [account async for account in await client.accounts()]
+            merged = [t async for t in client.accounts_transactions(
+                accounts, limit=40, page_size=10, concurrency=2, prefetch=3)]
+        finally:
+            await client.close()
+
+    by_account = {}
+    for record in server.api.transactions:
+        by_account.setdefault(record["relationships"]["account"]["data"]["id"], []).append(record["id"])
+    # Each account contributes its 40 newest transactions.
+    assert sorted(str(t.id) for t in merged) == sorted(i for records in by_account.values() for i in records[:40])
+    created = [t.attributes.createdAt for t in merged]
+    assert created == sorted(created, reverse=True)
+    assert in_flight.most == 2
+
+
+@pytest.mark.asyncio
+async def test_benchmark_measures_every_path():
+    api = MockUpApi(transactions=300)
+    async with MockServer(api) as server:
+        results = await benchPagination.run_paths(server.base_url, api, list(benchPagination.PATHS), 50, repeat=1)
+
+    assert set(results) == set(benchPagination.PATHS)
+    for name, result in results.items():
+        assert result["items"] == 300, name
+        assert result["items_per_sec"] > 0 and result["peak_memory_mib"] > 0
+        assert result["latency_p50_ms"] <= result["latency_p99_ms"]
+    assert results["models"]["pages"] == 6
+
+
+def test_percentile():
+    values = [float(i) for i in range(1, 101)]
+    assert benchPagination.percentile(values, 50) == 50
+    assert benchPagination.percentile(values, 99) == 99
+    assert benchPagination.percentile([1.0], 90) == 1
+    assert benchPagination.percentile([], 50) == 0
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from asyncupbankapi.compact import _format_value
+from asyncupbankapi.models.baseModels import Money, parse_timestamp
+from asyncupbankapi.models.transactions import Transaction
+from benchmarks import payloads
+
+
+def test_timestamps():
+    local = timezone(timedelta(hours=10))
+    assert parse_timestamp("2021-01-01T10:00:00+10:00") == datetime(2021, 1, 1, 10, tzinfo=local)
+    assert parse_timestamp("2021-01-01T00:00:00Z") == datetime(2021, 1, 1, tzinfo=timezone.utc)
+    assert parse_timestamp("2021-01-01T10:00:00.250+10:00") == datetime(2021, 1, 1, 10, 0, 0, 250000, tzinfo=local)
+    assert parse_timestamp(datetime(2021, 1, 1, tzinfo=local)) == datetime(2021, 1, 1, tzinfo=local)
+    with pytest.raises(ValueError):
+        parse_timestamp("2021-13-01T10:00:00+10:00")
+
+
+def test_money_fast_path_matches_validation():
+    for value in ({"currencyCode": "AUD", "value": "-199.77", "valueInBaseUnits": -19977},
+                  {"currencyCode": "JPY", "value": "1250", "valueInBaseUnits": 1250}):
+        fast, generic = Money.validate(value), Money(**value)
+        assert fast == generic and fast.__fields_set__ == generic.__fields_set__
+        assert fast.decimal == Decimal(value["value"])
+
+    assert Money.validate({"currencyCode": "AUD", "value": -1.5, "valueInBaseUnits": -150}).decimal == Decimal("-1.50")
+
+
+@pytest.mark.parametrize("value, exponent, decimal", [
+    ({"currencyCode": "AUD", "value": "0.00", "valueInBaseUnits": 0}, 2, "0.00"),
+    ({"currencyCode": "JPY", "value": "0", "valueInBaseUnits": 0}, 0, "0"),
+    ({"currencyCode": "AUD", "value": "-0.05", "valueInBaseUnits": -5}, 2, "-0.05"),
+    ({"currencyCode": "JPY", "value": "-1250", "valueInBaseUnits": -1250}, 0, "-1250"),
+    ({"currencyCode": "KWD", "value": "-1.250", "valueInBaseUnits": -1250}, 3, "-1.250"),
+])
+def test_money_exponent_comes_from_the_currency(value, exponent, decimal):
+    money = Money.validate(value)
+    assert money.exponent == exponent
+    assert str(money.decimal) == decimal == _format_value(value["valueInBaseUnits"], exponent)
+    with pytest.raises(ValidationError):
+        Money.validate({"currencyCode": "AUD", "value": "1.00", "valueInBaseUnits": "lots"})
+    with pytest.raises(ValidationError):
+        Money.validate({"currencyCode": "AUD", "value": "one", "valueInBaseUnits": 100})
+
+
+def test_transaction_fields():
+    record = payloads.transactions(10)[-1]
+    attributes = Transaction.parse_obj(record).attributes
+    assert attributes.createdAt == datetime.fromisoformat(record["attributes"]["createdAt"])
+    assert attributes.amount.decimal == Decimal(record["attributes"]["amount"]["value"])
+    assert isinstance(attributes.amount, Money)
+
+    record["attributes"]["settledAt"] = None
+    assert Transaction.parse_obj(record).attributes.settledAt is None
+    record["attributes"]["amount"]["valueInBaseUnits"] = None
+    with pytest.raises(ValidationError):
+        Transaction.parse_obj(record)
@@ -0,0 +1,309 @@
+import asyncio
+import base64
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from yarl import URL
+
+from asyncupbankapi import Checkpoint, Client, Hooks, PaginationClosedException
+from asyncupbankapi.const import PAGE_SIZE
+from asyncupbankapi.models.tags import Tags
+from benchmarks.mockServer import MockServer, MockUpApi
+
+TAGS_URL = URL("https://api.up.com.au/api/v1/tags")
+
+
+def tag(index: int) -> dict:
+    return {
+        "type": "tags",
+        "id": f"tag-{index}",
+        "relationships": {"transactions": {"links": {"related": f"{TAGS_URL}/tag-{index}/transactions"}}}}
+
+
+class FakeSession:
+    """Serves `total` tags in pages following the query parameters of the next links."""
+
+    def __init__(self, total: int, delay: float = 0) -> None:
+        self.total = total
+        self.delay = delay
+        self.requests = []
+
+    def page(self, start: int = 0, size: int = 2) -> dict:
+        end = min(start + size, self.total)
+        next_url = None
+        if end < self.total:
+            next_url = str(TAGS_URL.with_query({PAGE_SIZE: size, "page[after]": end}))
+        return {"data": [tag(i) for i in range(start, end)], "links": {"prev": None, "next": next_url}}
+
+    async def get(self, endpoint, params=None) -> dict:
+        self.requests.append(endpoint)
+        await asyncio.sleep(self.delay)
+        return self.page(int(endpoint.query["page[after]"]), int(endpoint.query[PAGE_SIZE]))
+
+
+async def collect(pager) -> list:
+    return [item.id async for item in pager]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [0, 1, 4])
+async def test_iterates_every_page(prefetch):
+    session = FakeSession(9)
+    tags = Tags(session.page(), session, prefetch=prefetch)
+    assert await collect(tags) == [f"tag-{i}" for i in range(9)]
+    assert len(session.requests) == 4
+    assert not tags.has_next
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [0, 3])
+async def test_limit(prefetch):
+    session = FakeSession(20)
+    tags = Tags(session.page(), session, limit=5, prefetch=prefetch)
+    assert await collect(tags) == [f"tag-{i}" for i in range(5)]
+    assert tags.count == 5
+    assert session.requests[-1].query[PAGE_SIZE] == "1"
+
+
+@pytest.mark.asyncio
+async def test_shared_request_limit_applies_from_the_first_page():
+    session = FakeSession(6)
+    requests = asyncio.Semaphore(1)
+    await requests.acquire()
+    fetching = asyncio.ensure_future(
+        Tags.fetch(session, TAGS_URL.with_query({PAGE_SIZE: 2, "page[after]": 0}), prefetch=2, requests=requests))
+    await asyncio.sleep(0.01)
+    assert session.requests == []
+
+    requests.release()
+    tags = await fetching
+    await requests.acquire()
+    collecting = asyncio.ensure_future(collect(tags))
+    await asyncio.sleep(0.01)
+    # The pages read ahead wait for the same semaphore.
+    assert len(session.requests) == 1 and not collecting.done()
+    requests.release()
+    assert await collecting == [f"tag-{i}" for i in range(6)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [1, 3])
+async def test_prefetch_window_is_bounded(prefetch):
+    session = FakeSession(40)
+    tags = Tags(session.page(), session, prefetch=prefetch)
+    await tags.next()
+    await asyncio.sleep(0.01)
+    # One page handed to the consumer and exactly `prefetch` pages fetched ahead of it.
+    assert len(session.requests) == 1 + prefetch
+    await tags.next()
+    await asyncio.sleep(0.01)
+    assert len(session.requests) == 2 + prefetch
+    assert await collect(tags) == [f"tag-{i}" for i in range(40)]
+
+
+@pytest.mark.asyncio
+async def test_streaming_drops_consumed_pages():
+    session = FakeSession(9)
+    tags = Tags(session.page(), session, retain=False)
+    seen = []
+    async for item in tags:
+        seen.append(item.id)
+        assert len(tags.data) <= 2
+    assert seen == [f"tag-{i}" for i in range(9)]
+    assert tags.count == 9
+
+    with pytest.raises(IndexError):
+        await tags[0]
+    assert (await tags[8]).id == "tag-8"
+
+
+@pytest.mark.asyncio
+async def test_stream_respects_limit():
+    session = FakeSession(20)
+    tags = Tags(session.page(), session, limit=7)
+    assert [item.id async for item in tags.stream()] == [f"tag-{i}" for i in range(7)]
+    assert tags.count == 7
+    assert not tags.has_next
+
+
+@pytest.mark.asyncio
+async def test_raw_records_skip_validation():
+    session = FakeSession(5)
+    tags = Tags(session.page(), session, raw=True)
+    records = [item async for item in tags]
+    assert records == [tag(i) for i in range(5)]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("pool", ["thread", "process"])
+async def test_pages_are_parsed_in_an_executor(pool):
+    class Pages(Hooks):
+        def __init__(self):
+            self.parsed = []
+
+        def on_page_parsed(self, event):
+            self.parsed.append(event.items)
+
+    if pool == "thread":
+        executor = ThreadPoolExecutor(2)
+    else:
+        executor = ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("spawn"))
+    pages = Pages()
+    async with MockServer(MockUpApi(transactions=230, accounts=2)) as server:
+        client = Client("FAKE TOKEN", base_url=server.base_url, hooks=[pages], executor=executor)
+        try:
+            transactions = [t async for t in await client.transactions(page_size=50, prefetch=2)]
+            assert [str(t.id) for t in transactions] == [r["id"] for r in server.api.transactions]
+            assert pages.parsed == [50, 50, 50, 50, 30]
+            # Records come back from the executor without a session, it is set on the event loop.
+            assert all(t._session is client.session for t in transactions)
+
+            limited = [t async for t in await client.transactions(limit=75, page_size=20, raw=True, retain=False)]
+            assert [t["id"] for t in limited] == [str(t.id) for t in transactions[:75]]
+        finally:
+            await client.close()
+            executor.shutdown()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("prefetch", [0, 2])
+async def test_resume_from_checkpoint(prefetch):
+    saved = []
+    session = FakeSession(23)
+    tags = Tags(session.page(size=3), session, limit=20, prefetch=prefetch, on_checkpoint=saved.append, checkpoint_every=2)
+    seen = []
+    async for item in tags:
+        seen.append(item.id)
+        if len(seen) == 14:
+            break
+    # Checkpoints after the second and fourth pages, the fifth was being iterated.
+    assert [Checkpoint.decode(token).count for token in saved] == [6, 12]
+
+    resumed = await Tags.resume(FakeSession(23), saved[-1], prefetch=prefetch)
+    rest = await collect(resumed)
+    assert seen[:12] + rest == [f"tag-{i}" for i in range(20)]
+    assert resumed.count == 20 and not resumed.has_next
+    assert Checkpoint.decode(resumed.checkpoint()).done
+
+
+@pytest.mark.asyncio
+async def test_client_resumes_on_a_new_client():
+    saved = []
+    async with MockServer(MockUpApi(transactions=230, accounts=2)) as server:
+        first = Client("FAKE TOKEN", base_url=server.base_url)
+        try:
+            expected = [str(t.id) async for t in await first.transactions(page_size=30, status="SETTLED")]
+            seen = []
+            with pytest.raises(RuntimeError):
+                async for t in await first.transactions(page_size=30, status="SETTLED", on_checkpoint=saved.append):
+                    seen.append(str(t.id))
+                    if len(seen) == 100:
+                        raise RuntimeError("sync died")
+        finally:
+            await first.close()
+
+        second = Client("FAKE TOKEN", base_url=server.base_url)
+        elsewhere = Client("FAKE TOKEN", base_url="https://example.com/api/v1")
+        try:
+            resumed = await second.resume(saved[-1])
+            assert seen[:90] + [str(t.id) async for t in resumed] == expected
+            with pytest.raises(ValueError):
+                await second.resume("not a checkpoint")
+            # Resuming would send the token to the server in the checkpoint.
+            with pytest.raises(ValueError):
+                await elsewhere.resume(saved[-1])
+        finally:
+            await second.close()
+            await elsewhere.close()
+
+
+def checkpoint_token(*fields) -> str:
+    return base64.urlsafe_b64encode(json.dumps([Checkpoint.VERSION, *fields]).encode()).decode()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fields", [
+    (["Transactions"], None, 0),
+    ("Transactions", {"href": "https://example.com/api/v1/transactions"}, 0),
+    ("Transactions", 42, 0),
+    ("Transactions", None, True),
+    ("Transactions", None, -1),
+    ("Transactions", None, 0, "10"),
+    ("Transactions", None, 0, None, "yes"),
+])
+async def test_resume_rejects_malformed_checkpoints(fields):
+    client = Client("FAKE TOKEN", base_url="https://example.com/api/v1")
+    try:
+        with pytest.raises(ValueError):
+            await client.resume(checkpoint_token(*fields))
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_breaking_out_stops_prefetching():
+    session = FakeSession(60, delay=0.001)
+    tags = Tags(session.page(), session, prefetch=3)
+    async for item in tags:
+        if item.id == "tag-2":
+            break
+    # The abandoned iterator is closed by the event loop once it has been garbage collected.
+    await asyncio.sleep(0.02)
+    requests = len(session.requests)
+    await asyncio.sleep(0.02)
+    assert len(session.requests) == requests < 10
+    assert tags._producer is None
+
+
+@pytest.mark.asyncio
+async def test_aclose_cancels_prefetch_and_iteration_can_carry_on():
+    session = FakeSession(20, delay=0.001)
+    async with Tags(session.page(), session, prefetch=3) as tags:
+        await tags.next()
+        producer = tags._producer
+    assert producer.cancelled()
+    assert await collect(tags) == [f"tag-{i}" for i in range(20)]
+
+
+@pytest.mark.asyncio
+async def test_client_close_cancels_pager_tasks():
+    async with MockServer(MockUpApi(transactions=500, latency=0.01)) as server:
+        client = Client("FAKE TOKEN", base_url=server.base_url)
+        transactions = await client.transactions(page_size=20, prefetch=4)
+        await transactions.next()
+        producer = transactions._producer
+        await client.close()
+        requests = server.api.requests
+        await asyncio.sleep(0.05)
+
+    assert producer.cancelled()
+    assert server.api.requests == requests
+
+
+@pytest.mark.asyncio
+async def test_aclose_wakes_a_waiting_consumer():
+    session = FakeSession(20, delay=0.05)
+    tags = Tags(session.page(), session, prefetch=2)
+    waiting = asyncio.ensure_future(tags.next())
+    await asyncio.sleep(0.01)
+    await tags.aclose()
+    with pytest.raises(PaginationClosedException):
+        await asyncio.wait_for(waiting, 1)
+    # Closing only stopped the read ahead, the pages are fetched again.
+    assert await asyncio.wait_for(collect(tags), 5) == [f"tag-{i}" for i in range(20)]
+
+
+@pytest.mark.asyncio
+async def test_client_close_wakes_a_waiting_consumer():
+    async with MockServer(MockUpApi(transactions=500, latency=0.2)) as server:
+        client = Client("FAKE TOKEN", base_url=server.base_url)
+        transactions = await client.transactions(page_size=20, prefetch=2)
+        waiting = asyncio.ensure_future(transactions.next())
+        await asyncio.sleep(0.02)
+        await client.close()
+        with pytest.raises(PaginationClosedException):
+            await asyncio.wait_for(waiting, 1)
+        with pytest.raises(PaginationClosedException):
+            await asyncio.wait_for(transactions.next(), 1)
@@ -0,0 +1,64 @@
+import asyncio
+from time import monotonic
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from asyncupbankapi import HttpSession, RateLimitExceededException, RateLimiter
+
+
+def test_backoff_honours_retry_after():
+    limiter = RateLimiter()
+    assert limiter.backoff(0, {"Retry-After": "3"}) == 3
+    assert limiter.tokens < 1
+
+
+def test_backoff_is_bounded():
+    limiter = RateLimiter(backoff_base=1, backoff_max=2)
+    for attempt in range(10):
+        assert 0 <= limiter.backoff(attempt) <= 2
+
+
+def test_update_from_headers():
+    limiter = RateLimiter(rate=100, burst=10)
+    limiter.update({"RateLimit-Remaining": "2"})
+    assert limiter.tokens < 3
+
+
+@pytest.mark.asyncio
+async def test_acquire_throttles():
+    limiter = RateLimiter(rate=50, burst=1)
+    start = monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(6)))
+    assert monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_session_retries_rate_limited_requests():
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return web.json_response({"errors": [{"status": "429"}]}, status=429, headers={"Retry-After": "0"})
+        return web.json_response({"meta": {"ok": True}})
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+
+    async with TestServer(app) as server:
+        session = HttpSession("FAKE TOKEN", rate_limiter=RateLimiter(max_retries=2))
+        try:
+            assert await session.get(server.make_url("/")) == {"meta": {"ok": True}}
+        finally:
+            await session.close()
+
+        calls.clear()
+        session = HttpSession("FAKE TOKEN", rate_limiter=RateLimiter(max_retries=1))
+        try:
+            with pytest.raises(RateLimitExceededException):
+                await session.get(server.make_url("/"))
+        finally:
+            await session.close()
+    assert len(calls) == 2
@@ -0,0 +1,102 @@
+import random
+from datetime import datetime
+
+import pytest
+from yarl import URL
+
+from asyncupbankapi import Client
+from asyncupbankapi.const import BASE_URL, PAGE_SIZE
+from asyncupbankapi.store import TransactionStore
+from benchmarks import payloads
+
+
+class FakeSession:
+    """Serves accounts, categories, tags and transactions, filtering transactions by `filter[since]`."""
+    base_url = BASE_URL
+
+    def __init__(self) -> None:
+        rng = random.Random(0)
+        self.accounts = [payloads.account(rng, "Spending"), payloads.account(rng, "Savings", "SAVER")]
+        self.transactions = payloads.transactions(50)
+        for index, transaction in enumerate(self.transactions):
+            transaction["relationships"]["account"]["data"]["id"] = self.accounts[index % 2]["id"]
+        self.requests = []
+
+    async def get(self, endpoint, params=None) -> dict:
+        url = URL(str(endpoint)).update_query(params or {})
+        self.requests.append(url)
+        if url.path.endswith("/accounts"):
+            return payloads.page(self.accounts)
+        if url.path.endswith("/categories"):
+            return {"data": payloads.categories()}
+        if url.path.endswith("/tags"):
+            return payloads.page(payloads.tags())
+
+        records = self.transactions
+        if "filter[since]" in url.query:
+            since = datetime.fromisoformat(url.query["filter[since]"])
+            records = [r for r in records if datetime.fromisoformat(r["attributes"]["createdAt"]) >= since]
+
+        start = int(url.query.get("page[after]", 0))
+        size = int(url.query.get(PAGE_SIZE, 10))
+        next_url = None
+        if start + size < len(records):
+            next_url = str(url.update_query({"page[after]": start + size}))
+        return payloads.page(records[start:start + size], next_url)
+
+
+@pytest.mark.asyncio
+async def test_sync_is_incremental():
+    client = Client("FAKE TOKEN")
+    await client.close()
+    session = client._session = FakeSession()
+
+    with TransactionStore() as store:
+        # Everything older than the newest transaction is settled.
+        for transaction in session.transactions[1:]:
+            transaction["attributes"]["status"] = "SETTLED"
+        held = session.transactions[0]
+        held["attributes"]["status"] = "HELD"
+
+        assert await store.sync(client, page_size=10) == 50
+        assert len(store.accounts()) == 2
+        assert len(store.categories(parent="home")) == 4
+        assert len(store.transactions()) == 50
+        assert store.transactions(status="HELD", raw=True)[0]["id"] == held["id"]
+
+        # Only the held transaction and anything newer is fetched again.
+        held["attributes"]["status"] = "SETTLED"
+        assert await store.sync(client, page_size=10) == 1
+        assert store.transactions(status="HELD") == []
+        assert await store.sync(client, page_size=10) == 1
+
+        account_id = session.accounts[0]["id"]
+        assert len(store.transactions(account_id=account_id)) == 25
+        assert all(str(t.relationships.account.data.id) == account_id for t in store.transactions(account_id=account_id))
+
+        tag = "Holiday"
+        tagged = [t["id"] for t in session.transactions if {"type": "tags", "id": tag} in t["relationships"]["tags"]["data"]]
+        assert [t["id"] for t in store.transactions(tag=tag, raw=True)] == tagged
+
+
+@pytest.mark.asyncio
+async def test_held_transactions_that_disappear_are_removed():
+    client = Client("FAKE TOKEN")
+    await client.close()
+    session = client._session = FakeSession()
+
+    with TransactionStore() as store:
+        for transaction in session.transactions:
+            transaction["attributes"]["status"] = "SETTLED"
+        held = session.transactions[5]
+        held["attributes"]["status"] = "HELD"
+        assert await store.sync(client, page_size=10) == 50
+
+        # The authorisation was reversed, Up no longer returns it.
+        session.transactions.remove(held)
+        assert await store.sync(client, page_size=10) == 5
+        assert store.transactions(status="HELD") == []
+        assert len(store.transactions()) == 49
+        newest = session.transactions[0]["attributes"]["createdAt"]
+        assert store.sync_from() == datetime.fromisoformat(newest)
+        assert await store.sync(client, page_size=10) == 1
@@ -0,0 +1,70 @@
+import asyncio
+import queue
+import threading
+from time import perf_counter
+
+import pytest
+
+from asyncupbankapi.syncRunner import ShardProgress, SyncBatch, SyncRunner, TokenDone, _Options, _sync_shard
+from benchmarks.mockServer import MockServer, MockServerProcess, MockUpApi
+
+
+def test_tokens_are_sharded_and_synced():
+    events = []
+    with MockServerProcess(transactions=600, accounts=2) as server:
+        tokens = {f"customer-{i}": f"token-{i}" for i in range(5)}
+        runner = SyncRunner(tokens, processes=2, concurrency=2, batch_size=250, base_url=server.base_url)
+        assert [[key for key, _ in shard] for shard in runner.shards()] == [
+            ["customer-0", "customer-2", "customer-4"], ["customer-1", "customer-3"]]
+        result = runner.collect(events.append)
+
+    expected = [record["id"] for record in MockUpApi(transactions=600, accounts=2).transactions]
+    assert not result.errors
+    for key in tokens:
+        assert [transaction.id for transaction in result.transactions[key]] == expected
+        assert len(result.accounts[key]) == 2
+
+    assert sorted(event.key for event in events if isinstance(event, TokenDone)) == sorted(tokens)
+    assert {shard: (progress.tokens_done, progress.transactions) for shard, progress in result.shards.items()} == {
+        0: (3, 1800), 1: (2, 1200)}
+    assert all(progress.finished for progress in result.shards.values())
+    assert any(isinstance(event, ShardProgress) and not event.finished for event in events)
+
+
+def test_failures_are_reported_per_token(monkeypatch):
+    # Without a token the client falls back to this variable, which the workers inherit.
+    monkeypatch.delenv("UP_TOKEN", raising=False)
+    with MockServerProcess(transactions=10) as server:
+        result = SyncRunner({"ok": "token", "broken": ""}, processes=1, validate=True, base_url=server.base_url).collect()
+
+    assert len(result.transactions["ok"]) == 10
+    assert list(result.errors) == ["broken"]
+    assert result.errors["broken"].startswith("NotAuthorizedException")
+
+
+@pytest.mark.asyncio
+async def test_full_queue_does_not_block_the_event_loop():
+    events: "queue.Queue" = queue.Queue(maxsize=1)
+    received = []
+    release = threading.Event()
+
+    def consume():
+        # Falls behind until released, a worker blocking its loop on the full queue would stall for the whole timeout.
+        release.wait(timeout=2)
+        while not (received and isinstance(received[-1], ShardProgress) and received[-1].finished):
+            received.append(events.get())
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    async with MockServer(MockUpApi(transactions=30)) as server:
+        options = _Options(server.base_url, 2, 10, 10, None, False, None)
+        shard = asyncio.ensure_future(_sync_shard(0, [("a", "token"), ("b", "token")], options, events))
+        start = perf_counter()
+        await asyncio.sleep(0.2)
+        assert perf_counter() - start < 1 and events.full()
+        release.set()
+        await shard
+    consumer.join()
+
+    assert sum(len(event.transactions) for event in received if isinstance(event, SyncBatch)) == 60
+    assert sorted(event.key for event in received if isinstance(event, TokenDone)) == ["a", "b"]
@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import hmac
+import json
+
+import pytest
+from aiohttp import ClientSession
+from aiohttp.test_utils import TestServer
+
+from asyncupbankapi import Client
+from asyncupbankapi.enrichment import TransactionEnricher
+from asyncupbankapi.models.webhooks import WebhookEvent
+from asyncupbankapi.webhookReceiver import SIGNATURE_HEADER, WebhookReceiver
+from benchmarks.mockServer import MockServer, MockUpApi
+
+SECRET_KEY = "secret"
+
+
+def delivery(index: int, event_type: str = "TRANSACTION_CREATED", transaction: int = 0) -> tuple:
+    body = json.dumps({"data": {
+        "type": "webhook-events",
+        "id": f"00000000-0000-4000-8000-{index:012d}",
+        "attributes": {"eventType": event_type, "createdAt": "2021-01-01T10:00:00+10:00"},
+        "relationships": {
+            "webhook": {"data": {"type": "webhooks", "id": "10000000-0000-4000-8000-000000000000"}},
+            "transaction": {"data": {"type": "transactions", "id": f"20000000-0000-4000-8000-{transaction:012d}"}}}}}).encode()
+    return body, hmac.new(SECRET_KEY.encode(), body, hashlib.sha256).hexdigest()
+
+
+async def asgi_post(receiver: WebhookReceiver, chunks: list, signature: bytes) -> int:
+    """Posts the body `chunks` to the ASGI application and returns the response status."""
+    messages = [{"type": "http.request", "body": chunk, "more_body": index < len(chunks) - 1}
+                for index, chunk in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "headers": [(SIGNATURE_HEADER.lower().encode(), signature)]}
+    await receiver(scope, receive, send)
+    return sent[0]["status"]
+
+
+@pytest.mark.asyncio
+async def test_events_are_verified_deduplicated_and_batched():
+    batches = []
+
+    async def handler(events):
+        batches.append([str(event.id)[-2:] for event in events])
+
+    async with WebhookReceiver(SECRET_KEY, handler, workers=1, batch_size=3, batch_timeout=0.05) as receiver:
+        body, signature = delivery(1)
+        assert await receiver.receive(body, "bad signature") == 401
+        assert await receiver.receive(body, "signé \u2713") == 401
+        assert await receiver.receive(b"{}", hmac.new(SECRET_KEY.encode(), b"{}", hashlib.sha256).hexdigest()) == 400
+        assert await receiver.receive(body, signature) == 200
+        assert await receiver.receive(body, signature) == 200
+        for index in range(2, 6):
+            assert await receiver.receive(*delivery(index)) == 200
+
+    assert batches == [["01", "02", "03"], ["04", "05"]]
+    assert receiver.stats["duplicates"] == 1
+    assert receiver.stats["rejected"] == 3
+    assert receiver.stats["handled"] == 5
+
+
+@pytest.mark.asyncio
+async def test_full_queue_asks_for_redelivery():
+    release = asyncio.Event()
+
+    async def handler(events):
+        await release.wait()
+
+    async with WebhookReceiver(SECRET_KEY, handler, workers=1, queue_size=1) as receiver:
+        assert await receiver.receive(*delivery(1)) == 200
+        await asyncio.sleep(0)
+        assert await receiver.receive(*delivery(2)) == 200
+        assert await receiver.receive(*delivery(3)) == 503
+        release.set()
+        await asyncio.sleep(0.01)
+        assert await receiver.receive(*delivery(3)) == 200
+
+
+@pytest.mark.asyncio
+async def test_failed_events_are_accepted_again():
+    attempts = []
+
+    async def handler(events):
+        attempts.append([str(event.id)[-2:] for event in events])
+        if len(attempts) == 1:
+            raise ValueError("database unavailable")
+
+    async with WebhookReceiver(SECRET_KEY, handler, workers=1, batch_timeout=0) as receiver:
+        assert await receiver.receive(*delivery(1)) == 200
+        await asyncio.sleep(0.01)
+        assert await receiver.receive(*delivery(1)) == 200
+        await asyncio.sleep(0.01)
+        assert await receiver.receive(*delivery(1)) == 200
+
+    assert attempts == [["01"], ["01"]]
+    assert receiver.stats["failed"] == 1 and receiver.stats["handled"] == 1 and receiver.stats["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_stopped_receiver_asks_for_redelivery():
+    received = []
+
+    async def handler(events):
+        received.extend(events)
+
+    receiver = WebhookReceiver(SECRET_KEY, handler)
+    await receiver.start()
+    assert await receiver.receive(*delivery(1)) == 200
+    await receiver.stop()
+    assert await receiver.receive(*delivery(2)) == 503
+    assert len(received) == 1 and receiver.stats["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_asgi_app_rejects_non_ascii_signatures():
+    async def handler(events):
+        pass
+
+    async with WebhookReceiver(SECRET_KEY, handler) as receiver:
+        body, signature = delivery(1)
+        assert await asgi_post(receiver, [body], "signé".encode("latin-1")) == 401
+        assert await asgi_post(receiver, [body[:10], body[10:]], signature.encode()) == 200
+
+
+@pytest.mark.asyncio
+async def test_large_bodies_are_rejected():
+    async def handler(events):
+        pass
+
+    receiver = WebhookReceiver(SECRET_KEY, handler, max_body_size=1000)
+    async with receiver:
+        assert await asgi_post(receiver, [b"x" * 600, b"x" * 600, b"unread"], b"signature") == 413
+
+    async with TestServer(receiver.aiohttp_app()) as server:
+        async with ClientSession() as session:
+            async with session.post(server.make_url("/"), data=b"x" * 1200, headers={SIGNATURE_HEADER: "signature"}) as response:
+                assert response.status == 413
+    assert receiver.stats["rejected"] == 2
+
+
+@pytest.mark.asyncio
+async def test_aiohttp_app():
+    received = []
+
+    async def handler(events):
+        received.extend(events)
+
+    receiver = WebhookReceiver(SECRET_KEY, handler)
+    async with TestServer(receiver.aiohttp_app()) as server:
+        body, signature = delivery(1, "TRANSACTION_SETTLED")
+        async with ClientSession() as session:
+            async with session.post(server.make_url("/"), data=body, headers={SIGNATURE_HEADER: signature}) as response:
+                assert response.status == 200
+        await asyncio.sleep(0.01)
+
+    assert received[0].relationships.transaction.data.id.hex.startswith("2")
+
+
+@pytest.mark.asyncio
+async def test_enrichment_deduplicates_lookups():
+    async with MockServer(MockUpApi(transactions=3, accounts=1)) as server:
+        ids = [record["id"] for record in server.api.transactions]
+
+        def event(index: int, transaction: int, event_type: str = "TRANSACTION_CREATED") -> WebhookEvent:
+            record = json.loads(delivery(index, event_type)[0])
+            record["data"]["relationships"]["transaction"]["data"]["id"] = ids[transaction]
+            return WebhookEvent.parse_obj(record)
+
+        client = Client("FAKE TOKEN", base_url=server.base_url)
+        try:
+            async with TransactionEnricher(client, window=0.01) as enricher:
+                events = [event(i, i % 3) for i in range(9)] + [event(9, 0, "TRANSACTION_DELETED")]
+                transactions = await asyncio.gather(*(enricher.submit(e) for e in events))
+
+                assert [str(t.id) for t in transactions[:9]] == [ids[i % 3] for i in range(9)]
+                assert transactions[9] is None
+                assert server.api.requests == 3
+
+                assert await enricher.enrich(events[:3]) == transactions[:3]
+                assert enricher.stats == {"events": 13, "fetched": 3, "cache_hits": 3}
+
+                # Batches still waiting for their window are resolved on close.
+                pending = enricher.submit(event(10, 1))
+            assert str((await pending).id) == ids[1]
+        finally:
+            await client.close()
+
+
+@pytest.mark.asyncio
+async def test_enrichment_fetches_settled_transactions_again():
+    async with MockServer(MockUpApi(transactions=1, accounts=1)) as server:
+        record = server.api.transactions[0]
+        record["attributes"]["status"] = "HELD"
+
+        def event(index: int, event_type: str) -> WebhookEvent:
+            body = json.loads(delivery(index, event_type)[0])
+            body["data"]["relationships"]["transaction"]["data"]["id"] = record["id"]
+            return WebhookEvent.parse_obj(body)
+
+        client = Client("FAKE TOKEN", base_url=server.base_url)
+        try:
+            async with TransactionEnricher(client) as enricher:
+                created, = await enricher.enrich([event(1, "TRANSACTION_CREATED")])
+                record["attributes"]["status"] = "SETTLED"
+                settled, = await enricher.enrich([event(2, "TRANSACTION_SETTLED")])
+                again, = await enricher.enrich([event(3, "TRANSACTION_SETTLED")])
+        finally:
+            await client.close()
+
+    assert created.attributes.status.value == "HELD"
+    assert settled.attributes.status.value == "SETTLED"
+    assert again is settled and server.api.requests == 2